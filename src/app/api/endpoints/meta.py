@@ -1,8 +1,12 @@
 import structlog
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from fastapi.requests import Request
+from starlette import status
 
-from app.schemas.meta import Meta
+from app.database.slow_query_log import slow_query_log
+from app.domain.repositories.cache import get_entity_caches
+from app.schemas.meta import CacheStats, Meta, SlowQueryPlan
+from app.settings import settings
 
 _log = structlog.getLogger(__name__)
 
@@ -13,3 +17,24 @@ router = APIRouter(prefix="/meta")
 async def meta(request: Request) -> Meta:
     _log.info(f"received request for {request.url}")
     return Meta(app_version="0.1.1")
+
+
+@router.get("/cache", response_model=dict[str, CacheStats])
+async def cache_stats() -> dict[str, CacheStats]:
+    """Hit/miss counters of the entity caches of this process"""
+    return {
+        name: CacheStats(hits=cache.hits, misses=cache.misses)
+        for name, cache in get_entity_caches().items()
+    }
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryPlan])
+async def slow_queries() -> list[SlowQueryPlan]:
+    """
+    Plans captured by the slow query log of this process, newest first
+
+    Only served in DEBUG, the plans can show parameter values.
+    """
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return list(reversed(slow_query_log.plans))
@@ -6,7 +6,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 import app.schemas.endpoints as sc
-from app.dependencies import get_db
+from app.api.responses import PydanticJSONResponse
+from app.database.models import RATING_HISTOGRAM_BUCKETS
+from app.dependencies import get_db, get_read_db
+from app.domain.repositories.base_repository import TotalMode
+from app.domain.repositories.movie_leaderboard_repository import (
+    MovieLeaderboardRepository,
+)
+from app.domain.repositories.movie_rating_stats_repository import (
+    MovieRatingStatsRepository,
+)
 from app.domain.repositories.movie_repository import MovieRepository
 
 log = structlog.get_logger()
@@ -18,25 +27,63 @@ router = APIRouter()
 async def create_movie(
     movie: sc.MovieCreate, db: AsyncSession = Depends(get_db)
 ) -> sc.MovieOut:
-    filters = [("title", movie.title)]
-    existing = await MovieRepository.find_one(db, filters=filters)
-    if existing:
+    new_movie = await MovieRepository.create_or_conflict(
+        db, conflict_target=["title"], **movie.model_dump()
+    )
+    if not new_movie:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Movie already exists with title {movie.title}",
         )
 
-    new_movie = await MovieRepository.create(db, commit=True, **movie.model_dump())
     log.info("movie_created", movie_id=new_movie.id)
     return new_movie
 
 
+# before /movies/{movie_id}, which would take "search" or "top" for an id
+@router.get("/movies/search", response_model=sc.MovieListOut)
+async def search_movies(
+    db: AsyncSession = Depends(get_read_db),
+    q: str = Query(..., min_length=1, max_length=200, description="Search query"),
+    limit: int = Query(10, ge=1, le=100, description="Query result limit"),
+    cursor: str | None = Query(None, description="Cursor of the page to fetch"),
+) -> PydanticJSONResponse:
+    """
+    Movies matching q in their title or description, best match first. Quoted
+    phrases, "or" and -excluded words are understood, and titles with a word
+    similar to the query's match too.
+
+    A query matching more than settings.search.max_ranked movies is answered with
+    a 400 SEARCH_TOO_BROAD error, it has to be refined.
+    """
+    page = await MovieRepository.search(db, q, limit=limit, cursor=cursor)
+    return PydanticJSONResponse(
+        sc.MovieListOut(items=page.items, next_cursor=page.next_cursor)
+    )
+
+
+@router.get("/movies/top", response_model=sc.TopMovieListOut)
+async def get_top_movies(
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(10, ge=1, le=100, description="Number of movies"),
+    min_ratings: int = Query(
+        1, ge=0, description="Leave out the movies with fewer ratings"
+    ),
+) -> sc.TopMovieListOut:
+    """
+    Movies ranked by Bayesian average: their mean rating pulled towards the mean
+    of all movies, the more so the fewer ratings they have. Recomputed
+    periodically, refreshed_at tells when.
+    """
+    items, refreshed_at = await MovieLeaderboardRepository.top(db, limit, min_ratings)
+    return sc.TopMovieListOut(items=items, refreshed_at=refreshed_at)
+
+
 @router.get("/movies/{movie_id}", response_model=sc.MovieOut)
 async def get_movie_by_id(
-    movie_id: UUID, db: AsyncSession = Depends(get_db)
+    movie_id: UUID, db: AsyncSession = Depends(get_read_db)
 ) -> sc.MovieOut:
-    filters = [("id", movie_id)]
-    movie = await MovieRepository.find_one(db, filters=filters)
+    movie = await MovieRepository.get_by_id(db, movie_id)
     if not movie:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found"
@@ -44,12 +91,59 @@ async def get_movie_by_id(
     return movie
 
 
+@router.get("/movies/{movie_id}/stats", response_model=sc.MovieRatingStatsOut)
+async def get_movie_rating_stats(
+    movie_id: UUID, db: AsyncSession = Depends(get_read_db)
+) -> sc.MovieRatingStatsOut:
+    stats = await MovieRatingStatsRepository.get_stats(db, movie_id)
+    if stats:
+        return stats
+
+    movie = await MovieRepository.get_by_id(db, movie_id)
+    if not movie:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found"
+        )
+    return sc.MovieRatingStatsOut(
+        movie_id=movie_id, count=0, sum=0.0, histogram=[0] * RATING_HISTOGRAM_BUCKETS
+    )
+
+
 @router.get("/movies", response_model=sc.MovieListOut)
 async def get_movies(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     offset: int | None = Query(0, ge=0, description="Query result offset"),
-    limit: int | None = Query(10, le=100, description="Query result limit"),
-) -> sc.MovieListOut:
-    movies = await MovieRepository.find(db, offset=offset, limit=limit)
-    total = await MovieRepository.count(db)
-    return sc.MovieListOut(items=movies, total=total)
+    limit: int = Query(10, ge=1, le=100, description="Query result limit"),
+    cursor: str | None = Query(
+        None, description="Cursor of the page to fetch, takes precedence over offset"
+    ),
+    include_total: TotalMode = Query(
+        TotalMode.EXACT,
+        description="Whether to count the results, estimate uses planner statistics",
+    ),
+    ids: list[UUID] | None = Query(
+        None,
+        max_length=sc.BATCH_GET_MAX_IDS,
+        description="Get these movies, in this order, rather than a page",
+    ),
+) -> PydanticJSONResponse:
+    if ids:
+        return await batch_get_movies(sc.BatchGetIn(ids=ids), db)
+    page = await MovieRepository.find_page(
+        db, limit=limit, offset=offset, cursor=cursor, total=include_total
+    )
+    return PydanticJSONResponse(
+        sc.MovieListOut(items=page.items, total=page.total, next_cursor=page.next_cursor)
+    )
+
+
+@router.post("/movies:batchGet", response_model=sc.MovieListOut)
+async def batch_get_movies(
+    batch: sc.BatchGetIn, db: AsyncSession = Depends(get_read_db)
+) -> PydanticJSONResponse:
+    """
+    Movies by id in one round trip, in the order of the ids, and the ids of
+    those not found
+    """
+    movies, missing_ids = await MovieRepository.get_many(db, batch.ids)
+    return PydanticJSONResponse(sc.MovieListOut(items=movies, missing_ids=missing_ids))
@@ -1,12 +1,15 @@
+import asyncio
 from uuid import UUID
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette import status
 
 import app.schemas.endpoints as sc
-from app.dependencies import get_db
+from app.api.responses import PydanticJSONResponse
+from app.dependencies import get_read_session_factory
+from app.domain.repositories.base_repository import TotalMode
 from app.domain.repositories.rating_repository import RatingRepository
 from app.domain.repositories.user_repository import UserRepository
 
@@ -18,19 +21,52 @@ router = APIRouter()
 @router.get("/user-profile/{user_id}", response_model=sc.UserProfileOut)
 async def get_ratings(
     user_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    SessionLocal: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
     offset: int | None = Query(0, ge=0, description="Query result offset"),
-    limit: int | None = Query(10, le=100, description="Query result limit"),
-) -> sc.UserProfileOut:
-    user = await UserRepository.find_one(db, [("id", user_id)])
-    if not user:
+    limit: int = Query(10, ge=1, le=100, description="Query result limit"),
+    cursor: str | None = Query(
+        None, description="Cursor of the page to fetch, takes precedence over offset"
+    ),
+    include_total: TotalMode = Query(
+        TotalMode.EXACT,
+        description="Whether to count the results, the count of the user's rating "
+        "stats, always exact",
+    ),
+) -> PydanticJSONResponse:
+    """
+    A user, the count and mean of their ratings, and a page of their ratings with
+    the title and rating stats of every movie
+    """
+
+    async def user_with_rating_stats() -> tuple[sc.UserOut, sc.UserRatingStatsOut] | None:
+        async with SessionLocal() as session:
+            return await UserRepository.get_with_rating_stats(session, user_id)
+
+    async def ratings_page() -> sc.ProfileRatingListOut:
+        async with SessionLocal() as session:
+            page = await RatingRepository.find_profile_page(
+                session, user_id, limit=limit, offset=offset, cursor=cursor
+            )
+        return sc.ProfileRatingListOut(items=page.items, next_cursor=page.next_cursor)
+
+    # independent statements, run side by side on two pooled connections. When
+    # one fails the other is cancelled, and done with its session, before the
+    # error is raised
+    try:
+        async with asyncio.TaskGroup() as tasks:
+            found_task = tasks.create_task(user_with_rating_stats())
+            ratings_task = tasks.create_task(ratings_page())
+    except ExceptionGroup as group:
+        # handled like the error of a direct await
+        raise group.exceptions[0]
+    found, ratings = found_task.result(), ratings_task.result()
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-
-    filters = [("user_id", user_id)]
-    ratings = await RatingRepository.find(db, filters=filters, offset=offset, limit=limit)
-    total = await RatingRepository.count(db, filters=filters)
-    return sc.UserProfileOut(
-        user=user, ratings=sc.RatingListOut(items=ratings, total=total)
+    user, rating_stats = found
+    if include_total is not TotalMode.NONE:
+        ratings.total = rating_stats.count
+    return PydanticJSONResponse(
+        sc.UserProfileOut(user=user, rating_stats=rating_stats, ratings=ratings)
     )
@@ -1,13 +1,24 @@
+import csv
+import datetime
+import io
+from typing import AsyncIterator
 from uuid import UUID
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette import status
+from starlette.responses import StreamingResponse
 
 import app.schemas.endpoints as sc
-from app.dependencies import get_db
+from app.api.responses import PydanticJSONResponse
+from app.dependencies import get_db, get_read_db, get_read_session_factory
+from app.domain.repositories.base_repository import Filter, TotalMode
+from app.domain.repositories.movie_rating_stats_repository import (
+    MovieRatingStatsRepository,
+)
 from app.domain.repositories.rating_repository import RatingRepository
+from app.domain.services.rating_service import rate_movies
 
 log = structlog.get_logger()
 
@@ -16,30 +27,156 @@ router = APIRouter()
 
 @router.post("/ratings", response_model=sc.RatingOut, status_code=status.HTTP_201_CREATED)
 async def rate_movie(rating: sc.RatingCreate, db: AsyncSession = Depends(get_db)):
-    filters = [
-        ("user_id", rating.user_id),
-        ("movie_id", rating.movie_id),
-    ]
-    existing = await RatingRepository.find_one(db, filters=filters)
-    if existing:
+    new_rating = await RatingRepository.create_or_conflict(
+        db, conflict_target=["user_id", "movie_id"], **rating.model_dump()
+    )
+    if not new_rating:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Rating already exists for this user/movie",
         )
 
-    new_rating = await RatingRepository.create(db, **rating.model_dump())
+    # same transaction as the rating itself, committed by get_db
+    await MovieRatingStatsRepository.add_rating(db, rating.movie_id, rating.rating)
     log.info("rating_created", rating_id=new_rating.id)
     return new_rating
 
 
+@router.post("/ratings:batch", response_model=sc.RatingBatchOut)
+async def rate_movies_batch(
+    batch: sc.RatingBatchCreate, db: AsyncSession = Depends(get_db)
+) -> sc.RatingBatchOut:
+    items = await rate_movies(db, batch.items, on_conflict=batch.on_conflict)
+    log.info("ratings_batch_stored", size=len(items))
+    return sc.RatingBatchOut(items=items)
+
+
+EXPORT_MEDIA_TYPES = {
+    sc.ExportFormat.NDJSON: "application/x-ndjson",
+    sc.ExportFormat.CSV: "text/csv",
+}
+EXPORT_COLUMNS = list(sc.RatingExportOut.model_fields)
+# rows read from the cursor and encoded at once
+EXPORT_BATCH_SIZE = 5000
+
+
+def _ndjson(batch: list[sc.RatingExportOut]) -> bytes:
+    return b"".join(
+        rating.__pydantic_serializer__.to_json(rating) + b"\n" for rating in batch
+    )
+
+
+def _csv(batch: list[sc.RatingExportOut]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [
+            rating.id,
+            rating.user_id,
+            rating.movie_id,
+            rating.rating,
+            rating.created_at.isoformat(),
+        ]
+        for rating in batch
+    )
+    return buffer.getvalue().encode()
+
+
+# before /ratings/{movie_id}, which would take "export" for an id
+@router.get(
+    "/ratings/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}
+    },
+)
+async def export_ratings(
+    SessionLocal: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
+    format: sc.ExportFormat = Query(sc.ExportFormat.NDJSON, description="Output format"),
+    movie_id: UUID | None = Query(None, description="Only the ratings of this movie"),
+    user_id: UUID | None = Query(None, description="Only the ratings of this user"),
+    created_after: datetime.datetime | None = Query(
+        None, description="Only the ratings created at or after this time"
+    ),
+    created_before: datetime.datetime | None = Query(
+        None, description="Only the ratings created before this time"
+    ),
+) -> StreamingResponse:
+    """
+    Every rating matching the filters, streamed as they are read, one JSON object
+    per line or CSV with a header line, in no particular order
+    """
+    filters: list[Filter] = []
+    if movie_id:
+        filters.append(("movie_id", movie_id))
+    if user_id:
+        filters.append(("user_id", user_id))
+    if created_after:
+        filters.append(("created_at", "__ge__", created_after))
+    if created_before:
+        filters.append(("created_at", "__lt__", created_before))
+    encode = _csv if format is sc.ExportFormat.CSV else _ndjson
+
+    async def body() -> AsyncIterator[bytes]:
+        # a session of its own, the response is sent after the dependencies are
+        # closed. Sending waits for the client to keep up, so rows are only read
+        # as fast as they are taken, and a disconnect cancels the iteration,
+        # which closes the cursor and hands the connection back
+        exported = 0
+        finished = False
+        try:
+            async with SessionLocal() as session:
+                # the cursor needs a transaction, and the export one snapshot
+                await session.connection(
+                    execution_options={
+                        "isolation_level": "REPEATABLE READ",
+                        "postgresql_readonly": True,
+                    }
+                )
+                if format is sc.ExportFormat.CSV:
+                    yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+                async for batch in RatingRepository.stream(
+                    session,
+                    filters=filters,
+                    schema=sc.RatingExportOut,
+                    batch_size=EXPORT_BATCH_SIZE,
+                ):
+                    yield encode(batch)
+                    exported += len(batch)
+            finished = True
+        finally:
+            log.info("ratings_exported", rows=exported, finished=finished)
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="ratings.{format.value}"'},
+    )
+
+
 @router.get("/ratings/{movie_id}", response_model=sc.RatingListOut)
 async def get_ratings(
     movie_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     offset: int | None = Query(0, ge=0, description="Query result offset"),
-    limit: int | None = Query(10, le=100, description="Query result limit"),
-) -> sc.RatingListOut:
-    filters = [("movie_id", movie_id)]
-    ratings = await RatingRepository.find(db, filters=filters, offset=offset, limit=limit)
-    total = await RatingRepository.count(db, filters=filters)
-    return sc.RatingListOut(items=ratings, total=total)
+    limit: int = Query(10, ge=1, le=100, description="Query result limit"),
+    cursor: str | None = Query(
+        None, description="Cursor of the page to fetch, takes precedence over offset"
+    ),
+    include_total: TotalMode = Query(
+        TotalMode.EXACT,
+        description="Whether to count the results, estimate uses planner statistics",
+    ),
+) -> PydanticJSONResponse:
+    filters: list[Filter] = [("movie_id", movie_id)]
+    page = await RatingRepository.find_page(
+        db,
+        filters=filters,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        total=include_total,
+    )
+    return PydanticJSONResponse(
+        sc.RatingListOut(items=page.items, total=page.total, next_cursor=page.next_cursor)
+    )
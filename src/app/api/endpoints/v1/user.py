@@ -1,12 +1,14 @@
 from uuid import UUID
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 import app.schemas.endpoints as sc
-from app.dependencies import get_db
+from app.api.responses import PydanticJSONResponse
+from app.dependencies import get_db, get_read_db
+from app.domain.repositories.movie_neighbor_repository import MovieNeighborRepository
 from app.domain.repositories.user_repository import UserRepository
 
 log = structlog.get_logger()
@@ -18,26 +20,85 @@ router = APIRouter()
 async def create_user(
     user: sc.UserCreate, db: AsyncSession = Depends(get_db)
 ) -> sc.UserOut:
-    filters = [("email", user.email)]
-    existing = await UserRepository.find_one(db, filters=filters)
-    if existing:
+    new_user = await UserRepository.create_or_conflict(
+        db, conflict_target=["email"], **user.model_dump()
+    )
+    if not new_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"User already exists with email {user.email}",
         )
 
-    new_user = await UserRepository.create(db, **user.model_dump())
     log.info("user_created", user_id=new_user.id)
 
     return new_user
 
 
+@router.get("/users", response_model=sc.UserListOut)
+async def get_users(
+    ids: list[UUID] = Query(
+        ...,
+        min_length=1,
+        max_length=sc.BATCH_GET_MAX_IDS,
+        description="Get these users, in this order",
+    ),
+    db: AsyncSession = Depends(get_read_db),
+) -> PydanticJSONResponse:
+    return await batch_get_users(sc.BatchGetIn(ids=ids), db)
+
+
+@router.post("/users:batchGet", response_model=sc.UserListOut)
+async def batch_get_users(
+    batch: sc.BatchGetIn, db: AsyncSession = Depends(get_read_db)
+) -> PydanticJSONResponse:
+    """
+    Users by id in one round trip, in the order of the ids, and the ids of
+    those not found
+    """
+    users, missing_ids = await UserRepository.get_many(db, batch.ids)
+    return PydanticJSONResponse(sc.UserListOut(items=users, missing_ids=missing_ids))
+
+
+# before /users/{user_id}, which would take "search" for an id
+@router.get("/users/search", response_model=sc.UserListOut)
+async def search_users(
+    db: AsyncSession = Depends(get_read_db),
+    q: str = Query(..., min_length=1, max_length=200, description="Name or email prefix"),
+    limit: int = Query(10, ge=1, le=100, description="Query result limit"),
+    cursor: str | None = Query(None, description="Cursor of the page to fetch"),
+) -> PydanticJSONResponse:
+    """Users whose name or email starts with q, ignoring case"""
+    page = await UserRepository.search(db, q, limit=limit, cursor=cursor)
+    return PydanticJSONResponse(
+        sc.UserListOut(items=page.items, next_cursor=page.next_cursor)
+    )
+
+
 @router.get("/users/{user_id}", response_model=sc.UserOut)
-async def get_user(user_id: UUID, db: AsyncSession = Depends(get_db)) -> sc.UserOut:
-    filters = [("id", user_id)]
-    user = await UserRepository.find_one(db, filters=filters)
+async def get_user(user_id: UUID, db: AsyncSession = Depends(get_read_db)) -> sc.UserOut:
+    user = await UserRepository.get_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
     return user
+
+
+@router.get("/users/{user_id}/recommendations", response_model=sc.RecommendationListOut)
+async def get_recommendations(
+    user_id: UUID,
+    k: int = Query(20, ge=1, le=100, description="Number of movies to recommend"),
+    db: AsyncSession = Depends(get_read_db),
+) -> sc.RecommendationListOut:
+    """
+    Movies the user hasn't rated, scored from the neighbors of the movies they
+    rated. Neighbors are recomputed offline, see
+    app.domain.services.recommendation_service.
+    """
+    user = await UserRepository.get_by_id(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    items = await MovieNeighborRepository.recommend(db, user_id, k)
+    return sc.RecommendationListOut(items=items)
@@ -0,0 +1,21 @@
+from typing import Any
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class PydanticJSONResponse(Response):
+    """
+    JSON response rendered straight from an already validated pydantic model
+
+    Returning a Response from an endpoint makes FastAPI skip validating the result
+    against the response_model and running jsonable_encoder over it. The model is
+    dumped by pydantic-core in a single pass instead.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes | memoryview:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
@@ -1,3 +1,6 @@
+import os
+from typing import Literal
+
 import pydantic
 
 
@@ -5,4 +8,18 @@ class UvicornSettings(pydantic.BaseModel):
     host: str = "0.0.0.0"
     port: int = 8080
     log_level: str = "info"
+    # development only, reloading always runs a single worker
     reload: bool = False
+
+    # worker processes, each with its own event loop, DB engine and pool
+    workers: int = pydantic.Field(default_factory=lambda: os.cpu_count() or 1, ge=1)
+    # auto picks uvloop and httptools, installed with uvicorn[standard]
+    loop: Literal["auto", "asyncio", "uvloop"] = "auto"
+    http: Literal["auto", "h11", "httptools"] = "auto"
+    timeout_keep_alive: int = 5  # In seconds
+    # pending connections the kernel queues per listening socket
+    backlog: int = 2048
+    # concurrent connections and tasks per worker before answering 503
+    limit_concurrency: int | None = None
+    # In seconds, in-flight requests get this long to finish on shutdown
+    timeout_graceful_shutdown: int | None = 30
@@ -1,6 +1,6 @@
 from contextlib import contextmanager
 from contextvars import ContextVar
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Generator, Optional
 
 import structlog
@@ -9,6 +9,8 @@ from starlette.types import ASGIApp, Receive, Scope, Send
 
 _log = structlog.getLogger(__name__)
 ctx: ContextVar["Context"] = ContextVar("context")
+# DB statements of the current request, see app.database.instrumentation
+query_stats: ContextVar["QueryStats"] = ContextVar("query_stats")
 
 
 @dataclass(frozen=True)
@@ -17,6 +19,22 @@ class Context:
     tenant: str
 
 
+@dataclass
+class QueryStats:
+    statements: int = 0
+    # seconds
+    duration: float = 0.0
+    slowest_duration: float = 0.0
+    slowest_statement: str | None = field(default=None, repr=False)
+
+    def add(self, statement: str, duration: float) -> None:
+        self.statements += 1
+        self.duration += duration
+        if duration > self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_statement = statement
+
+
 @contextmanager
 def set_context(context: Context) -> Generator:
     token = ctx.set(context)
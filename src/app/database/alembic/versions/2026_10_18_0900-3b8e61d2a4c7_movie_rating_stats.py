@@ -0,0 +1,55 @@
+"""Movie rating stats
+
+Revision ID: 3b8e61d2a4c7
+Revises: f33506c5286e
+Create Date: 2026-10-18 09:00:12.417305
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8e61d2a4c7"
+down_revision: Union[str, None] = "f33506c5286e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HISTOGRAM_BUCKETS = 10
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "movie_rating_stats",
+        sa.Column("movie_id", sa.UUID(), nullable=False),
+        sa.Column("shard", sa.SmallInteger(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("sum", sa.Float(), nullable=False),
+        sa.Column("histogram", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["movie_id"],
+            ["movie_db.id"],
+        ),
+        sa.PrimaryKeyConstraint("movie_id", "shard"),
+    )
+
+    # Backfill the existing ratings into shard 0
+    buckets = ", ".join(
+        f"count(*) FILTER (WHERE least(floor(rating), {HISTOGRAM_BUCKETS}) = {i})"
+        for i in range(1, HISTOGRAM_BUCKETS + 1)
+    )
+    op.execute(
+        "INSERT INTO movie_rating_stats (movie_id, shard, count, sum, histogram) "
+        f"SELECT movie_id, 0, count(*), sum(rating), ARRAY[{buckets}]::integer[] "
+        "FROM rating_db GROUP BY movie_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("movie_rating_stats")
@@ -0,0 +1,53 @@
+"""Keyset pagination indexes
+
+Revision ID: 9d0c4f7ab215
+Revises: 3b8e61d2a4c7
+Create Date: 2026-10-18 09:30:41.052318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d0c4f7ab215"
+down_revision: Union[str, None] = "3b8e61d2a4c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_movie_db_created_at_id", "movie_db", ["created_at", "id"]),
+    ("ix_user_db_created_at_id", "user_db", ["created_at", "id"]),
+    (
+        "ix_rating_db_movie_id_created_at_id",
+        "rating_db",
+        ["movie_id", "created_at", "id"],
+    ),
+    ("ix_rating_db_user_id_created_at_id", "rating_db", ["user_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build,
+    # it can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,74 @@
+"""Unique movie title
+
+Revision ID: c52a9e3f7b18
+Revises: 9d0c4f7ab215
+Create Date: 2026-10-18 10:00:27.903114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c52a9e3f7b18"
+down_revision: Union[str, None] = "9d0c4f7ab215"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplicate titles may have slipped past the old check-then-insert, the index
+    # can't be built until they are merged by hand
+    duplicates = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT title FROM movie_db GROUP BY title HAVING count(*) > 1 LIMIT 10"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"movie_db has duplicate titles, merge them and upgrade again: {duplicates}"
+        )
+    with op.get_context().autocommit_block():
+        # a failed CREATE INDEX CONCURRENTLY leaves an invalid index behind, which
+        # IF NOT EXISTS would keep and ON CONFLICT (title) can't use
+        invalid = (
+            op.get_bind()
+            .execute(
+                sa.text(
+                    "SELECT NOT indisvalid FROM pg_index "
+                    "WHERE indexrelid = to_regclass('ix_movie_db_title')"
+                )
+            )
+            .scalar()
+        )
+        if invalid:
+            op.drop_index(
+                "ix_movie_db_title", table_name="movie_db", postgresql_concurrently=True
+            )
+        op.create_index(
+            "ix_movie_db_title",
+            "movie_db",
+            ["title"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_movie_db_title",
+            table_name="movie_db",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,73 @@
+"""Covering rating indexes
+
+Revision ID: 5f1e7a0c9d42
+Revises: c52a9e3f7b18
+Create Date: 2026-10-18 10:30:05.688250
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f1e7a0c9d42"
+down_revision: Union[str, None] = "c52a9e3f7b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (old index, new covering index, key columns, included columns)
+INDEXES = [
+    (
+        "ix_rating_db_movie_id_created_at_id",
+        "ix_rating_db_movie_id_created_at_id_include",
+        ["movie_id", "created_at", "id"],
+        ["user_id", "rating"],
+    ),
+    (
+        "ix_rating_db_user_id_created_at_id",
+        "ix_rating_db_user_id_created_at_id_include",
+        ["user_id", "created_at", "id"],
+        ["movie_id", "rating"],
+    ),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The new index is built before the old one goes, so lookups stay indexed
+    with op.get_context().autocommit_block():
+        for old_name, new_name, columns, include in INDEXES:
+            op.create_index(
+                new_name,
+                "rating_db",
+                columns,
+                postgresql_include=include,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                old_name,
+                table_name="rating_db",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for old_name, new_name, columns, _ in INDEXES:
+            op.create_index(
+                old_name,
+                "rating_db",
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                new_name,
+                table_name="rating_db",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,40 @@
+"""Movie neighbors
+
+Revision ID: 7a3d91e4b6f0
+Revises: 5f1e7a0c9d42
+Create Date: 2026-10-18 11:00:41.902113
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3d91e4b6f0"
+down_revision: Union[str, None] = "5f1e7a0c9d42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # filled by app.domain.services.recommendation_service
+    op.create_table(
+        "movie_neighbor",
+        sa.Column("movie_id", sa.UUID(), nullable=False),
+        sa.Column("neighbor_id", sa.UUID(), nullable=False),
+        sa.Column("similarity", sa.REAL(), nullable=False),
+        sa.ForeignKeyConstraint(["movie_id"], ["movie_db.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["neighbor_id"], ["movie_db.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint(
+            "movie_id", "neighbor_id", postgresql_include=["similarity"]
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("movie_neighbor")
@@ -0,0 +1,57 @@
+"""Movie leaderboard
+
+Revision ID: e14b6c2d8f93
+Revises: 7a3d91e4b6f0
+Create Date: 2026-10-18 11:30:17.524086
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e14b6c2d8f93"
+down_revision: Union[str, None] = "7a3d91e4b6f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# as of this revision, see MOVIE_LEADERBOARD_QUERY in app.database.models
+QUERY = """
+WITH movies AS (
+    SELECT movie_id, sum(count) AS rating_count, sum(sum) AS rating_sum
+    FROM movie_rating_stats
+    GROUP BY movie_id
+    HAVING sum(count) > 0
+),
+prior AS (
+    SELECT sum(rating_sum) / sum(rating_count) AS mean,
+           avg(rating_count)::double precision AS weight
+    FROM movies
+)
+SELECT movies.movie_id,
+       movies.rating_count::integer AS rating_count,
+       movies.rating_sum / movies.rating_count AS mean,
+       (movies.rating_sum + prior.weight * prior.mean)
+           / (movies.rating_count + prior.weight) AS score,
+       now() AS refreshed_at
+FROM movies CROSS JOIN prior
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"CREATE MATERIALIZED VIEW movie_leaderboard AS {QUERY}")
+    op.execute(
+        "CREATE UNIQUE INDEX ix_movie_leaderboard_movie_id "
+        "ON movie_leaderboard (movie_id)"
+    )
+    op.execute(
+        "CREATE INDEX ix_movie_leaderboard_score ON movie_leaderboard "
+        "(score DESC, movie_id) INCLUDE (rating_count)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW movie_leaderboard")
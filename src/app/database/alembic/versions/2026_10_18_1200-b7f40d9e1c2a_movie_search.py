@@ -0,0 +1,83 @@
+"""Movie search
+
+Revision ID: b7f40d9e1c2a
+Revises: e14b6c2d8f93
+Create Date: 2026-10-18 12:00:12.481930
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+# revision identifiers, used by Alembic.
+revision: str = "b7f40d9e1c2a"
+down_revision: Union[str, None] = "e14b6c2d8f93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# as app.database.models.PG_TRGM_AVAILABLE, at the time of this revision
+PG_TRGM_AVAILABLE = (
+    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') "
+    "OR (EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') "
+    "AND has_database_privilege(current_database(), 'CREATE'))"
+)
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm is a contrib module, the postgres image ships it. Optional, as for
+    # the models: without it the title trigram index is skipped and fuzzy title
+    # search has to be turned off (SEARCH__FUZZY_TITLES=false)
+    pg_trgm = bool(op.get_bind().scalar(sa.text(PG_TRGM_AVAILABLE)))
+    if pg_trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # rewrites the table under an exclusive lock, computing every movie's vector
+    op.add_column(
+        "movie_db",
+        sa.Column(
+            "search_vector",
+            TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_movie_db_search_vector",
+            "movie_db",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        if pg_trgm:
+            op.create_index(
+                "ix_movie_db_title_trgm",
+                "movie_db",
+                ["title"],
+                postgresql_using="gin",
+                postgresql_ops={"title": "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ("ix_movie_db_title_trgm", "ix_movie_db_search_vector"):
+            op.drop_index(
+                name,
+                table_name="movie_db",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_column("movie_db", "search_vector")
@@ -0,0 +1,45 @@
+"""User prefix search
+
+Revision ID: 4c9a2e7d1f05
+Revises: b7f40d9e1c2a
+Create Date: 2026-10-18 12:30:48.271604
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4c9a2e7d1f05"
+down_revision: Union[str, None] = "b7f40d9e1c2a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ["name", "email"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.create_index(
+                f"ix_user_db_lower_{column}_pattern",
+                "user_db",
+                [sa.text(f"lower({column}) text_pattern_ops")],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.drop_index(
+                f"ix_user_db_lower_{column}_pattern",
+                table_name="user_db",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -1,16 +1,65 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from ..settings import settings
 
+# Session.info key set on the sessions of read replicas
+REPLICA = "replica"
 
-def get_base_db_engine_and_session():
+
+def get_base_db_engine_and_session(
+    url: str | None = None,
+) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
+    """
+    Build the engine and session factory, of the primary unless a url is given.
+
+    NOTE: This is expected to be called once per process (see the lifespan in
+    app.main.create_app), the engine owns the connection pool.
+    """
     engine = create_async_engine(
-        settings.DB_URL,
-        pool_pre_ping=True,
-        pool_timeout=30,  # In seconds (Default is 30s)
+        url or settings.DB_URL,
+        pool_pre_ping=settings.db.pool_pre_ping,
+        pool_size=settings.db.pool_size,
+        max_overflow=settings.db.max_overflow,
+        pool_recycle=settings.db.pool_recycle,
+        pool_timeout=settings.db.pool_timeout,
+        connect_args={
+            # asyncpg's own cache and the SQLAlchemy dialect's prepared statement cache
+            "statement_cache_size": settings.db.statement_cache_size,
+            "prepared_statement_cache_size": settings.db.statement_cache_size,
+        },
         future=True,
-        echo=True,
+        echo=settings.db.echo,
     )
     SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
     return engine, SessionLocal
+
+
+def get_read_only_session(
+    engine: AsyncEngine, replica: bool = False
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Build the session factory of requests that only read, on the pool of engine.
+
+    Its connections autocommit: each statement is a transaction of its own, so no
+    BEGIN is sent before the first one and nothing is left to COMMIT after the
+    last. The statements of a request don't share a snapshot.
+
+    The sessions of a replica are marked as such in their info, see is_replica.
+    """
+    return async_sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        expire_on_commit=False,
+        class_=AsyncSession,
+        info={REPLICA: replica},
+    )
+
+
+def is_replica(session: AsyncSession) -> bool:
+    """Whether session reads from a read replica, which may lag the primary"""
+    return session.info.get(REPLICA, False)
@@ -41,7 +41,7 @@ class Base(RootBase):  # type: ignore
     _table_name_override: str | None = None
 
     # Generate __tablename__ automatically
-    @declared_attr
+    @declared_attr.directive
     def __tablename__(cls) -> str:
         if cls._table_name_override:
             return cls._table_name_override
@@ -218,4 +218,9 @@ class TopLevelModel(Base):
         return mapped_column(UUID(as_uuid=True), nullable=True)
 
     def to_dict(self):
-        return {c.key: getattr(self, c.key) for c in self.__mapper__.column_attrs}
+        # deferred columns aren't loaded, reading them would be another query
+        return {
+            c.key: getattr(self, c.key)
+            for c in self.__mapper__.column_attrs
+            if not c.deferred
+        }
@@ -0,0 +1,96 @@
+"""
+Bulk transfer of numpy arrays with COPY ... (FORMAT binary)
+
+A binary COPY row is a 16-bit field count followed by each field as a 32-bit
+length and its bytes, all big-endian. With fixed-width, non-null fields every
+row has the same size, so a whole chunk of rows converts to or from a numpy
+record array at once, with no Python object per row.
+"""
+
+from typing import AsyncIterable, AsyncIterator
+
+import numpy as np
+from asyncpg import Connection
+
+HEADER = b"PGCOPY\n\xff\r\n\x00" + bytes(8)  # signature, flags, extension length
+TRAILER = b"\xff\xff"
+
+
+def row_dtype(fields: list[tuple[str, str]]) -> np.dtype:
+    """
+    Record of a binary COPY row, from the (name, numpy type) of its fields, e.g.
+    ">i4" for integer, ">f4" for real or "V16" for uuid
+    """
+    spec = [("field_count", ">i2")]
+    for name, type_ in fields:
+        spec += [(f"{name}_length", ">i4"), (name, type_)]
+    return np.dtype(spec)
+
+
+def _native(dtype: np.dtype) -> np.dtype:
+    names = [name for name in dtype.names or () if name != "field_count"]
+    return np.dtype(
+        [
+            (name, dtype[name].newbyteorder("="))
+            for name in names
+            if not name.endswith("_length")
+        ]
+    )
+
+
+async def copy_from_query(
+    conn: Connection, query: str, dtype: np.dtype, *args: object
+) -> np.ndarray:
+    """
+    Rows of the query, as a record array of the fields of dtype in native byte
+    order. Only the fields are kept, a few bytes per row.
+    """
+    chunks: list[np.ndarray] = []
+    buffer = bytearray()
+    header = True
+
+    async def collect(data: bytes) -> None:
+        nonlocal header
+        buffer.extend(data)
+        if header:
+            if len(buffer) < len(HEADER):
+                return
+            del buffer[: len(HEADER)]
+            header = False
+        size = len(buffer) // dtype.itemsize * dtype.itemsize
+        if size:
+            rows = np.frombuffer(bytes(buffer[:size]), dtype=dtype)
+            del buffer[:size]
+            native = np.empty(len(rows), dtype=_native(dtype))
+            for name in native.dtype.names or ():
+                native[name] = rows[name]
+            chunks.append(native)
+
+    await conn.copy_from_query(query, *args, output=collect, format="binary")
+    if buffer != TRAILER:
+        raise ValueError("unexpected end of COPY data, are all fields fixed-width?")
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=_native(dtype))
+
+
+def encode_rows(dtype: np.dtype, **columns: np.ndarray) -> bytes:
+    """Binary COPY rows of the columns, named after the fields of dtype"""
+    rows = np.empty(len(next(iter(columns.values()))), dtype=dtype)
+    rows["field_count"] = len(columns)
+    for name, values in columns.items():
+        rows[f"{name}_length"] = dtype[name].itemsize
+        rows[name] = values
+    return rows.tobytes()
+
+
+async def copy_to_table(
+    conn: Connection, table: str, columns: list[str], rows: AsyncIterable[bytes]
+) -> None:
+    """Stream the encoded rows into the table, see encode_rows"""
+
+    async def source() -> AsyncIterator[bytes]:
+        yield HEADER
+        async for chunk in rows:
+            yield chunk
+        yield TRAILER
+
+    await conn.copy_to_table(table, source=source(), columns=columns, format="binary")
@@ -0,0 +1,41 @@
+import json
+from typing import Any
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.expression import Executable
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN of a statement, compiled with its bind parameters intact.
+
+    Executing it returns one row holding the plan as JSON, see parse_plan.
+    """
+
+    inherit_cache = False
+
+    def __init__(
+        self, statement: ClauseElement, analyze: bool = False, buffers: bool = False
+    ) -> None:
+        self.statement = statement
+        self.analyze = analyze
+        self.buffers = buffers
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: SQLCompiler, **kw: Any) -> str:
+    options = ["FORMAT JSON"]
+    if element.analyze:
+        options.append("ANALYZE")
+    if element.buffers:
+        options.append("BUFFERS")
+    return f"EXPLAIN ({', '.join(options)}) {compiler.process(element.statement, **kw)}"
+
+
+def parse_plan(raw: Any) -> dict[str, Any]:
+    """Document of an EXPLAIN (FORMAT JSON) result, the root node is its Plan"""
+    # asyncpg hands json back as text, other drivers decode it
+    document = json.loads(raw) if isinstance(raw, str) else raw
+    return document[0]
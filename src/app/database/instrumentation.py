@@ -0,0 +1,72 @@
+import time
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.context import query_stats
+from app.database.slow_query_log import slow_query_log
+
+
+def _before_cursor_execute(conn: Connection, *args: Any) -> None:
+    # a stack, the hooks can nest when a statement triggers another one
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    duration = time.perf_counter() - conn.info["query_started_at"].pop()
+    # SQLAlchemy runs the sync code of the async engine in a greenlet sharing the
+    # context of the awaiting task, so the request's tally is visible here
+    stats = query_stats.get(None)
+    if stats is not None:
+        stats.add(statement, duration)
+    slow_query_log.observe(conn.engine.url, statement, parameters, executemany, duration)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # failed statements count too, and must not leave their start time behind
+    conn = context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        _after_cursor_execute(
+            conn,
+            context.cursor,
+            context.statement or "",
+            context.parameters,
+            context.execution_context,
+            bool(context.execution_context and context.execution_context.executemany),
+        )
+
+
+def _transaction_control(statement: str) -> Callable[..., None]:
+    def count(conn: Connection, *args: Any) -> None:
+        # a round trip like any statement, unless the connection autocommits and
+        # the server has no transaction to begin or end. There is no hook after
+        # COMMIT, so none of them is timed.
+        if conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+            return
+        stats = query_stats.get(None)
+        if stats is not None:
+            stats.add(statement, 0.0)
+
+    return count
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Add every statement executed on the engine to the tally of the current request,
+    BEGIN, COMMIT and ROLLBACK included, and report the slow ones to the slow
+    query log
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+    for name in ("begin", "commit", "rollback"):
+        event.listen(engine.sync_engine, name, _transaction_control(name.upper()))
@@ -1,10 +1,34 @@
+import datetime
 import uuid
+from typing import Any
 
-from sqlalchemy import Float, ForeignKey, String, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    DDL,
+    REAL,
+    Column,
+    Computed,
+    Connection,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    PrimaryKeyConstraint,
+    SmallInteger,
+    String,
+    Table,
+    UniqueConstraint,
+    event,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from .base_model import TopLevelModel
+from .base_model import Base, TopLevelModel
+
+RATING_HISTOGRAM_BUCKETS = 10
 
 
 # ---------- Models ----------
@@ -14,13 +38,86 @@ class UserDB(TopLevelModel):
 
     ratings: Mapped["RatingDB"] = relationship("RatingDB", back_populates="user")
 
+    # keyset pagination, see BaseRepository.find_page
+    __table_args__ = (Index("ix_user_db_created_at_id", "created_at", "id"),)
+
+
+# UserRepository.search, Prefix filters match ranges of lower(column)
+Index(
+    "ix_user_db_lower_name_pattern",
+    func.lower(UserDB.name).label("lower_name"),
+    postgresql_ops={"lower_name": "text_pattern_ops"},
+)
+Index(
+    "ix_user_db_lower_email_pattern",
+    func.lower(UserDB.email).label("lower_email"),
+    postgresql_ops={"lower_email": "text_pattern_ops"},
+)
+
+
+# text search configuration of the movie search vector, queries must use the same
+MOVIE_SEARCH_CONFIG = "english"
+
 
 class MovieDB(TopLevelModel):
     title: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=True)
+    # full-text search document, title words weigh more than description words.
+    # Deferred, it's only ever searched, never read
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{MOVIE_SEARCH_CONFIG}', title), 'A') || "
+            f"setweight(to_tsvector('{MOVIE_SEARCH_CONFIG}', "
+            "coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     ratings: Mapped["RatingDB"] = relationship("RatingDB", back_populates="movie")
 
+    __table_args__ = (
+        Index("ix_movie_db_created_at_id", "created_at", "id"),
+        # titles are unique, also the conflict target of MovieRepository.create_or_conflict
+        Index("ix_movie_db_title", "title", unique=True),
+        Index("ix_movie_db_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+
+# pg_trgm is installed, or can be: it's trusted, so the CREATE privilege on the
+# database is enough. Also checked by the movie search migration
+PG_TRGM_AVAILABLE = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') "
+    "OR (EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') "
+    "AND has_database_privilege(current_database(), 'CREATE'))"
+)
+
+
+def _pg_trgm_available(
+    ddl: object, target: object, bind: Connection | None, *args: Any, **kw: Any
+) -> bool:
+    return bind is not None and bool(bind.scalar(PG_TRGM_AVAILABLE))
+
+
+# typo tolerant title search (FuzzyMatch filters), pg_trgm ships with the
+# contrib modules of Postgres, the tables are created without it if it's missing
+# or may not be installed
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql", callable_=_pg_trgm_available
+    ),
+)
+event.listen(
+    MovieDB.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_movie_db_title_trgm ON movie_db USING gin (title gin_trgm_ops)"
+    ).execute_if(dialect="postgresql", callable_=_pg_trgm_available),
+)
+
 
 class RatingDB(TopLevelModel):
     user_id: Mapped[uuid.UUID] = mapped_column(
@@ -34,4 +131,153 @@ class RatingDB(TopLevelModel):
     user: Mapped["UserDB"] = relationship("UserDB", back_populates="ratings")
     movie: Mapped["MovieDB"] = relationship("MovieDB", back_populates="ratings")
 
-    __table_args__ = (UniqueConstraint("user_id", "movie_id", name="unique_user_movie"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "movie_id", name="unique_user_movie"),
+        # ratings of a movie / of a user, paged in (created_at, id) order. The
+        # included columns let pages, counts and aggregates over a movie's or a
+        # user's ratings be answered by index-only scans
+        Index(
+            "ix_rating_db_movie_id_created_at_id_include",
+            "movie_id",
+            "created_at",
+            "id",
+            postgresql_include=["user_id", "rating"],
+        ),
+        Index(
+            "ix_rating_db_user_id_created_at_id_include",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_include=["movie_id", "rating"],
+        ),
+    )
+
+
+class MovieRatingStatsDB(Base):
+    """
+    Running rating aggregates of a movie, split into counter shards.
+
+    Every rating is added to one randomly picked shard, so concurrent writers of a
+    popular movie rarely wait on the same row lock. The movie stats are the sum
+    over its (at most settings.RATING_STATS_SHARDS) shard rows.
+    """
+
+    _table_name_override = "movie_rating_stats"
+
+    movie_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("movie_db.id"), primary_key=True
+    )
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # histogram[i] is the number of ratings in [i + 1, i + 2), 10.0 falls into the last one
+    histogram: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
+
+
+class MovieNeighborDB(Base):
+    """
+    Most similar movies of every movie, by the ratings they got from the same users.
+
+    Derived from the ratings by app.domain.services.recommendation_service, which
+    replaces the whole table on every run. Recommendations are scored from it.
+    """
+
+    _table_name_override = "movie_neighbor"
+
+    movie_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("movie_db.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    neighbor_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("movie_db.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # shrunk cosine similarity of the user-centered ratings, in (0, 1]
+    similarity: Mapped[float] = mapped_column(REAL, nullable=False)
+
+    __table_args__ = (
+        # the similarity is included, so scoring reads the neighbors of the
+        # user's movies by index-only scans
+        PrimaryKeyConstraint(
+            "movie_id", "neighbor_id", postgresql_include=["similarity"]
+        ),
+    )
+
+
+# ---------- Views ----------
+# Materialized views are created and dropped with the tables by the DDL events
+# below. Their metadata is kept apart, so that create_all and autogenerate don't
+# take them for tables.
+views_metadata = MetaData()
+
+# Bayesian average: the ratings of a movie plus `weight` ratings of the mean over
+# all movies, so a few high ratings don't outrank many good ones. The weight is
+# the average number of ratings per rated movie. Aggregated from the rating stats
+# shards, which keep the same count and sum as rating_db.
+MOVIE_LEADERBOARD_QUERY = f"""
+WITH movies AS (
+    SELECT movie_id, sum(count) AS rating_count, sum(sum) AS rating_sum
+    FROM {MovieRatingStatsDB.__tablename__}
+    GROUP BY movie_id
+    HAVING sum(count) > 0
+),
+prior AS (
+    SELECT sum(rating_sum) / sum(rating_count) AS mean,
+           avg(rating_count)::double precision AS weight
+    FROM movies
+)
+SELECT movies.movie_id,
+       movies.rating_count::integer AS rating_count,
+       movies.rating_sum / movies.rating_count AS mean,
+       (movies.rating_sum + prior.weight * prior.mean)
+           / (movies.rating_count + prior.weight) AS score,
+       now() AS refreshed_at
+FROM movies CROSS JOIN prior
+"""
+
+
+class MovieLeaderboardDB(Base):
+    """
+    Movies ranked by the Bayesian average of their ratings, a materialized view
+
+    Refreshed periodically by app.domain.services.leaderboard_service, as of
+    refreshed_at.
+    """
+
+    __table__ = Table(
+        "movie_leaderboard",
+        views_metadata,
+        Column("movie_id", UUID(as_uuid=True), primary_key=True),
+        Column("rating_count", Integer, nullable=False),
+        Column("mean", Float, nullable=False),
+        Column("score", Float, nullable=False),
+        Column("refreshed_at", DateTime(timezone=True), nullable=False),
+    )
+
+    # the columns of the table above, annotated for type checking
+    movie_id: Mapped[uuid.UUID]
+    rating_count: Mapped[int]
+    mean: Mapped[float]
+    score: Mapped[float]
+    refreshed_at: Mapped[datetime.datetime]
+
+
+for statement in (
+    f"CREATE MATERIALIZED VIEW movie_leaderboard AS {MOVIE_LEADERBOARD_QUERY}",
+    # REFRESH ... CONCURRENTLY needs a unique index
+    "CREATE UNIQUE INDEX ix_movie_leaderboard_movie_id ON movie_leaderboard (movie_id)",
+    "CREATE INDEX ix_movie_leaderboard_score ON movie_leaderboard "
+    "(score DESC, movie_id) INCLUDE (rating_count)",
+):
+    event.listen(
+        Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql")
+    )
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL("DROP MATERIALIZED VIEW IF EXISTS movie_leaderboard").execute_if(
+        dialect="postgresql"
+    ),
+)
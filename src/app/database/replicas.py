@@ -0,0 +1,45 @@
+import itertools
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.settings import ReplicaStrategy
+
+
+class ReplicaSet:
+    """
+    Engines and session factories of the read replicas, and the choice of the one
+    serving a request
+
+    Load is measured locally, as the connections this process has checked out of
+    each replica's pool. Ties, e.g. when idle, are broken round robin.
+    """
+
+    def __init__(
+        self,
+        replicas: list[tuple[AsyncEngine, async_sessionmaker[AsyncSession]]],
+        strategy: ReplicaStrategy = ReplicaStrategy.ROUND_ROBIN,
+    ) -> None:
+        self._replicas = replicas
+        self._strategy = strategy
+        self._turn = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._replicas)
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return [engine for engine, _ in self._replicas]
+
+    def pick(self) -> async_sessionmaker[AsyncSession]:
+        start = next(self._turn) % len(self._replicas)
+        rotated = self._replicas[start:] + self._replicas[:start]
+        if self._strategy is ReplicaStrategy.LEAST_LOADED:
+            _, SessionLocal = min(
+                rotated, key=lambda replica: replica[0].pool.checkedout()  # type: ignore
+            )
+            return SessionLocal
+        return rotated[0][1]
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
@@ -0,0 +1,213 @@
+import asyncio
+import contextvars
+import datetime
+import os
+import random
+import re
+import sys
+from collections import deque
+from types import FrameType
+from typing import Any, Iterator
+
+import greenlet
+import structlog
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.explain import parse_plan
+from app.schemas.meta import SlowQueryPlan
+from app.settings import SlowQuerySettings, settings
+
+_log = structlog.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_REPOSITORIES_DIR = os.path.join(_APP_DIR, "domain", "repositories") + os.sep
+_ENDPOINTS_DIR = os.path.join(_APP_DIR, "api", "endpoints") + os.sep
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+# not part of an identifier or a $1 placeholder
+_NUMBER = re.compile(r"(?<![\w$.])\d+(?:\.\d+)?\b")
+_VALUES_ROWS = re.compile(r"VALUES (\([^()]*\))(?:, \([^()]*\))+")
+_IN_LIST = re.compile(r"IN \(([^,()]+)(?:, [^,()]+)+\)")
+
+# set while a plan is captured, so the EXPLAIN itself is not reported
+_capturing: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "slow_query_capturing", default=False
+)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Statement with literals replaced by ? and the rows of a multi-row VALUES or
+    an expanded IN list collapsed, so repeats of a query read the same
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _VALUES_ROWS.sub(r"VALUES \1, ...", statement)
+    return _IN_LIST.sub(r"IN (\1, ...)", statement)
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Types of the parameters, never their values"""
+    if executemany:
+        rows = list(parameters)
+        return f"{len(rows)} x {parameter_shape(rows[0], False) if rows else '()'}"
+    if isinstance(parameters, dict):
+        shapes = (f"{key}: {_value_shape(value)}" for key, value in parameters.items())
+        return "{" + ", ".join(shapes) + "}"
+    return "(" + ", ".join(_value_shape(value) for value in parameters or ()) + ")"
+
+
+def _frames() -> Iterator[FrameType]:
+    frame: FrameType | None = sys._getframe()
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # the async engine runs the driver calls in a child greenlet, the awaiting
+    # coroutines (repository, endpoint) are on the stack of its parent
+    parent = greenlet.getcurrent().parent
+    frame = parent.gr_frame if parent is not None else None
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def _callers() -> tuple[str | None, str | None]:
+    """
+    Repository method called from outside the repositories, and the endpoint,
+    on the stack
+    """
+    repository = endpoint = None
+    for frame in _frames():
+        filename = frame.f_code.co_filename
+        if filename.startswith(_REPOSITORIES_DIR):
+            self = frame.f_locals.get("self")
+            model = getattr(self, "_model", None)
+            repository = (
+                f"{type(self).__name__}[{model.__name__}].{frame.f_code.co_name}"
+                if model is not None
+                else frame.f_code.co_qualname
+            )
+        elif filename.startswith(_ENDPOINTS_DIR):
+            endpoint = f"{frame.f_globals['__name__']}.{frame.f_code.co_qualname}"
+            break
+    return repository, endpoint
+
+
+class SlowQueryLog:
+    """
+    Logs statements over the threshold, and keeps the plans of a sample of them
+
+    A sampled SELECT is run again under EXPLAIN (ANALYZE, BUFFERS) in the
+    background, on a connection of its own to the server it ran on, so the
+    request pool is not drawn on, and the plan is kept in a bounded ring of the
+    most recent ones.
+    """
+
+    def __init__(self, config: SlowQuerySettings) -> None:
+        self.config = config
+        self.plans: deque[SlowQueryPlan] = deque(maxlen=config.max_plans)
+        # per database URL, the primary and every replica a statement ran on
+        self._engines: dict[URL, AsyncEngine] = {}
+        # normalized statements being explained, each is captured once at a time
+        self._in_flight: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    def observe(
+        self,
+        url: URL,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        duration: float,
+    ) -> None:
+        if (
+            not self.config.enabled
+            or duration * 1000 < self.config.threshold_ms
+            or _capturing.get()
+        ):
+            return
+
+        normalized = normalize_sql(statement)
+        shape = parameter_shape(parameters, executemany)
+        repository, endpoint = _callers()
+        _log.warning(
+            "slow_query",
+            duration_ms=round(duration * 1000, 2),
+            statement=normalized,
+            parameters=shape,
+            repository=repository,
+            endpoint=endpoint,
+        )
+
+        if (
+            executemany
+            or not normalized.upper().startswith("SELECT")
+            or normalized in self._in_flight
+            or random.random() >= self.config.explain_sample_rate
+        ):
+            return
+        self._in_flight.add(normalized)
+        entry = SlowQueryPlan(
+            captured_at=datetime.datetime.now(datetime.timezone.utc),
+            duration_ms=round(duration * 1000, 2),
+            statement=normalized,
+            parameters=shape,
+            repository=repository,
+            endpoint=endpoint,
+            plan={},
+        )
+        # an empty context, the capture belongs to no request
+        task = asyncio.get_running_loop().create_task(
+            self._capture(url, statement, parameters, entry),
+            context=contextvars.Context(),
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _capture(
+        self, url: URL, statement: str, parameters: Any, entry: SlowQueryPlan
+    ) -> None:
+        _capturing.set(True)
+        if url not in self._engines:
+            self._engines[url] = create_async_engine(url, poolclass=NullPool)
+        try:
+            async with self._engines[url].connect() as conn:
+                # nothing the statement does is kept, the transaction is rolled back
+                # when the connection is closed
+                await conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(self.config.explain_timeout_ms)}"
+                )
+                raw = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+                )
+                entry.plan = parse_plan(raw.scalar_one())
+            self.plans.append(entry)
+        except Exception:
+            _log.warning(
+                "slow_query_explain_failed", statement=entry.statement, exc_info=True
+            )
+        finally:
+            self._in_flight.discard(entry.statement)
+
+    async def close(self) -> None:
+        """Cancel the captures still running and dispose of their engines"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        engines, self._engines = self._engines, {}
+        for engine in engines.values():
+            await engine.dispose()
+
+
+slow_query_log = SlowQueryLog(settings.slow_query)
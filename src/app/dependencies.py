@@ -1,12 +1,21 @@
+import math
+import time
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.database.base import get_base_db_engine_and_session
+from app.domain.repositories.cache import wait_for_invalidations
+from app.settings import settings
 
+# expiry (epoch seconds) of the window in which a client that wrote reads
+# from the primary
+PRIMARY_UNTIL_COOKIE = "db_primary_until"
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    _, SessionLocal = get_base_db_engine_and_session()
+
+async def _session(
+    SessionLocal: async_sessionmaker[AsyncSession],
+) -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         try:
             yield session
@@ -15,3 +24,62 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         else:
             await session.commit()
+            # so the next request can't be served a cached entity this one changed
+            await wait_for_invalidations(session)
+
+
+async def get_db(
+    request: Request, response: Response
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session on the primary, for endpoints that write
+    """
+    if request.app.state.db_replicas:
+        # read-your-writes, see get_read_db
+        window = settings.db.read_your_writes_window
+        response.set_cookie(
+            PRIMARY_UNTIL_COOKIE,
+            f"{time.time() + window:.3f}",
+            max_age=math.ceil(window),
+            httponly=True,
+            samesite="lax",
+        )
+    # the session factory is created once per process in app.main.lifespan
+    async for session in _session(request.app.state.db_session_factory):
+        yield session
+
+
+def _reads_from_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """
+    Factory of the sessions get_read_db hands out, for endpoints that read over
+    several connections at once
+    """
+    replicas = request.app.state.db_replicas
+    if replicas and not _reads_from_primary(request):
+        return replicas.pick()
+    return request.app.state.db_read_session_factory
+
+
+async def get_read_db(
+    SessionLocal: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read-only session, for endpoints that only read
+
+    Never committed, and autocommitting (see get_read_only_session), which saves
+    the BEGIN and COMMIT round trips. Anything written through it is committed
+    at once, endpoints that write use get_db.
+
+    On a read replica, unless there are none or the client wrote within the last
+    settings.db.read_your_writes_window seconds, since a replica may not have
+    caught up with that write yet.
+    """
+    async with SessionLocal() as session:
+        yield session
@@ -1,19 +1,114 @@
+import base64
+import datetime
+import json
+import sys
+from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Callable, Generic, Type, TypeVar
+from functools import cached_property
+from typing import Any, AsyncIterator, Callable, Generic, Type, TypeVar, cast, overload
 from uuid import UUID
 
 import sqlalchemy as sa
-from pydantic import BaseModel
-from sqlalchemy import and_, asc, desc, func, select
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import and_, asc, desc, func, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, REGCLASS, REGCONFIG, insert
 from sqlalchemy.engine import Result  # type: ignore
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.elements import ClauseElement, ClauseList, ColumnElement
 
+from app.database.base import is_replica
 from app.database.base_model import Base as BaseDBModel
+from app.database.explain import Explain, parse_plan
+from app.domain.repositories.cache import EntityCache, wait_for_invalidations
+from app.exceptions import (
+    ConcurrentUpdateError,
+    InvalidCursorError,
+    SearchTooBroadError,
+)
+
+# upserts of a bulk_create raced by concurrent inserts, see bulk_create
+BULK_CREATE_ATTEMPTS = 3
 
 T_Model = TypeVar("T_Model", bound=BaseDBModel)
 T_Schema = TypeVar("T_Schema", bound=BaseModel)
-Filter = tuple[str, Any] | tuple[str, str, Any] | Callable[[T_Model], ClauseElement]
+T_Projected = TypeVar("T_Projected", bound=BaseModel)
+
+
+@dataclass
+class TextSearch:
+    """
+    Full-text match of a tsvector column against a search engine style query:
+    words, "quoted phrases", or, -excluded words (websearch_to_tsquery)
+
+    The config must be the one the column was built with.
+    """
+
+    column: str
+    query: str
+    config: str = "english"
+
+    def tsquery(self) -> ColumnElement:
+        return func.websearch_to_tsquery(sa.literal(self.config, REGCONFIG), self.query)
+
+
+@dataclass
+class FuzzyMatch:
+    """
+    A text column has a word similar to text, by trigrams (pg_trgm), so
+    misspellings still match
+    """
+
+    column: str
+    text: str
+
+
+@dataclass
+class Prefix:
+    """
+    A text column starts with prefix, ignoring case
+
+    Matched as a range of lower(column) with the text_pattern_ops operators, so
+    an index on lower(column) text_pattern_ops is used whatever the collation,
+    and whether or not the prefix is known when the statement is planned.
+    """
+
+    column: str
+    prefix: str
+
+    def bounds(self) -> tuple[str, str | None]:
+        """
+        Range [lower, upper) of lower(column) holding the matches, None for no
+        upper bound
+        """
+        lower = self.prefix.lower()
+        # byte-wise comparison of UTF-8 follows code point order, the successor of
+        # the last code point ends the range
+        stem = lower.rstrip(chr(sys.maxunicode))
+        if not stem:
+            return lower, None
+        successor = ord(stem[-1]) + 1
+        if 0xD800 <= successor <= 0xDFFF:
+            # surrogates have no UTF-8 encoding
+            successor = 0xE000
+        return lower, stem[:-1] + chr(successor)
+
+
+@dataclass
+class AnyOf:
+    """Any of the filters matches"""
+
+    filters: list["Filter"]
+
+
+Filter = (
+    tuple[str, Any]
+    | tuple[str, str, Any]
+    | Callable[[T_Model], ClauseElement]
+    | TextSearch
+    | FuzzyMatch
+    | Prefix
+    | AnyOf
+)
 
 
 class SortType(str, Enum):
@@ -21,11 +116,57 @@ class SortType(str, Enum):
     DESC = "desc"
 
 
-def query_properties(*args: Any) -> Callable:
-    def full_name_query(model: T_Model) -> ColumnElement[bool]:
-        return func.concat(model.first_name, model.last_name).ilike(*args)
+class TotalMode(str, Enum):
+    NONE = "false"
+    EXACT = "exact"
+    # planner statistics, cheap but can be off by a few percent
+    ESTIMATE = "estimate"
+
+
+@dataclass
+class Page(Generic[T_Schema]):
+    items: list[T_Schema]
+    # opaque cursor of the next page, None on the last page
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+_pg_class = sa.table("pg_class", sa.column("oid"), sa.column("reltuples"))
+
+
+def _encode_key(*values: Any) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_key(cursor: str) -> Any:
+    return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+
+def encode_cursor(created_at: datetime.datetime, id: UUID) -> str:
+    return _encode_key(created_at.isoformat(), str(id))
 
-    return full_name_query
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, UUID]:
+    try:
+        created_at, id = _decode_key(cursor)
+        return datetime.datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError() from e
+
+
+def encode_rank_cursor(rank: float, id: UUID) -> str:
+    return _encode_key(rank, str(id))
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        rank, id = _decode_key(cursor)
+        if not isinstance(rank, (int, float)):
+            raise TypeError(rank)
+        return float(rank), UUID(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError() from e
 
 
 class BaseRepository(Generic[T_Model, T_Schema]):
@@ -37,9 +178,56 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         self,
         model: Type[T_Model],
         schema: Type[T_Schema],
+        cache: EntityCache[T_Schema] | None = None,
     ):
         self._model = model
         self._schema = schema
+        # read-through cache of get_by_id, invalidated once the writes below commit
+        self._cache = cache
+        # per target schema, built on first use
+        self._projections: dict[Type[BaseModel], list[ColumnElement]] = {}
+        self._list_adapters: dict[Type[BaseModel], TypeAdapter] = {}
+
+    def _projection(self, schema: Type[BaseModel]) -> list[ColumnElement]:
+        """
+        Columns of the model backing the fields of a schema
+
+        Reads selecting only these come back as plain rows, skipping the columns
+        the schema drops and the ORM identity map.
+        """
+        if schema not in self._projections:
+            column_names = self._model.__mapper__.column_attrs.keys()  # type: ignore
+            missing = [
+                name
+                for name, field in schema.model_fields.items()
+                if field.is_required() and name not in column_names
+            ]
+            if missing:
+                raise ValueError(
+                    f"{schema.__name__} fields {missing} are not columns of "
+                    f"{self._model.__name__}"
+                )
+            self._projections[schema] = [
+                getattr(self._model, name)
+                for name in schema.model_fields
+                if name in column_names
+            ]
+        return self._projections[schema]
+
+    def _list_adapter(self, schema: Type[T_Projected]) -> TypeAdapter[list[T_Projected]]:
+        """Validates a whole list of rows in one pydantic-core call"""
+        if schema not in self._list_adapters:
+            self._list_adapters[schema] = TypeAdapter(list[schema])  # type: ignore
+        return self._list_adapters[schema]
+
+    @cached_property
+    def _page_columns(self) -> list[ColumnElement]:
+        """Schema columns plus the (created_at, id) pagination key"""
+        columns = list(self._projection(self._schema))
+        for key in (self._model.created_at, self._model.id):  # type: ignore
+            if not any(key is column for column in columns):
+                columns.append(key)
+        return columns
 
     async def create(
         self, session: AsyncSession, commit: bool = False, **kwargs: Any
@@ -49,12 +237,165 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         """
         obj = self._model(**kwargs)
         session.add(obj)
+        await session.flush()
+        if self._cache:
+            self._cache.invalidate_on_commit(session, obj.id)  # type: ignore
         if commit:
             await session.commit()
-        else:
-            await session.flush()
-        result = self._schema.model_validate(obj.to_dict())
-        return result
+            await wait_for_invalidations(session)
+        return self._schema.model_validate(obj.to_dict())
+
+    async def create_or_conflict(
+        self,
+        session: AsyncSession,
+        conflict_target: list[str] | None = None,
+        **kwargs: Any,
+    ) -> T_Schema | None:
+        """
+        Add a new object unless it conflicts with an existing one, None on conflict
+
+        This is a single INSERT ... ON CONFLICT DO NOTHING RETURNING statement, so
+        unlike a find_one check followed by create it can't race with a concurrent
+        insert. Without a conflict_target any unique constraint counts.
+        """
+        query = (
+            insert(self._model)
+            .values(**kwargs)
+            .on_conflict_do_nothing(index_elements=conflict_target)
+            .returning(self._model)
+        )
+        obj = (await session.execute(query)).scalar_one_or_none()
+        if not obj:
+            return None
+        if self._cache:
+            self._cache.invalidate_on_commit(session, obj.id)  # type: ignore
+        return self._schema.model_validate(obj.to_dict())
+
+    async def bulk_create(
+        self,
+        session: AsyncSession,
+        items: list[dict[str, Any]],
+        conflict_target: list[str] | None = None,
+        update_fields: list[str] | None = None,
+        returning: list[str] | None = None,
+    ) -> list[sa.Row]:
+        """
+        Add many objects with multi-row INSERT statements
+
+        Without a conflict_target a conflicting row fails the whole call. With one,
+        conflicting rows are skipped, or get their update_fields overwritten when
+        those are given.
+
+        Returns a row per inserted or updated object with the `returning` columns,
+        an `inserted` flag and, for every update field, its value before the update
+        as `previous_<field>` (None for inserted objects). Skipped objects have no row.
+
+        The items are written in conflict_target order, so concurrent batches lock
+        the rows they share in the same order. When updating, the existing rows
+        are locked first, so their previous values can't change before the upsert.
+        A conflicting row committed by someone else in between was not locked and
+        its previous value is unknown, the upsert is then rolled back to a
+        savepoint and tried again, up to BULK_CREATE_ATTEMPTS times in all before
+        ConcurrentUpdateError is raised.
+
+        NOTE: This bypasses the ORM, nothing is added to the session.
+        """
+        if not items:
+            return []
+        if conflict_target:
+            items = sorted(
+                items, key=lambda item: tuple(item[name] for name in conflict_target)
+            )
+        if not (conflict_target and update_fields):
+            return await self._bulk_create(
+                session, items, conflict_target, update_fields, returning
+            )
+
+        returning = [
+            *(returning or []),
+            *(name for name in conflict_target if name not in (returning or [])),
+        ]
+        for _ in range(BULK_CREATE_ATTEMPTS):
+            async with session.begin_nested() as savepoint:
+                locked = await self._lock_existing(session, items, conflict_target)
+                rows = await self._bulk_create(
+                    session, items, conflict_target, update_fields, returning
+                )
+                if all(
+                    row.inserted
+                    or tuple(getattr(row, name) for name in conflict_target) in locked
+                    for row in rows
+                ):
+                    return rows
+                await savepoint.rollback()
+        raise ConcurrentUpdateError()
+
+    async def _lock_existing(
+        self,
+        session: AsyncSession,
+        items: list[dict[str, Any]],
+        conflict_target: list[str],
+    ) -> set[tuple]:
+        """
+        Lock the rows the items conflict with, returns their conflict_target keys
+        """
+        table = cast(sa.Table, self._model.__table__)
+        columns = [table.c[name] for name in conflict_target]
+        keys = {tuple(item[name] for name in conflict_target) for item in items}
+        query = (
+            sa.select(*columns)
+            .where(tuple_(*columns).in_(list(keys)))
+            # a fixed lock order, so concurrent batches can't deadlock on each other
+            .order_by(*columns)
+            .with_for_update()
+        )
+        return {tuple(row) for row in await session.execute(query)}
+
+    async def _bulk_create(
+        self,
+        session: AsyncSession,
+        items: list[dict[str, Any]],
+        conflict_target: list[str] | None,
+        update_fields: list[str] | None,
+        returning: list[str] | None,
+    ) -> list[sa.Row]:
+
+        table = cast(sa.Table, self._model.__table__)
+        query = insert(table)
+        if conflict_target and update_fields:
+            set_: dict[str, Any] = {
+                field: query.excluded[field] for field in update_fields
+            }
+            if "updated_at" in table.c:
+                set_["updated_at"] = sa.func.now()
+            query = query.on_conflict_do_update(index_elements=conflict_target, set_=set_)
+        elif conflict_target:
+            query = query.on_conflict_do_nothing(index_elements=conflict_target)
+
+        # xmax is only zero for row versions created by an insert
+        columns: list[ColumnElement] = [table.c[name] for name in returning or []]
+        columns.append(sa.literal_column("xmax = 0", sa.Boolean).label("inserted"))
+        # the subquery runs against the statement snapshot, so it sees the old row,
+        # which is the current one as long as it was locked before the statement
+        previous = table.alias("previous")
+        # spelled out, an INSERT target can't be correlated to
+        target_id: ColumnElement[UUID] = sa.literal_column(f"{table.name}.id")
+        for field in update_fields or []:
+            columns.append(
+                sa.select(previous.c[field])
+                .where(previous.c.id == target_id)
+                .scalar_subquery()
+                .label(f"previous_{field}")
+            )
+        returning_query = query.returning(*columns)
+
+        # executemany with RETURNING is sent as batched multi-row VALUES
+        # (SQLAlchemy "insertmanyvalues"), not a statement per row
+        result = await session.execute(returning_query, items)
+        rows = list(result.all())
+        if self._cache and rows and "id" in (returning or []):
+            self._cache.invalidate_on_commit(session, *(row.id for row in rows))
+        return rows
 
     async def count(
         self, session: AsyncSession, filters: list[Filter] | None = None
@@ -64,6 +405,39 @@ class BaseRepository(Generic[T_Model, T_Schema]):
             query = query.where(sa.and_(*self._apply_filters(filters)))
         return (await session.execute(query)).scalar_one()
 
+    async def estimate_count(
+        self, session: AsyncSession, filters: list[Filter] | None = None
+    ) -> int:
+        """
+        Row count estimated by the planner, the query is planned but not executed
+        """
+        query = sa.select(self._model.id)  # type: ignore
+        if filters:
+            query = query.where(sa.and_(*self._apply_filters(filters)))
+        plan = parse_plan((await session.execute(Explain(query))).scalar_one())
+        return int(plan["Plan"]["Plan Rows"])
+
+    def _total_column(
+        self, total: TotalMode, filters: list[Filter] | None
+    ) -> ColumnElement | None:
+        """
+        Total as a scalar subquery, so it comes back with the page in one statement
+        """
+        if total is TotalMode.EXACT:
+            query = sa.select(sa.func.count()).select_from(self._model)  # type: ignore
+            if filters:
+                query = query.where(sa.and_(*self._apply_filters(filters)))
+            return query.scalar_subquery()
+        if total is TotalMode.ESTIMATE and not filters:
+            # reltuples is -1 until the table is vacuumed or analyzed
+            tablename = sa.cast(sa.literal(self._model.__tablename__), REGCLASS)
+            return (
+                sa.select(sa.cast(_pg_class.c.reltuples, sa.BigInteger))
+                .where(_pg_class.c.oid == tablename)
+                .scalar_subquery()
+            )
+        return None
+
     async def _find_raw(
         self,
         session: AsyncSession,
@@ -71,18 +445,37 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         limit: int | None = None,
         filters: list[Filter] | None = None,
         sort_options: list[tuple[str, SortType]] | None = None,
+        cursor: str | None = None,
+        columns: list[ColumnElement] | None = None,
+        projection: list[ColumnElement] | None = None,
     ) -> Result:
-        query = select(self._model)  # type: ignore
+        """
+        Select model objects, or only the projection columns as plain rows,
+        followed by any extra columns
+        """
+        entities: list[Any] = projection if projection else [self._model]
+        query = select(*entities, *(columns or []))  # type: ignore
         if filters:
             query = query.where(and_(*self._apply_filters(filters)))
 
         if sort_options and len(sort_options) > 0:
+            if cursor:
+                raise ValueError("cursor pagination only supports the default order")
             for field_name, sort_type in sort_options:
                 query = query.order_by(
                     asc(field_name) if sort_type is SortType.ASC else desc(field_name)
                 )
+        elif cursor or offset or limit is not None:
+            # Pages need a stable order, (created_at, id) is backed by an index
+            # and lets a cursor seek straight to the next page
+            query = query.order_by(self._model.created_at, self._model.id)  # type: ignore
 
-        query = query.offset(offset).limit(limit)
+        if cursor:
+            key = tuple_(self._model.created_at, self._model.id)  # type: ignore
+            query = query.where(key > decode_cursor(cursor))
+        else:
+            query = query.offset(offset)
+        query = query.limit(limit)
         return await session.execute(query)
 
     async def find_ids(
@@ -90,7 +483,7 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         session: AsyncSession,
         filters: list[Filter] | None = None,
     ) -> list[UUID]:
-        query = sa.select([self._model.id])
+        query = sa.select(self._model.id)  # type: ignore
 
         if filters:
             query = query.where(sa.and_(*self._apply_filters(filters)))
@@ -98,6 +491,31 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         result = await session.execute(query)
         return [row for row in result.scalars().all()]
 
+    @overload
+    async def find(
+        self,
+        session: AsyncSession,
+        offset: int | None = None,
+        limit: int | None = None,
+        filters: list[Filter] | None = None,
+        sort_options: list[tuple[str, SortType]] | None = None,
+        cursor: str | None = None,
+        schema: None = None,
+    ) -> list[T_Schema]: ...
+
+    @overload
+    async def find(
+        self,
+        session: AsyncSession,
+        offset: int | None = None,
+        limit: int | None = None,
+        filters: list[Filter] | None = None,
+        sort_options: list[tuple[str, SortType]] | None = None,
+        cursor: str | None = None,
+        *,
+        schema: Type[T_Projected],
+    ) -> list[T_Projected]: ...
+
     async def find(
         self,
         session: AsyncSession,
@@ -105,35 +523,352 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         limit: int | None = None,
         filters: list[Filter] | None = None,
         sort_options: list[tuple[str, SortType]] | None = None,
-    ) -> list[T_Schema]:
+        cursor: str | None = None,
+        schema: Type[T_Projected] | None = None,
+    ) -> list[T_Projected] | list[T_Schema]:
         """
         Find all results matching filters
+
+        Only the columns backing the fields of schema, the repository schema by
+        default, are selected.
         """
+        schema = schema or self._schema  # type: ignore
         result = await self._find_raw(
             session,
             offset=offset,
             limit=limit,
             filters=filters,
             sort_options=sort_options,
+            cursor=cursor,
+            projection=self._projection(schema),  # type: ignore
+        )
+        return self._list_adapter(schema).validate_python(  # type: ignore
+            result.all(), from_attributes=True
+        )
+
+    async def stream(
+        self,
+        session: AsyncSession,
+        filters: list[Filter] | None = None,
+        schema: Type[T_Projected] | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[T_Projected]]:
+        """
+        Every result matching filters, projected onto schema, in batches read from
+        a server-side cursor
+
+        Only one batch is held at a time, and the next one is fetched when the
+        caller asks for it, so memory doesn't grow with the number of results. The
+        results come in no particular order, which lets Postgres start sending rows
+        at once rather than sort them all first.
+
+        A cursor only lives in a transaction: the session must not be
+        autocommitting, and stays busy until the iteration ends or is closed.
+        """
+        schema = schema or self._schema  # type: ignore
+        query = select(*self._projection(schema))  # type: ignore
+        if filters:
+            query = query.where(and_(*self._apply_filters(filters)))
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        adapter = self._list_adapter(schema)  # type: ignore
+        try:
+            async for rows in result.partitions():
+                yield adapter.validate_python(rows, from_attributes=True)
+        finally:
+            await result.close()
+
+    @overload
+    async def find_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        offset: int | None = None,
+        cursor: str | None = None,
+        filters: list[Filter] | None = None,
+        total: TotalMode = TotalMode.NONE,
+        columns: list[ColumnElement] | None = None,
+        schema: None = None,
+    ) -> Page[T_Schema]: ...
+
+    @overload
+    async def find_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        offset: int | None = None,
+        cursor: str | None = None,
+        filters: list[Filter] | None = None,
+        total: TotalMode = TotalMode.NONE,
+        columns: list[ColumnElement] | None = None,
+        *,
+        schema: Type[T_Projected],
+    ) -> Page[T_Projected]: ...
+
+    async def find_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        offset: int | None = None,
+        cursor: str | None = None,
+        filters: list[Filter] | None = None,
+        total: TotalMode = TotalMode.NONE,
+        columns: list[ColumnElement] | None = None,
+        schema: Type[T_Projected] | None = None,
+    ) -> Page[T_Projected] | Page[T_Schema]:
+        """
+        Find a page of results matching filters, in (created_at, id) order
+
+        A cursor takes precedence over the offset. Either way the returned page
+        carries the cursor of the next one, so a client can switch to keyset
+        pagination at any point.
+
+        The total, if requested, is selected along with the rows rather than by a
+        second count() round trip.
+
+        Extra labeled columns, such as correlated subqueries reading related rows,
+        are selected along with the repository schema columns, the rows are
+        validated into schema, the repository schema by default.
+        """
+        schema = schema or self._schema  # type: ignore
+        total_column = self._total_column(total, filters)
+        extra_columns = list(columns or [])
+        if total_column is not None:
+            extra_columns.append(total_column.label("page_total"))
+        result = await self._find_raw(
+            session,
+            offset=offset,
+            limit=limit + 1,
+            filters=filters,
+            cursor=cursor,
+            columns=extra_columns,
+            projection=self._page_columns,
         )
-        return [self._schema.parse_obj(r.to_dict()) for r in result.scalars().all()]
+        rows = result.all()
+        page_total = rows[0].page_total if rows and total_column is not None else None
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        if total is not TotalMode.NONE and (page_total is None or page_total < 0):
+            if not (offset or cursor or next_cursor):
+                # the first page is also the last one, so it holds every row
+                page_total = len(rows)
+            elif total is TotalMode.EXACT:
+                page_total = await self.count(session, filters=filters)
+            else:
+                page_total = await self.estimate_count(session, filters=filters)
 
+        return Page(
+            items=self._list_adapter(schema).validate_python(  # type: ignore
+                rows, from_attributes=True
+            ),
+            next_cursor=next_cursor,
+            total=page_total,
+        )
+
+    async def find_ranked_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        filters: list[Filter],
+        cursor: str | None = None,
+        max_ranked: int | None = None,
+    ) -> Page[T_Schema]:
+        """
+        Find a page of results matching filters, best match first
+
+        The rank is the sum of the ranks of the TextSearch (ts_rank_cd) and
+        FuzzyMatch (word_similarity) filters, both within [0, 1], ties are broken by
+        id. The cursor seeks past the (rank, id) of the last result, the matches are
+        ranked again for every page but never handed over past the page.
+
+        Every match is ranked, so a query matching more than max_ranked rows is
+        refused with SearchTooBroadError rather than ranking only some of them.
+        At most max_ranked + 1 matches are read to find out, as the indexes
+        return them, which bounds the work of a query matching a large part of
+        the table.
+        """
+        rank = self._rank(filters)
+        matches = select(*self._page_columns, rank.label("rank")).where(
+            and_(*self._apply_filters(filters))
+        )
+        if max_ranked is not None:
+            capped = matches.limit(max_ranked + 1).subquery()
+            # counted before the cursor skips any of them
+            matches = select(capped, func.count().over().label("matches"))
+        ranked = matches.subquery()
+        query = select(ranked).order_by(ranked.c.rank.desc(), ranked.c.id)
+        if cursor:
+            after_rank, after_id = decode_rank_cursor(cursor)
+            query = query.where(
+                sa.or_(
+                    ranked.c.rank < after_rank,
+                    and_(ranked.c.rank == after_rank, ranked.c.id > after_id),
+                )
+            )
+        rows = (await session.execute(query.limit(limit + 1))).all()
+        if max_ranked is not None and rows and rows[0].matches > max_ranked:
+            raise SearchTooBroadError()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_rank_cursor(rows[-1].rank, rows[-1].id)
+        return Page(
+            items=self._list_adapter(self._schema).validate_python(
+                rows, from_attributes=True
+            ),
+            next_cursor=next_cursor,
+        )
+
+    @overload
     async def find_one(
         self,
         session: AsyncSession,
         filters: list[Filter] | None = None,
-    ) -> T_Schema | None:
+        schema: None = None,
+    ) -> T_Schema | None: ...
+
+    @overload
+    async def find_one(
+        self,
+        session: AsyncSession,
+        filters: list[Filter] | None = None,
+        *,
+        schema: Type[T_Projected],
+    ) -> T_Projected | None: ...
+
+    async def find_one(
+        self,
+        session: AsyncSession,
+        filters: list[Filter] | None = None,
+        schema: Type[T_Projected] | None = None,
+    ) -> T_Projected | T_Schema | None:
+        """
+        Find exactly one result matching filters, projected onto schema
+        """
+        if self._cache and filters and len(filters) == 1:
+            f = filters[0]
+            if isinstance(f, tuple) and len(f) == 2 and f[0] == "id":
+                return await self.get_by_id(session, f[1], schema=schema)
+        schema = schema or self._schema  # type: ignore
+        result = await self._find_raw(
+            session, filters=filters, projection=self._projection(schema)  # type: ignore
+        )
+        row = result.one_or_none()
+        return schema.model_validate(row, from_attributes=True) if row else None  # type: ignore
+
+    @overload
+    async def get_by_id(
+        self, session: AsyncSession, id: UUID, schema: None = None
+    ) -> T_Schema | None: ...
+
+    @overload
+    async def get_by_id(
+        self, session: AsyncSession, id: UUID, schema: Type[T_Projected]
+    ) -> T_Projected | None: ...
+
+    async def get_by_id(
+        self,
+        session: AsyncSession,
+        id: UUID,
+        schema: Type[T_Projected] | None = None,
+    ) -> T_Projected | T_Schema | None:
         """
-        Find exactly one result matching filters
+        Get an object by id, projected onto schema, from the cache if the
+        repository has one
+
+        The cache holds the repository schema, a narrower schema is validated
+        from the cached object. It is not filled from a read replica, which may
+        not have caught up with a write yet.
         """
-        result = (await self._find_raw(session, filters=filters)).scalar_one_or_none()
-        return self._schema.parse_obj(result.to_dict()) if result else None
+        schema = schema or self._schema  # type: ignore
+        fill = self._cache is not None and not is_replica(session)
+        if self._cache:
+            cached = await self._cache.get(id)
+            if cached is not None:
+                if schema is self._schema:
+                    return cached  # type: ignore
+                return schema.model_validate(cached, from_attributes=True)  # type: ignore
+        # the cache is filled with the full repository schema
+        projection = self._projection(self._schema if fill else schema)  # type: ignore
+
+        query = sa.select(*projection).where(self._model.id == id)  # type: ignore
+        row = (await session.execute(query)).one_or_none()
+        if not row:
+            return None
+        if fill:
+            await self._cache.set(  # type: ignore
+                id, self._schema.model_validate(row, from_attributes=True)
+            )
+        return schema.model_validate(row, from_attributes=True)  # type: ignore
+
+    @overload
+    async def get_many(
+        self, session: AsyncSession, ids: list[UUID], schema: None = None
+    ) -> tuple[list[T_Schema], list[UUID]]: ...
 
-    async def get_by_id(self, session: AsyncSession, id: UUID) -> T_Schema | None:
+    @overload
+    async def get_many(
+        self, session: AsyncSession, ids: list[UUID], schema: Type[T_Projected]
+    ) -> tuple[list[T_Projected], list[UUID]]: ...
+
+    async def get_many(
+        self,
+        session: AsyncSession,
+        ids: list[UUID],
+        schema: Type[T_Projected] | None = None,
+    ) -> tuple[list[T_Projected], list[UUID]] | tuple[list[T_Schema], list[UUID]]:
         """
-        Get an object by id
+        Get objects by id with a single `id = ANY(:ids)` query, projected onto
+        schema
+
+        Returns the objects in the order of ids, repeated ids once, and the ids
+        not found. With a cache, only the objects missing from it are queried,
+        and they are cached unless read from a replica (see get_by_id).
         """
-        return await self.find_one(session, filters=[("id", id)])
+        schema = schema or self._schema  # type: ignore
+        ids = list(dict.fromkeys(ids))
+        found: dict[UUID, BaseModel] = {}
+        fill = self._cache is not None and not is_replica(session)
+        # the cache holds the full repository schema
+        fetch_schema = self._schema if fill else schema
+        if self._cache:
+            found.update(await self._cache.get_many(ids))
+
+        wanted = [id for id in ids if id not in found]
+        if wanted:
+            id_column = self._model.id  # type: ignore
+            columns = self._projection(fetch_schema)  # type: ignore
+            if not any(column is id_column for column in columns):
+                columns = [*columns, id_column]
+            query = sa.select(*columns).where(
+                id_column
+                == sa.any_(sa.bindparam("ids", wanted, type_=ARRAY(id_column.type)))
+            )
+            rows = (await session.execute(query)).all()
+            objs = self._list_adapter(fetch_schema).validate_python(  # type: ignore
+                rows, from_attributes=True
+            )
+            fetched = {row.id: obj for row, obj in zip(rows, objs)}
+            if fill:
+                await self._cache.set_many(fetched)  # type: ignore
+            found.update(fetched)
+
+        items = [found[id] for id in ids if id in found]
+        if self._cache and schema is not self._schema:
+            # the cached objects, and the fetched ones unless fetched for the cache
+            items = [
+                (
+                    item
+                    if type(item) is schema
+                    else schema.model_validate(item, from_attributes=True)  # type: ignore
+                )
+                for item in items
+            ]
+        return items, [id for id in ids if id not in found]  # type: ignore
 
     async def update(
         self, session: AsyncSession, id: UUID, commit: bool = False, **kwargs: Any
@@ -151,11 +886,14 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         # accurately reflects the most recent modification time for every instance of the model.
         obj.updated_at = sa.func.now()
 
+        if self._cache:
+            self._cache.invalidate_on_commit(session, id)
         if commit:
             await session.commit()
+            await wait_for_invalidations(session)
         else:
             await session.flush()
-        return self._schema.parse_obj(obj.to_dict())
+        return self._schema.model_validate(obj.to_dict())
 
     async def delete(
         self, session: AsyncSession, id: UUID, commit: bool = False
@@ -166,8 +904,11 @@ class BaseRepository(Generic[T_Model, T_Schema]):
         query = sa.delete(self._model).where(self._model.id == id)  # type: ignore
         query = query.returning(self._model)  # type: ignore
         result = (await session.execute(query)).one()
+        if self._cache:
+            self._cache.invalidate_on_commit(session, id)
         if commit:
             await session.commit()
+            await wait_for_invalidations(session)
         else:
             await session.flush()
         return self._schema(**{k: v for k, v in zip(result.keys(), result)})
@@ -175,7 +916,23 @@ class BaseRepository(Generic[T_Model, T_Schema]):
     def _apply_filters(self, filter_list: list[Filter]) -> ClauseList:
         filters = ClauseList()
         for f in filter_list:
-            if callable(f):
+            if isinstance(f, TextSearch):
+                column = getattr(self._model, f.column)
+                filters.append(column.bool_op("@@")(f.tsquery()))
+            elif isinstance(f, FuzzyMatch):
+                # indexable with gin_trgm_ops, unlike word_similarity(...) > x
+                column = getattr(self._model, f.column)
+                filters.append(sa.literal(f.text).bool_op("<%")(column))
+            elif isinstance(f, Prefix):
+                column = func.lower(getattr(self._model, f.column))
+                lower, upper = f.bounds()
+                clause: ColumnElement[bool] = column.op("~>=~", is_comparison=True)(lower)
+                if upper is not None:
+                    clause = and_(clause, column.op("~<~", is_comparison=True)(upper))
+                filters.append(clause)
+            elif isinstance(f, AnyOf):
+                filters.append(sa.or_(*self._apply_filters(f.filters)))
+            elif callable(f):
                 filters.append(f(self._model))
             else:
                 col = getattr(self._model, f[0])
@@ -185,3 +942,20 @@ class BaseRepository(Generic[T_Model, T_Schema]):
                 else:
                     filters.append(col == f[1])
         return filters
+
+    def _rank(self, filter_list: list[Filter]) -> ColumnElement[float]:
+        """How well a row matches the search filters, higher is better"""
+        ranks: list[ColumnElement] = []
+        for f in filter_list:
+            if isinstance(f, TextSearch):
+                # normalization 32 scales the rank to rank / (rank + 1)
+                column = getattr(self._model, f.column)
+                ranks.append(func.ts_rank_cd(column, f.tsquery(), 32, type_=sa.REAL))
+            elif isinstance(f, FuzzyMatch):
+                column = getattr(self._model, f.column)
+                ranks.append(func.word_similarity(f.text, column, type_=sa.REAL))
+            elif isinstance(f, AnyOf):
+                ranks.append(self._rank(f.filters))
+        if not ranks:
+            return sa.literal(0.0, sa.REAL)
+        return sum(ranks[1:], ranks[0])
@@ -0,0 +1,247 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Protocol, Type, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.settings import CacheBackendType, settings
+
+T_Schema = TypeVar("T_Schema", bound=BaseModel)
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None:
+        """Value of a key, None if missing or expired"""
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        """Values of keys, in the same order, None for the missing or expired"""
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store a value for ttl seconds"""
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        """Store values for ttl seconds"""
+
+    async def delete(self, *keys: str) -> None:
+        """Drop keys, missing ones are ignored"""
+
+    async def clear(self, prefix: str) -> None:
+        """Drop every key starting with prefix"""
+
+
+class InMemoryCacheBackend:
+    """
+    Bounded LRU with per entry expiry, local to the process
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        for key, value in items.items():
+            await self.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self, prefix: str) -> None:
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+
+class RedisCacheBackend:
+    """
+    Shared cache on anything speaking the Redis protocol
+
+    Takes a redis.asyncio.Redis compatible client, entries are shared by all
+    workers, so invalidations are seen everywhere.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        return await self._client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=int(ttl * 1000))
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        # MSET can't expire keys, the SETs are pipelined into one round trip
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, px=int(ttl * 1000))
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*keys)
+
+    async def clear(self, prefix: str) -> None:
+        keys = [key async for key in self._client.scan_iter(match=f"{prefix}*")]
+        await self.delete(*keys)
+
+
+class EntityCache(Generic[T_Schema]):
+    """
+    Read-through cache of one model's schemas, keyed by id
+
+    Entries are invalidated by the repository writes, a write committed by another
+    process is only seen once the entry expires unless the backend is shared.
+    """
+
+    def __init__(
+        self, name: str, schema: Type[T_Schema], backend: CacheBackend, ttl: float
+    ) -> None:
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._schema = schema
+        self._backend = backend
+        self._ttl = ttl
+        self._prefix = f"entity:{name}:"
+
+    def _key(self, id: UUID) -> str:
+        return f"{self._prefix}{id}"
+
+    async def get(self, id: UUID) -> T_Schema | None:
+        value = await self._backend.get(self._key(id))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._schema.model_validate_json(value)
+
+    async def get_many(self, ids: list[UUID]) -> dict[UUID, T_Schema]:
+        """The cached objects among ids, by id"""
+        values = await self._backend.get_many([self._key(id) for id in ids])
+        found = {
+            id: self._schema.model_validate_json(value)
+            for id, value in zip(ids, values)
+            if value is not None
+        }
+        self.hits += len(found)
+        self.misses += len(ids) - len(found)
+        return found
+
+    async def set(self, id: UUID, obj: T_Schema) -> None:
+        value = self._schema.__pydantic_serializer__.to_json(obj)
+        await self._backend.set(self._key(id), value, self._ttl)
+
+    async def set_many(self, objs: dict[UUID, T_Schema]) -> None:
+        if not objs:
+            return
+        serializer = self._schema.__pydantic_serializer__
+        await self._backend.set_many(
+            {self._key(id): serializer.to_json(obj) for id, obj in objs.items()},
+            self._ttl,
+        )
+
+    async def invalidate(self, *ids: UUID) -> None:
+        await self._backend.delete(*(self._key(id) for id in ids))
+
+    def invalidate_on_commit(self, session: AsyncSession, *ids: UUID) -> None:
+        """
+        Invalidate ids once the transaction of session commits
+
+        Not before, or a concurrent read could cache the row as last committed
+        again until the entry expires. The invalidation starts as the session
+        commits, wait_for_invalidations waits for it to be done.
+        """
+        if not event.contains(session.sync_session, "after_commit", _after_commit):
+            event.listen(session.sync_session, "after_commit", _after_commit)
+        session.info.setdefault(_PENDING, []).append((self, ids))
+
+    async def clear(self) -> None:
+        await self._backend.clear(self._prefix)
+
+
+# session.info keys: invalidations waiting for the commit, and the running ones
+_PENDING = "entity_cache_pending"
+_RUNNING = "entity_cache_running"
+
+
+async def _invalidate(pending: list[tuple[EntityCache, tuple[UUID, ...]]]) -> None:
+    for cache, ids in pending:
+        await cache.invalidate(*ids)
+
+
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    # sync event, called from within the awaited commit, so on the event loop
+    task = asyncio.get_running_loop().create_task(_invalidate(pending))
+    running: set[asyncio.Task] = session.info.setdefault(_RUNNING, set())
+    running.add(task)
+    task.add_done_callback(running.discard)
+
+
+async def wait_for_invalidations(session: AsyncSession) -> None:
+    """Wait for the invalidations started by the commits of session"""
+    running = session.info.get(_RUNNING)
+    if running:
+        await asyncio.gather(*running)
+
+
+_caches: dict[str, EntityCache] = {}
+
+
+def build_entity_cache(name: str, schema: Type[T_Schema]) -> EntityCache | None:
+    """
+    Cache configured by settings.cache, None if caching is disabled
+    """
+    if not settings.cache.enabled:
+        return None
+
+    backend: CacheBackend
+    if settings.cache.backend is CacheBackendType.REDIS:
+        # optional dependency of the redis extra, checked for by CacheSettings
+        import redis.asyncio as redis  # type: ignore
+
+        backend = RedisCacheBackend(redis.from_url(settings.cache.redis_url))
+    else:
+        backend = InMemoryCacheBackend(max_entries=settings.cache.max_entries)
+
+    cache = EntityCache(name, schema, backend, ttl=settings.cache.ttl)
+    _caches[name] = cache
+    return cache
+
+
+def get_entity_caches() -> dict[str, EntityCache]:
+    return dict(_caches)
@@ -0,0 +1,85 @@
+import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import MovieDB, MovieLeaderboardDB
+from app.domain.repositories.base_repository import BaseRepository
+from app.schemas.endpoints import MovieLeaderboardOut, TopMovieOut
+
+# advisory lock key of the refresh, any constant not used by another lock
+REFRESH_LOCK_KEY = 7_146_315_820_318_242_817
+
+
+class MovieLeaderboardRepositoryBase(
+    BaseRepository[MovieLeaderboardDB, MovieLeaderboardOut]
+):
+    """
+    Movies ranked by Bayesian average, read from a materialized view
+    """
+
+    async def top(
+        self, session: AsyncSession, limit: int, min_ratings: int
+    ) -> tuple[list[TopMovieOut], datetime.datetime | None]:
+        """
+        The best ranked movies with at least min_ratings ratings, and when the
+        ranking was refreshed
+        """
+        board = self._model
+        query = (
+            sa.select(
+                board.movie_id,
+                MovieDB.title,
+                board.rating_count,
+                board.mean,
+                board.score,
+                board.refreshed_at,
+            )
+            .join(MovieDB, MovieDB.id == board.movie_id)
+            .where(board.rating_count >= min_ratings)
+            .order_by(board.score.desc(), board.movie_id)
+            .limit(limit)
+        )
+        rows = (await session.execute(query)).all()
+        if rows:
+            refreshed_at = rows[0].refreshed_at
+        else:
+            refreshed_at = await session.scalar(sa.select(board.refreshed_at).limit(1))
+        items = self._list_adapter(TopMovieOut).validate_python(
+            rows, from_attributes=True
+        )
+        return items, refreshed_at
+
+    async def refresh(self, session: AsyncSession, max_age: float) -> bool:
+        """
+        Recompute the ranking and commit, unless another session is doing so or
+        did within the last max_age seconds. Returns whether it was refreshed.
+
+        The view is refreshed CONCURRENTLY, readers keep reading the previous
+        ranking meanwhile.
+        """
+        board = self._model
+        locked = await session.scalar(
+            sa.select(sa.func.pg_try_advisory_xact_lock(REFRESH_LOCK_KEY))
+        )
+        recent = await session.scalar(
+            sa.select(
+                sa.exists().where(
+                    board.refreshed_at
+                    > sa.func.now() - datetime.timedelta(seconds=max_age)
+                )
+            )
+        )
+        if not locked or recent:
+            await session.rollback()
+            return False
+        await session.execute(
+            sa.text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {board.__table__.name}")
+        )
+        await session.commit()
+        return True
+
+
+MovieLeaderboardRepository = MovieLeaderboardRepositoryBase(
+    model=MovieLeaderboardDB, schema=MovieLeaderboardOut
+)
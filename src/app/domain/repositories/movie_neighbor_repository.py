@@ -0,0 +1,126 @@
+from typing import AsyncIterable
+from uuid import UUID
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.database.binary_copy import copy_to_table, encode_rows, row_dtype
+from app.database.models import MovieDB, MovieNeighborDB, RatingDB
+from app.domain.repositories.base_repository import BaseRepository
+from app.schemas.endpoints import MovieNeighborOut, RecommendationOut
+from app.settings import settings
+
+_NEIGHBOR_ROW = row_dtype(
+    [("movie_id", "V16"), ("neighbor_id", "V16"), ("similarity", ">f4")]
+)
+
+# movie, neighbor and similarity arrays, the movies as indexes into the movie ids
+NeighborBlock = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class MovieNeighborRepositoryBase(BaseRepository[MovieNeighborDB, MovieNeighborOut]):
+    """
+    Precomputed movie neighbors, and the recommendations scored from them
+    """
+
+    async def replace(
+        self,
+        session: AsyncSession,
+        movie_ids: list[UUID],
+        blocks: AsyncIterable[NeighborBlock],
+    ) -> int:
+        """
+        Replace every neighbor with the blocks, streamed in with a binary COPY.
+        Returns the number of neighbors written.
+
+        Readers keep seeing the previous neighbors until the session commits.
+        """
+        await session.execute(sa.delete(self._model))
+        raw = await (await session.connection()).get_raw_connection()
+        ids = np.frombuffer(b"".join(id.bytes for id in movie_ids), dtype="V16")
+        written = 0
+
+        async def rows() -> AsyncIterable[bytes]:
+            nonlocal written
+            async for movies, neighbors, similarities in blocks:
+                written += len(movies)
+                yield encode_rows(
+                    _NEIGHBOR_ROW,
+                    movie_id=ids[movies],
+                    neighbor_id=ids[neighbors],
+                    similarity=similarities,
+                )
+
+        await copy_to_table(
+            raw.driver_connection,  # type: ignore
+            self._model.__tablename__,
+            ["movie_id", "neighbor_id", "similarity"],
+            rows(),
+        )
+        return written
+
+    async def vacuum(self, session: AsyncSession) -> None:
+        """
+        VACUUM ANALYZE the neighbors, once replaced and committed: reclaims the
+        replaced rows, and keeps the scans of recommend index-only and the
+        planner estimates right
+        """
+        conn = await session.connection(
+            execution_options={"isolation_level": "AUTOCOMMIT"}
+        )
+        await conn.execute(sa.text(f"VACUUM ANALYZE {self._model.__tablename__}"))
+
+    async def recommend(
+        self, session: AsyncSession, user_id: UUID, k: int
+    ) -> list[RecommendationOut]:
+        """
+        The k best scored movies the user hasn't rated
+
+        A movie scores the sum of the user's ratings of the movies it neighbors,
+        weighted by similarity, over the similarity sum plus
+        settings.recommendations.score_shrinkage. Only the user's most recent
+        ratings and their neighbors are read.
+        """
+        config = settings.recommendations
+        rated = (
+            sa.select(RatingDB.movie_id, RatingDB.rating)
+            .where(RatingDB.user_id == user_id)
+            .order_by(RatingDB.created_at.desc())
+            .limit(config.recent_ratings)
+            .subquery()
+        )
+        neighbor = self._model
+        seen = aliased(RatingDB)
+        score = (
+            sa.func.sum(neighbor.similarity * rated.c.rating)
+            / (sa.func.sum(neighbor.similarity) + config.score_shrinkage)
+        ).label("score")
+        scored = (
+            sa.select(neighbor.neighbor_id.label("movie_id"), score)
+            .join(rated, rated.c.movie_id == neighbor.movie_id)
+            .where(
+                ~sa.exists().where(
+                    seen.user_id == user_id, seen.movie_id == neighbor.neighbor_id
+                )
+            )
+            .group_by(neighbor.neighbor_id)
+            .order_by(score.desc(), neighbor.neighbor_id)
+            .limit(k)
+            .subquery()
+        )
+        query = (
+            sa.select(scored.c.movie_id, MovieDB.title, scored.c.score)
+            .join(MovieDB, MovieDB.id == scored.c.movie_id)
+            .order_by(scored.c.score.desc(), scored.c.movie_id)
+        )
+        rows = (await session.execute(query)).all()
+        return self._list_adapter(RecommendationOut).validate_python(
+            rows, from_attributes=True
+        )
+
+
+MovieNeighborRepository = MovieNeighborRepositoryBase(
+    model=MovieNeighborDB, schema=MovieNeighborOut
+)
@@ -0,0 +1,114 @@
+import random
+from dataclasses import dataclass, field
+from typing import cast
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import RATING_HISTOGRAM_BUCKETS, MovieRatingStatsDB
+from app.domain.repositories.base_repository import BaseRepository
+from app.schemas.endpoints import MovieRatingStatsOut
+from app.settings import settings
+
+# element-wise sum of the stored and the incoming histogram
+_MERGE_HISTOGRAMS: sa.ColumnClause[list[int]] = sa.literal_column(
+    "ARRAY(SELECT a + b FROM unnest(movie_rating_stats.histogram, excluded.histogram)"
+    " WITH ORDINALITY AS h(a, b, i) ORDER BY i)"
+)
+
+
+def rating_bucket(rating: float) -> int:
+    """Histogram index of a rating, ratings are validated to be within [1, 10]"""
+    return min(int(rating), RATING_HISTOGRAM_BUCKETS) - 1
+
+
+@dataclass
+class RatingStatsDelta:
+    count: int = 0
+    sum: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * RATING_HISTOGRAM_BUCKETS)
+
+    def add(self, rating: float, sign: int = 1) -> None:
+        self.count += sign
+        self.sum += sign * rating
+        self.histogram[rating_bucket(rating)] += sign
+
+
+class MovieRatingStatsRepositoryBase(
+    BaseRepository[MovieRatingStatsDB, MovieRatingStatsOut]
+):
+    """
+    Incrementally maintained per-movie rating aggregates.
+
+    Writes must happen in the same transaction as the rating writes they reflect.
+    """
+
+    async def add_rating(
+        self, session: AsyncSession, movie_id: UUID, rating: float
+    ) -> None:
+        delta = RatingStatsDelta()
+        delta.add(rating)
+        await self.apply_deltas(session, {movie_id: delta})
+
+    async def apply_deltas(
+        self, session: AsyncSession, deltas: dict[UUID, RatingStatsDelta]
+    ) -> None:
+        """
+        Add the deltas to a random counter shard of every movie, in one statement
+        """
+        if not deltas:
+            return
+        values = [
+            {
+                "movie_id": movie_id,
+                "shard": random.randrange(settings.RATING_STATS_SHARDS),
+                "count": delta.count,
+                "sum": delta.sum,
+                "histogram": delta.histogram,
+            }
+            # a stable order keeps concurrent multi-movie upserts from deadlocking
+            for movie_id, delta in sorted(deltas.items())
+        ]
+        table = cast(sa.Table, self._model.__table__)
+        query = insert(table).values(values)
+        query = query.on_conflict_do_update(
+            index_elements=[table.c.movie_id, table.c.shard],
+            set_={
+                "count": table.c.count + query.excluded.count,
+                "sum": table.c.sum + query.excluded.sum,
+                "histogram": _MERGE_HISTOGRAMS,
+            },
+        )
+        await session.execute(query)
+
+    async def get_stats(
+        self, session: AsyncSession, movie_id: UUID
+    ) -> MovieRatingStatsOut | None:
+        """
+        Sum the counter shards of a movie, None if it has never been rated
+        """
+        query = sa.select(self._model).where(self._model.movie_id == movie_id)
+        shards = (await session.execute(query)).scalars().all()
+        if not shards:
+            return None
+
+        total = RatingStatsDelta()
+        for shard in shards:
+            total.count += shard.count
+            total.sum += shard.sum
+            total.histogram = [a + b for a, b in zip(total.histogram, shard.histogram)]
+
+        return self._schema(
+            movie_id=movie_id,
+            count=total.count,
+            sum=total.sum,
+            mean=total.sum / total.count if total.count else None,
+            histogram=total.histogram,
+        )
+
+
+MovieRatingStatsRepository = MovieRatingStatsRepositoryBase(
+    model=MovieRatingStatsDB, schema=MovieRatingStatsOut
+)
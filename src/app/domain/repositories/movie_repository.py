@@ -1,5 +1,45 @@
-from app.database.models import MovieDB
-from app.domain.repositories.base_repository import BaseRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import MOVIE_SEARCH_CONFIG, MovieDB
+from app.domain.repositories.base_repository import (
+    AnyOf,
+    BaseRepository,
+    FuzzyMatch,
+    Page,
+    TextSearch,
+)
+from app.domain.repositories.cache import build_entity_cache
 from app.schemas.endpoints import MovieOut
+from app.settings import settings
+
+
+class MovieRepositoryBase(BaseRepository[MovieDB, MovieOut]):
+    async def search(
+        self,
+        session: AsyncSession,
+        query: str,
+        limit: int,
+        cursor: str | None = None,
+    ) -> Page[MovieOut]:
+        """
+        Movies matching a search query, best match first
+
+        Full-text over the title and the description, and unless
+        settings.search.fuzzy_titles is off, titles having a word similar to the
+        query, which catches typos and partial words.
+        """
+        config = settings.search
+        text_search = TextSearch("search_vector", query, MOVIE_SEARCH_CONFIG)
+        search = (
+            AnyOf([text_search, FuzzyMatch("title", query)])
+            if config.fuzzy_titles
+            else text_search
+        )
+        return await self.find_ranked_page(
+            session, limit, [search], cursor=cursor, max_ranked=config.max_ranked
+        )
+
 
-MovieRepository = BaseRepository(model=MovieDB, schema=MovieOut)
+MovieRepository = MovieRepositoryBase(
+    model=MovieDB, schema=MovieOut, cache=build_entity_cache("movie", MovieOut)
+)
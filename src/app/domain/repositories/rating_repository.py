@@ -1,5 +1,90 @@
-from app.database.models import RatingDB
-from app.domain.repositories.base_repository import BaseRepository
-from app.schemas.endpoints import RatingOut
+from uuid import UUID
 
-RatingRepository = BaseRepository(model=RatingDB, schema=RatingOut)
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.binary_copy import copy_from_query, row_dtype
+from app.database.models import MovieDB, MovieRatingStatsDB, RatingDB
+from app.domain.repositories.base_repository import BaseRepository, Page
+from app.schemas.endpoints import ProfileRatingOut, RatingOut
+
+_MATRIX_ROW = row_dtype([("user", ">i4"), ("movie", ">i4"), ("rating", ">f4")])
+
+# users numbered by dense_rank in the order of the user index, movies in id
+# order like the ids read along
+_MATRIX_QUERY = f"""
+    SELECT (dense_rank() OVER (ORDER BY r.user_id) - 1)::integer,
+           m.n,
+           r.rating::real
+    FROM {RatingDB.__tablename__} AS r
+    JOIN (
+        SELECT id, (row_number() OVER (ORDER BY id) - 1)::integer AS n
+        FROM {MovieDB.__tablename__}
+    ) AS m ON m.id = r.movie_id
+"""
+
+
+class RatingRepositoryBase(BaseRepository[RatingDB, RatingOut]):
+    async def rating_matrix(self, session: AsyncSession) -> tuple[list[UUID], np.ndarray]:
+        """
+        Every rating as a (user, movie, rating) record, users and movies numbered
+        from 0, and the movie ids by number
+
+        Streamed with a binary COPY into 12 bytes a rating. Both come from the
+        snapshot of the session's transaction, which must be REPEATABLE READ or
+        stricter for them to match.
+        """
+        movies = await session.execute(sa.select(MovieDB.id).order_by(MovieDB.id))
+        movie_ids = list(movies.scalars())
+        # runs in the transaction begun by the statement above
+        raw = await (await session.connection()).get_raw_connection()
+        matrix = await copy_from_query(
+            raw.driver_connection, _MATRIX_QUERY, _MATRIX_ROW  # type: ignore
+        )
+        return movie_ids, matrix
+
+    async def find_profile_page(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        limit: int,
+        offset: int | None = None,
+        cursor: str | None = None,
+    ) -> Page[ProfileRatingOut]:
+        """
+        A page of a user's ratings, each with the title and the rating stats of
+        its movie, in one statement
+
+        The movie columns are correlated subqueries, primary key lookups of the
+        movie and of its stats shards for the rows of the page only.
+        """
+        stats = MovieRatingStatsDB
+        of_movie = stats.movie_id == self._model.movie_id
+        count, total = sa.func.sum(stats.count), sa.func.sum(stats.sum)
+        columns: list[sa.ColumnElement] = [
+            sa.select(MovieDB.title)
+            .where(MovieDB.id == self._model.movie_id)
+            .scalar_subquery()
+            .label("movie_title"),
+            sa.select(sa.func.coalesce(count, 0))
+            .where(of_movie)
+            .scalar_subquery()
+            .label("movie_rating_count"),
+            sa.select(total / sa.func.nullif(count, 0))
+            .where(of_movie)
+            .scalar_subquery()
+            .label("movie_mean_rating"),
+        ]
+        return await self.find_page(
+            session,
+            limit,
+            offset=offset,
+            cursor=cursor,
+            filters=[("user_id", user_id)],
+            columns=columns,
+            schema=ProfileRatingOut,
+        )
+
+
+RatingRepository = RatingRepositoryBase(model=RatingDB, schema=RatingOut)
@@ -1,5 +1,64 @@
-from app.database.models import UserDB
-from app.domain.repositories.base_repository import BaseRepository
-from app.schemas.endpoints import UserOut
+from uuid import UUID
 
-UserRepository = BaseRepository(model=UserDB, schema=UserOut)
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import RatingDB, UserDB
+from app.domain.repositories.base_repository import (
+    AnyOf,
+    BaseRepository,
+    Filter,
+    Page,
+    Prefix,
+)
+from app.domain.repositories.cache import build_entity_cache
+from app.schemas.endpoints import UserOut, UserRatingStatsOut
+
+
+class UserRepositoryBase(BaseRepository[UserDB, UserOut]):
+    async def search(
+        self,
+        session: AsyncSession,
+        query: str,
+        limit: int,
+        cursor: str | None = None,
+    ) -> Page[UserOut]:
+        """
+        Users whose name or email starts with query, ignoring case, in
+        (created_at, id) order
+        """
+        filters: list[Filter] = [AnyOf([Prefix("name", query), Prefix("email", query)])]
+        return await self.find_page(session, limit, cursor=cursor, filters=filters)
+
+    async def get_with_rating_stats(
+        self, session: AsyncSession, user_id: UUID
+    ) -> tuple[UserOut, UserRatingStatsOut] | None:
+        """
+        A user and the count and mean of their ratings, in one statement, None if
+        there is no such user
+        """
+        stats = (
+            sa.select(
+                sa.func.count().label("count"),
+                sa.func.avg(RatingDB.rating).label("mean"),
+            )
+            .where(RatingDB.user_id == user_id)
+            .subquery()
+        )
+        query = (
+            sa.select(*self._projection(self._schema), stats.c.count, stats.c.mean)
+            .join_from(self._model, stats, sa.true())
+            .where(self._model.id == user_id)
+        )
+        row = (await session.execute(query)).one_or_none()
+        if row is None:
+            return None
+        return (
+            self._schema.model_validate(row, from_attributes=True),
+            UserRatingStatsOut.model_validate(row, from_attributes=True),
+        )
+
+
+UserRepository = UserRepositoryBase(
+    model=UserDB, schema=UserOut, cache=build_entity_cache("user", UserOut)
+)
@@ -0,0 +1,35 @@
+import asyncio
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.domain.repositories.movie_leaderboard_repository import (
+    MovieLeaderboardRepository,
+)
+from app.settings import LeaderboardSettings
+
+log = structlog.get_logger()
+
+
+async def refresh_leaderboard_periodically(
+    SessionLocal: async_sessionmaker[AsyncSession], config: LeaderboardSettings
+) -> None:
+    """
+    Refresh the top movies ranking every config.refresh_interval seconds, until
+    cancelled
+
+    Every worker runs this, the advisory lock and the age check of
+    MovieLeaderboardRepository.refresh keep them from refreshing all at once.
+    A failed refresh is logged and retried on the next round.
+    """
+    while True:
+        await asyncio.sleep(config.refresh_interval)
+        try:
+            async with SessionLocal() as session:
+                refreshed = await MovieLeaderboardRepository.refresh(
+                    session, max_age=config.refresh_interval / 2
+                )
+            if refreshed:
+                log.info("leaderboard_refreshed")
+        except Exception:
+            log.exception("leaderboard_refresh_failed")
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.schemas.endpoints as sc
+from app.domain.repositories.movie_rating_stats_repository import (
+    MovieRatingStatsRepository,
+    RatingStatsDelta,
+)
+from app.domain.repositories.movie_repository import MovieRepository
+from app.domain.repositories.rating_repository import RatingRepository
+from app.domain.repositories.user_repository import UserRepository
+
+Status = sc.RatingBatchItemStatus
+
+
+async def rate_movies(
+    session: AsyncSession,
+    ratings: list[sc.RatingCreate],
+    on_conflict: sc.RatingConflictAction,
+) -> list[sc.RatingBatchItemOut]:
+    """
+    Store a batch of ratings and the matching rating stats in a few statements
+
+    Items referencing unknown users or movies are reported instead of failing the
+    whole batch. For the same user and movie the last item of the batch wins.
+    """
+    results: dict[int, sc.RatingBatchItemOut] = {}
+
+    latest: dict[tuple[UUID, UUID], int] = {}
+    for index, rating in enumerate(ratings):
+        key = (rating.user_id, rating.movie_id)
+        if key in latest:
+            results[latest[key]] = sc.RatingBatchItemOut(
+                index=latest[key], status=Status.DUPLICATE
+            )
+        latest[key] = index
+
+    user_ids = list({user_id for user_id, _ in latest})
+    movie_ids = list({movie_id for _, movie_id in latest})
+    known_users = set(
+        await UserRepository.find_ids(session, filters=[("id", "in_", user_ids)])
+    )
+    known_movies = set(
+        await MovieRepository.find_ids(session, filters=[("id", "in_", movie_ids)])
+    )
+
+    pending: dict[tuple[UUID, UUID], int] = {}
+    for (user_id, movie_id), index in latest.items():
+        if user_id not in known_users:
+            results[index] = sc.RatingBatchItemOut(
+                index=index, status=Status.USER_NOT_FOUND
+            )
+        elif movie_id not in known_movies:
+            results[index] = sc.RatingBatchItemOut(
+                index=index, status=Status.MOVIE_NOT_FOUND
+            )
+        else:
+            pending[(user_id, movie_id)] = index
+
+    update = on_conflict is sc.RatingConflictAction.UPDATE
+    rows = await RatingRepository.bulk_create(
+        session,
+        [ratings[index].model_dump() for index in pending.values()],
+        conflict_target=["user_id", "movie_id"],
+        update_fields=["rating"] if update else None,
+        returning=["id", "user_id", "movie_id", "rating"],
+    )
+
+    deltas: dict[UUID, RatingStatsDelta] = defaultdict(RatingStatsDelta)
+    for row in rows:
+        index = pending.pop((row.user_id, row.movie_id))
+        deltas[row.movie_id].add(row.rating)
+        if row.inserted:
+            status = Status.CREATED
+        else:
+            status = Status.UPDATED
+            deltas[row.movie_id].add(row.previous_rating, sign=-1)
+        results[index] = sc.RatingBatchItemOut(index=index, status=status, id=row.id)
+
+    # whatever is left conflicted and was skipped
+    for index in pending.values():
+        results[index] = sc.RatingBatchItemOut(index=index, status=Status.EXISTS)
+
+    await MovieRatingStatsRepository.apply_deltas(session, deltas)
+    return [results[index] for index in range(len(ratings))]
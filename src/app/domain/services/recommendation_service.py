@@ -0,0 +1,142 @@
+"""
+Item-item collaborative filtering: the movie neighbors job
+
+Movies are compared by the ratings they got from the same users, as columns of
+the sparse user x movie rating matrix. Ratings are first centered on the mean
+rating of their user, so that users rating everything high or low don't make
+every movie look alike (adjusted cosine). The most similar movies of every movie
+are stored in the movie neighbor table, which the recommendations endpoint scores
+a user's unseen movies from.
+
+The similarities are computed a block of movies at a time, so besides the rating
+matrix (12 bytes a rating) the job never holds more than
+settings.recommendations.block_entries of them. Run it offline, e.g. nightly:
+
+    ENV_FILES=../.env.local python -m app.domain.services.recommendation_service
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Iterator
+
+import numpy as np
+import structlog
+from scipy import sparse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.base import get_base_db_engine_and_session
+from app.domain.repositories.movie_neighbor_repository import (
+    MovieNeighborRepository,
+    NeighborBlock,
+)
+from app.domain.repositories.rating_repository import RatingRepository
+from app.settings import RecommendationSettings, settings
+
+log = structlog.get_logger()
+
+
+def movie_neighbors(
+    matrix: np.ndarray, movies: int, config: RecommendationSettings
+) -> Iterator[NeighborBlock]:
+    """
+    Top config.neighbors movies of every movie with a positive similarity, a
+    block of movies at a time
+
+    matrix holds (user, movie, rating) records, see RatingRepository.rating_matrix.
+    """
+    if not len(matrix) or not movies:
+        return
+    user, movie = matrix["user"], matrix["movie"]
+    users = int(user.max()) + 1
+
+    counts = np.bincount(user, minlength=users)
+    means = np.bincount(user, weights=matrix["rating"], minlength=users) / counts
+    centered = (matrix["rating"] - means[user]).astype(np.float32)
+    # movie x user, and its transpose in the row format the products need
+    by_movie = sparse.csr_array((centered, (movie, user)), shape=(movies, users))
+    by_user = by_movie.T.tocsr()
+    norms = np.sqrt(
+        np.bincount(movie, weights=centered.astype(np.float64) ** 2, minlength=movies)
+    ).astype(np.float32)
+
+    rows = max(config.block_entries // movies, 1)
+    for start in range(0, movies, rows):
+        stop = min(start + rows, movies)
+        block = np.arange(start, stop)
+        dots = (by_movie[start:stop] @ by_user).toarray()
+        denominator = (
+            norms[start:stop, None] * norms[None, :] + config.similarity_shrinkage
+        )
+        # unrated movies, or rated only at their raters' means, have a zero norm
+        # and without shrinkage a zero denominator, their similarities stay 0
+        similarity = np.divide(
+            dots, denominator, out=np.zeros_like(dots), where=denominator > 0
+        )
+        # a movie is not its own neighbor
+        similarity[block - start, block] = 0
+
+        if movies > config.neighbors:
+            top = np.argpartition(similarity, -config.neighbors, axis=1)
+            top = top[:, -config.neighbors :]
+        else:
+            top = np.broadcast_to(np.arange(movies), similarity.shape)
+        top_similarity = np.take_along_axis(similarity, top, axis=1)
+        # unrelated and unrated movies have none, or a negative one
+        keep = top_similarity > 0
+        yield (
+            np.broadcast_to(block[:, None], top.shape)[keep],
+            top[keep],
+            top_similarity[keep],
+        )
+
+
+async def build_movie_neighbors(
+    session: AsyncSession, config: RecommendationSettings | None = None
+) -> int:
+    """
+    Recompute the movie neighbors from every rating and commit them. Returns the
+    number of neighbors stored.
+    """
+    config = config or settings.recommendations
+    started = time.perf_counter()
+    # the movie ids and the ratings numbering them must come from one snapshot
+    await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    movie_ids, matrix = await RatingRepository.rating_matrix(session)
+    await session.rollback()
+    log.info(
+        "rating_matrix_loaded",
+        ratings=len(matrix),
+        movies=len(movie_ids),
+        duration_s=round(time.perf_counter() - started, 2),
+    )
+
+    async def blocks() -> AsyncIterator[NeighborBlock]:
+        for block in movie_neighbors(matrix, len(movie_ids), config):
+            yield block
+
+    written = await MovieNeighborRepository.replace(session, movie_ids, blocks())
+    await session.commit()
+    await MovieNeighborRepository.vacuum(session)
+    log.info(
+        "movie_neighbors_built",
+        neighbors=written,
+        duration_s=round(time.perf_counter() - started, 2),
+    )
+    return written
+
+
+async def main() -> None:
+    engine, SessionLocal = get_base_db_engine_and_session()
+    try:
+        async with SessionLocal() as session:
+            await build_movie_neighbors(session)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    from app.logs import configure_logging, sink
+
+    configure_logging()
+    asyncio.run(main())
+    sink.flush()
@@ -29,3 +29,30 @@ class UserDoesNotExistError(CustomServiceException):
             message=message,
             error_code=CustomServiceErrorCodes.USER_DOES_NOT_EXIST,
         )
+
+
+class InvalidCursorError(CustomServiceException):
+    def __init__(self, message: str = "Invalid pagination cursor"):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=message,
+            error_code=CustomServiceErrorCodes.INVALID_CURSOR,
+        )
+
+
+class SearchTooBroadError(CustomServiceException):
+    def __init__(self, message: str = "Search matches too many results, refine it"):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=message,
+            error_code=CustomServiceErrorCodes.SEARCH_TOO_BROAD,
+        )
+
+
+class ConcurrentUpdateError(CustomServiceException):
+    def __init__(self, message: str = "Conflicting concurrent update, try again"):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            message=message,
+            error_code=CustomServiceErrorCodes.CONCURRENT_UPDATE,
+        )
@@ -0,0 +1,157 @@
+"""
+structlog configuration, with rendering and writing moved off the event loop
+
+Log calls only timestamp the event and put it on a bounded queue. A writer
+thread renders the queued events to JSON and writes them out in batches. When
+the queue fills up faster than it drains, lines are dropped rather than making
+the caller wait: past HIGH_WATER_MARK only warnings and errors are still queued,
+and once it is full everything is dropped. The number of dropped lines is
+reported by the writer as soon as it catches up.
+"""
+
+import atexit
+import datetime
+import queue
+import sys
+import threading
+from typing import Any, TextIO, cast
+
+import structlog
+from structlog.typing import EventDict
+
+from app.settings import settings
+
+# fraction of the queue above which info and debug lines are dropped
+HIGH_WATER_MARK = 0.9
+# lines rendered and written per write call at most
+BATCH_SIZE = 512
+
+_DEBUG, _INFO, _WARNING, _ERROR, _CRITICAL = 10, 20, 30, 40, 50
+_STOP = object()
+
+
+class QueueLogSink:
+    def __init__(self, stream: TextIO, max_size: int) -> None:
+        self._stream = stream
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._high_water = int(max_size * HIGH_WATER_MARK)
+        self._renderer = structlog.processors.JSONRenderer()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self._reported_dropped = 0
+
+    def put(self, level: int, event_dict: dict[str, Any]) -> None:
+        if self._thread is None:
+            self._start()
+        if level < _WARNING and self._queue.qsize() >= self._high_water:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Wait for every queued line to be written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            # the stop marker must get in, it's the one put that may wait
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _render(self, event_dict: EventDict) -> str:
+        # json.dumps, the default serializer of the renderer, returns str
+        return cast(str, self._renderer(None, "", event_dict))
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            lines = [self._render(event) for event in batch if event is not _STOP]
+            dropped = self.dropped - self._reported_dropped
+            if dropped:
+                self._reported_dropped += dropped
+                lines.append(
+                    self._render(
+                        {
+                            "count": dropped,
+                            "event": "log_lines_dropped",
+                            "timestamp": datetime.datetime.now(
+                                datetime.timezone.utc
+                            ).isoformat(),
+                        },
+                    )
+                )
+            try:
+                if lines:
+                    self._stream.write("\n".join(lines) + "\n")
+                    self._stream.flush()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+
+def _log_method(level: int) -> Any:
+    def log(self: "QueueLogger", event_dict: dict[str, Any]) -> None:
+        self._sink.put(level, event_dict)
+
+    return log
+
+
+class QueueLogger:
+    """structlog logger handing the processed event over to the sink"""
+
+    def __init__(self, sink: QueueLogSink) -> None:
+        self._sink = sink
+
+    debug = _log_method(_DEBUG)
+    info = msg = _log_method(_INFO)
+    warning = warn = _log_method(_WARNING)
+    error = exception = _log_method(_ERROR)
+    critical = fatal = _log_method(_CRITICAL)
+
+
+def _to_sink(
+    logger: Any, method_name: str, event_dict: EventDict
+) -> tuple[tuple[EventDict], dict[str, Any]]:
+    # passed on as the single positional argument of the logger method
+    return (event_dict,), {}
+
+
+sink = QueueLogSink(sys.stdout, max_size=settings.log.queue_size)
+
+
+def configure_logging() -> None:
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.TimeStamper(fmt="iso"),
+            # needs the exception being handled, so it can't wait for the writer
+            structlog.processors.format_exc_info,
+            _to_sink,
+        ],
+        logger_factory=lambda *args: QueueLogger(sink),
+    )
+    atexit.register(sink.close)
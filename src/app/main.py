@@ -1,30 +1,40 @@
+import asyncio
+import contextlib
+import os
 import typing as t
+from contextlib import asynccontextmanager
 
 import structlog
 import uvicorn  # type: ignore
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
 from starlette.middleware import Middleware
 
 from app.api.api import api_router
+from app.api.endpoints import metrics as metrics_endpoint
 from app.api.openapi import OpenApiDocumentation
 from app.context import ContextMiddleware
+from app.database.base import (
+    get_base_db_engine_and_session,
+    get_read_only_session,
+)
+from app.database.instrumentation import instrument_engine
+from app.database.replicas import ReplicaSet
+from app.database.slow_query_log import slow_query_log
+from app.domain.services.leaderboard_service import refresh_leaderboard_periodically
 from app.exception_handlers import (
     arbitrary_exception_handler,
     handle_custome_service_exception,
     handle_validation_exception,
 )
 from app.exceptions import CustomServiceException
+from app.logs import configure_logging, sink
+from app.request_logging import RequestLoggingMiddleware
 from app.schemas.error_response import ErrorResponse
 from app.settings import settings
 
-structlog.configure(
-    processors=[
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.JSONRenderer(),
-    ]
-)
+configure_logging()
 log = structlog.get_logger()
 
 # Define error responses that we may return
@@ -37,11 +47,63 @@ responses: t.Dict[t.Union[str, int], t.Dict[str, t.Any]] = {
 }
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> t.AsyncGenerator[None, None]:
+    # One engine (and so one connection pool) per process, shared by all requests
+    engine, SessionLocal = get_base_db_engine_and_session()
+    # and one per read replica
+    replica_engines = [
+        get_base_db_engine_and_session(url)[0] for url in settings.DB_REPLICA_URLS
+    ]
+    replicas = ReplicaSet(
+        [(e, get_read_only_session(e, replica=True)) for e in replica_engines],
+        strategy=settings.db.replica_strategy,
+    )
+    for e in [engine, *replica_engines]:
+        instrument_engine(e)
+    app.state.db_engine = engine
+    app.state.db_session_factory = SessionLocal
+    app.state.db_read_session_factory = get_read_only_session(engine)
+    app.state.db_replicas = replicas
+    log.info(
+        "database_engine_created",
+        pool_size=settings.db.pool_size,
+        replicas=len(replicas),
+        pid=os.getpid(),
+    )
+    # in every worker, the refresh itself makes sure only one refreshes at a time
+    leaderboard_refresh = (
+        asyncio.create_task(
+            refresh_leaderboard_periodically(SessionLocal, settings.leaderboard)
+        )
+        if settings.leaderboard.refresh_enabled
+        else None
+    )
+    try:
+        yield
+    finally:
+        if leaderboard_refresh is not None:
+            leaderboard_refresh.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await leaderboard_refresh
+        await slow_query_log.close()
+        await engine.dispose()
+        await replicas.dispose()
+        log.info("database_engine_disposed", pid=os.getpid())
+        # joins the queue until the writer thread is done, off the event loop
+        await asyncio.to_thread(sink.flush)
+
+
 def create_app():
 
     app = FastAPI(
         title="movie-rating-app",
-        middleware=[Middleware(ContextMiddleware)],
+        lifespan=lifespan,
+        # outermost first
+        middleware=[
+            Middleware(RequestLoggingMiddleware),
+            Middleware(ContextMiddleware),
+        ],
         openapi_url="/docs/openapi.json",
         docs_url="/docs/",
         redoc_url="/docs/redocs/",
@@ -56,40 +118,30 @@ def create_app():
 
     app.openapi = OpenApiDocumentation(app).custom_openapi  # type: ignore
 
-    @app.middleware("http")
-    async def logging_middleware(request: Request, call_next) -> Response:
-        structlog.contextvars.clear_contextvars()
-        structlog.contextvars.bind_contextvars(
-            path=request.scope.get("path", ""),
-            method=request.scope.get("method", ""),
-            query_string=request.scope.get("query_string", "").decode(),
-            client=request.scope.get("client", ("-",))[0],
-            url=str(request.url),
-        )
-        response: Response = await call_next(request)
-        return response
-
     app.include_router(api_router, prefix="/api")
-
-    # @app.on_event("startup")
-    # async def startup():
-    #     async with engine.begin() as conn:
-    #         await conn.run_sync(Base.metadata.create_all)
-    #     log.info("database_initialized")
+    app.include_router(metrics_endpoint.router)
 
     return app
 
 
 def main():
     # https://www.uvicorn.org/settings/
+    # Every worker builds the app from the factory, so the engine and its pool
+    # are created by the lifespan of each worker process and never shared
     uvicorn.run(
         "app.main:create_app",
         factory=True,
-        workers=1,
+        workers=settings.uvicorn.workers,
         host=settings.uvicorn.host,
         port=settings.uvicorn.port,
         reload=settings.uvicorn.reload,
         log_level=settings.uvicorn.log_level,
+        loop=settings.uvicorn.loop,
+        http=settings.uvicorn.http,
+        timeout_keep_alive=settings.uvicorn.timeout_keep_alive,
+        backlog=settings.uvicorn.backlog,
+        limit_concurrency=settings.uvicorn.limit_concurrency,
+        timeout_graceful_shutdown=settings.uvicorn.timeout_graceful_shutdown,
     )
 
 
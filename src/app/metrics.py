@@ -0,0 +1,101 @@
+"""
+Prometheus metrics of this process, in the text exposition format
+
+Only the histograms the app records, kept in process memory: with several
+workers every one of them exposes its own series, told apart by the pid label.
+"""
+
+import bisect
+import math
+import os
+from typing import Iterable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        )
+        for name, value in labels
+    )
+    return f"{{{pairs}}}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        # per label values: count of every bucket (not cumulative) and the sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        counts, total = self._series.setdefault(
+            labelvalues, ([0] * len(self.buckets), [0.0])
+        )
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        pid = ("pid", str(os.getpid()))
+        for labelvalues, (counts, total) in sorted(self._series.items()):
+            labels = [*zip(self.labelnames, labelvalues), pid]
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels([*labels, ("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total[0]!r}")
+        return lines
+
+
+REGISTRY: list[Histogram] = []
+
+
+def generate_latest() -> bytes:
+    lines = [line for metric in REGISTRY for line in metric.render()]
+    return ("\n".join(lines) + "\n").encode()
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, until the response starts",
+    ("method", "route", "status"),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing DB statements per request",
+    ("method", "route"),
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "Number of DB statements executed per request",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
@@ -0,0 +1,86 @@
+import time
+
+import structlog
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import metrics
+from app.context import QueryStats, query_stats
+
+log = structlog.get_logger()
+
+
+def server_timing(stats: QueryStats, duration: float) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    return ", ".join(
+        [
+            f'db;dur={stats.duration * 1000:.2f};desc="{stats.statements} statements"',
+            f"db-slowest;dur={stats.slowest_duration * 1000:.2f}",
+            f"app;dur={(duration - stats.duration) * 1000:.2f}",
+            f"total;dur={duration * 1000:.2f}",
+        ]
+    )
+
+
+class RequestLoggingMiddleware:
+    """
+    Binds the request to the log context, tallies its DB statements and, once it
+    is answered, logs it and records its metrics
+
+    Plain ASGI like ContextMiddleware, the response is passed through as it is
+    sent rather than buffered in a separate task.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":  # pragma: no cover
+            await self.app(scope, receive, send)
+            return
+
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(
+            path=scope["path"],
+            method=scope["method"],
+            query_string=scope["query_string"].decode("latin-1"),
+            client=(scope.get("client") or ("-",))[0],
+        )
+        started = time.perf_counter()
+        stats = QueryStats()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", server_timing(stats, time.perf_counter() - started)
+                )
+            await send(message)
+
+        token = query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(token)
+            duration = time.perf_counter() - started
+            # set by the router, the path template keeps the label values bounded
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            metrics.REQUEST_DURATION.observe(
+                duration, method, route_path, str(status_code)
+            )
+            metrics.REQUEST_DB_DURATION.observe(stats.duration, method, route_path)
+            metrics.REQUEST_DB_STATEMENTS.observe(stats.statements, method, route_path)
+            log.info(
+                "request_finished",
+                status_code=status_code,
+                duration_ms=round(duration * 1000, 2),
+                db_statements=stats.statements,
+                db_duration_ms=round(stats.duration * 1000, 2),
+                db_slowest_ms=round(stats.slowest_duration * 1000, 2),
+                db_slowest_statement=stats.slowest_statement,
+            )
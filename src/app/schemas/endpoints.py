@@ -1,6 +1,11 @@
+import datetime
+from enum import Enum
 from uuid import UUID
 
-from pydantic import BaseModel, Field, constr
+from pydantic import BaseModel, ConfigDict, Field, constr
+
+RATING_BATCH_MAX_ITEMS = 10_000
+BATCH_GET_MAX_IDS = 100
 
 
 # ---------- Schemas ----------
@@ -14,8 +19,18 @@ class UserOut(BaseModel):
     name: str
     email: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserListOut(BaseModel):
+    items: list[UserOut]
+    next_cursor: str | None = None
+    # requested by id but not found, only set for a batch get
+    missing_ids: list[UUID] | None = None
+
+
+class BatchGetIn(BaseModel):
+    ids: list[UUID] = Field(..., min_length=1, max_length=BATCH_GET_MAX_IDS)
 
 
 class MovieCreate(BaseModel):
@@ -28,13 +43,25 @@ class MovieOut(BaseModel):
     title: str
     description: str | None = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MovieRatingStatsOut(BaseModel):
+    movie_id: UUID
+    count: int
+    sum: float
+    mean: float | None = None
+    histogram: list[int] = Field(
+        ..., description="Number of ratings per bucket, [1, 2), [2, 3), ..., [9, 10]"
+    )
 
 
 class MovieListOut(BaseModel):
     items: list[MovieOut]
-    total: int
+    total: int | None = None
+    next_cursor: str | None = None
+    # requested by id but not found, only set for a batch get
+    missing_ids: list[UUID] | None = None
 
 
 class RatingCreate(BaseModel):
@@ -49,15 +76,130 @@ class RatingOut(BaseModel):
     movie_id: UUID
     rating: float
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RatingExportOut(RatingOut):
+    created_at: datetime.datetime
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class RatingConflictAction(str, Enum):
+    IGNORE = "ignore"
+    UPDATE = "update"
+
+
+class RatingBatchCreate(BaseModel):
+    items: list[RatingCreate] = Field(
+        ..., min_length=1, max_length=RATING_BATCH_MAX_ITEMS
+    )
+    on_conflict: RatingConflictAction = Field(
+        RatingConflictAction.IGNORE,
+        description="What to do with ratings the user already gave the movie",
+    )
+
+
+class RatingBatchItemStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    # already rated and on_conflict is "ignore"
+    EXISTS = "exists"
+    # superseded by a later item of the batch for the same user and movie
+    DUPLICATE = "duplicate"
+    USER_NOT_FOUND = "user_not_found"
+    MOVIE_NOT_FOUND = "movie_not_found"
+
+
+class RatingBatchItemOut(BaseModel):
+    index: int
+    status: RatingBatchItemStatus
+    id: UUID | None = None
+
+
+class RatingBatchOut(BaseModel):
+    items: list[RatingBatchItemOut]
 
 
 class RatingListOut(BaseModel):
     items: list[RatingOut]
-    total: int
+    total: int | None = None
+    next_cursor: str | None = None
+
+
+class UserRatingStatsOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    count: int
+    mean: float | None = None
+
+
+class ProfileRatingOut(RatingOut):
+    movie_title: str
+    # over all users
+    movie_rating_count: int
+    movie_mean_rating: float | None = None
+
+
+class ProfileRatingListOut(BaseModel):
+    items: list[ProfileRatingOut]
+    total: int | None = None
+    next_cursor: str | None = None
 
 
 class UserProfileOut(BaseModel):
     user: UserOut
-    ratings: RatingListOut
+    rating_stats: UserRatingStatsOut
+    ratings: ProfileRatingListOut
+
+
+class MovieNeighborOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    movie_id: UUID
+    neighbor_id: UUID
+    similarity: float
+
+
+class RecommendationOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    movie_id: UUID
+    title: str
+    # weighted mean of the user's ratings of similar movies, shrunk towards 0 when
+    # few of them are similar
+    score: float
+
+
+class RecommendationListOut(BaseModel):
+    items: list[RecommendationOut]
+
+
+class MovieLeaderboardOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    movie_id: UUID
+    rating_count: int
+    mean: float
+    score: float
+    refreshed_at: datetime.datetime
+
+
+class TopMovieOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    movie_id: UUID
+    title: str
+    rating_count: int
+    mean: float
+    # Bayesian average, the mean damped towards the mean over all movies
+    score: float
+
+
+class TopMovieListOut(BaseModel):
+    items: list[TopMovieOut]
+    # when the ranking was computed, None if it never was
+    refreshed_at: datetime.datetime | None = None
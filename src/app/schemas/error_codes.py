@@ -21,6 +21,9 @@ class CustomServiceErrorCodes(AutoNameEnum):
     RESOURCE_FORBIDDEN = auto()
     VALIDATION_ERROR = auto()
     RESOURCE_NOT_FOUND = auto()
+    INVALID_CURSOR = auto()
+    SEARCH_TOO_BROAD = auto()
+    CONCURRENT_UPDATE = auto()
 
     # Users-specific errors
     USER_DOES_NOT_EXIST = auto()
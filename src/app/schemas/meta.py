@@ -1,3 +1,6 @@
+import datetime
+from typing import Any
+
 from pydantic import BaseModel
 
 
@@ -5,4 +8,21 @@ class Meta(BaseModel):
     app_version: str
 
 
-__all__ = ["Meta"]
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+
+
+class SlowQueryPlan(BaseModel):
+    captured_at: datetime.datetime
+    duration_ms: float
+    # normalized, literals and repeated VALUES rows collapsed
+    statement: str
+    parameters: str
+    repository: str | None = None
+    endpoint: str | None = None
+    # EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) output of a second run
+    plan: dict[str, Any]
+
+
+__all__ = ["Meta", "CacheStats", "SlowQueryPlan"]
@@ -1,3 +1,4 @@
+import importlib.util
 import os
 from enum import Enum
 
@@ -13,6 +14,43 @@ class Environment(str, Enum):
     DEVELOPMENT = "dev"
 
 
+class CacheBackendType(str, Enum):
+    MEMORY = "memory"
+    REDIS = "redis"
+
+
+class CacheSettings(BaseModel):
+    enabled: bool = True
+    # memory is a cache per worker process: a write only invalidates the cache of
+    # the worker that made it, the other workers (uvicorn.workers, the CPU count
+    # by default) may serve the entity as it was for up to ttl. redis is shared
+    # by every worker, and needs the redis extra (poetry install -E redis)
+    backend: CacheBackendType = CacheBackendType.MEMORY
+    # per repository, only used by the in-memory backend
+    max_entries: int = 10_000
+    ttl: float = 60.0  # In seconds
+    redis_url: str = "redis://localhost:6379/0"
+
+    @pydantic.model_validator(mode="after")
+    def _redis_installed(self) -> "CacheSettings":
+        if (
+            self.enabled
+            and self.backend is CacheBackendType.REDIS
+            and importlib.util.find_spec("redis") is None
+        ):
+            raise ValueError(
+                "the redis cache backend needs the redis package, "
+                "install the redis extra (poetry install -E redis)"
+            )
+        return self
+
+
+class ReplicaStrategy(str, Enum):
+    ROUND_ROBIN = "round_robin"
+    # fewest connections checked out by this process
+    LEAST_LOADED = "least_loaded"
+
+
 class DBSettings(BaseModel):
     host: str = "localhost"
     port: int = 5432
@@ -20,6 +58,76 @@ class DBSettings(BaseModel):
     user: str = "postgres"
     password: str = "postgres"
 
+    # connection pool of every worker process, see
+    # https://docs.sqlalchemy.org/en/20/core/pooling.html. A host can open up to
+    # uvicorn.workers * (pool_size + max_overflow) connections, keep that under
+    # the server's max_connections
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_recycle: int = 1800  # In seconds, -1 disables recycling
+    pool_timeout: int = 30  # In seconds
+    pool_pre_ping: bool = True
+    # prepared statements cached per connection, set to 0 behind pgbouncer
+    statement_cache_size: int = 100
+    # logs every statement, far too slow to leave on, see SlowQuerySettings instead
+    echo: bool = False
+
+    # read replicas as "host" or "host:port", same name and credentials as the
+    # primary. GET endpoints read from them, see app.dependencies.get_read_db
+    replica_hosts: list[str] = []
+    replica_strategy: ReplicaStrategy = ReplicaStrategy.ROUND_ROBIN
+    # In seconds, a client reads from the primary for this long after a write,
+    # so it sees its own writes however far the replicas lag behind
+    read_your_writes_window: float = 5.0
+
+
+class SlowQuerySettings(BaseModel):
+    enabled: bool = True
+    # statements taking longer are logged, with their normalized SQL and caller
+    threshold_ms: float = 200.0
+    # fraction of the slow SELECT statements re-run under EXPLAIN (ANALYZE, BUFFERS)
+    explain_sample_rate: float = pydantic.Field(default=0.1, ge=0, le=1)
+    explain_timeout_ms: int = 10_000
+    # captured plans kept in memory, the oldest are dropped first
+    max_plans: int = 50
+
+
+class RecommendationSettings(BaseModel):
+    # most similar movies kept per movie by the neighbor job
+    neighbors: int = pydantic.Field(default=50, ge=1)
+    # added to the norms product of the cosine similarity, damps the similarity
+    # of movies sharing only a few raters
+    similarity_shrinkage: float = pydantic.Field(default=10.0, ge=0)
+    # added to the similarity sum a score is divided by, favours movies close to
+    # several of the user's movies over a single close one
+    score_shrinkage: float = pydantic.Field(default=1.0, ge=0)
+    # most recent ratings of a user recommendations are scored from, bounds the
+    # work for users who rated a lot
+    recent_ratings: int = pydantic.Field(default=200, ge=1)
+    # movie x movie similarities computed at once, bounds the job's working memory
+    # on top of the rating matrix (12 bytes per rating)
+    block_entries: int = pydantic.Field(default=2**24, ge=1)
+
+
+class LeaderboardSettings(BaseModel):
+    # refreshes the top movies ranking in the background, one worker at a time
+    refresh_enabled: bool = True
+    # seconds between refreshes, also how stale the ranking may get
+    refresh_interval: float = pydantic.Field(default=300.0, gt=0)
+
+
+class SearchSettings(BaseModel):
+    # also match titles with a word similar to the query's, needs pg_trgm
+    fuzzy_titles: bool = True
+    # matches ranked per query at most, a query matching more is refused as too
+    # broad rather than reading the whole catalog
+    max_ranked: int = pydantic.Field(default=10_000, ge=1)
+
+
+class LogSettings(BaseModel):
+    # lines waiting for the writer thread, further lines are dropped
+    queue_size: int = pydantic.Field(default=10_000, ge=1)
+
 
 class Settings(BaseSettings):
     ENV_NAME: str | None = None
@@ -27,8 +135,19 @@ class Settings(BaseSettings):
 
     DEBUG: bool = False
 
+    # number of counter rows the rating aggregates of a movie are spread over
+    RATING_STATS_SHARDS: int = pydantic.Field(default=8, ge=1)
+
     db: DBSettings = pydantic.Field(default_factory=DBSettings)
     uvicorn: UvicornSettings = pydantic.Field(default_factory=UvicornSettings)
+    cache: CacheSettings = pydantic.Field(default_factory=CacheSettings)
+    slow_query: SlowQuerySettings = pydantic.Field(default_factory=SlowQuerySettings)
+    log: LogSettings = pydantic.Field(default_factory=LogSettings)
+    recommendations: RecommendationSettings = pydantic.Field(
+        default_factory=RecommendationSettings
+    )
+    leaderboard: LeaderboardSettings = pydantic.Field(default_factory=LeaderboardSettings)
+    search: SearchSettings = pydantic.Field(default_factory=SearchSettings)
 
     @property
     def DB_URL(self) -> str:
@@ -41,6 +160,23 @@ class Settings(BaseSettings):
             password=self.db.password,
         ).unicode_string()
 
+    @property
+    def DB_REPLICA_URLS(self) -> list[str]:
+        urls = []
+        for replica in self.db.replica_hosts:
+            host, _, port = replica.partition(":")
+            urls.append(
+                PostgresDsn.build(
+                    scheme="postgresql+asyncpg",
+                    host=host,
+                    port=int(port) if port else self.db.port,
+                    path=f"{self.db.name}",
+                    username=self.db.user,
+                    password=self.db.password,
+                ).unicode_string()
+            )
+        return urls
+
     @property
     def DB_URL_SYNC(self) -> str:
         return PostgresDsn.build(
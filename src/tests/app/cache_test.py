@@ -0,0 +1,161 @@
+import fnmatch
+import uuid
+
+import mock
+import pytest
+from pydantic import ValidationError
+
+from app.domain.repositories.cache import (
+    EntityCache,
+    InMemoryCacheBackend,
+    RedisCacheBackend,
+)
+from app.schemas.endpoints import MovieOut
+from app.settings import CacheSettings
+
+
+class FakeRedis:
+    """The subset of redis.asyncio.Redis used by RedisCacheBackend"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def set(self, key, value, px=None):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        for key, value in self.commands:
+            await self.redis.set(key, value)
+
+
+def _movie() -> MovieOut:
+    return MovieOut(id=uuid.uuid4(), title="test", description="test")
+
+
+async def test_entity_cache_counts_hits_and_misses():
+    # Arrange
+    cache = EntityCache("movie", MovieOut, InMemoryCacheBackend(10), ttl=60)
+    movie = _movie()
+
+    # Act
+    missed = await cache.get(movie.id)
+    await cache.set(movie.id, movie)
+    hit = await cache.get(movie.id)
+
+    # Assert
+    assert missed is None
+    assert hit == movie
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_in_memory_backend_evicts_least_recently_used():
+    # Arrange
+    cache = EntityCache("movie", MovieOut, InMemoryCacheBackend(2), ttl=60)
+    movies = [_movie() for _ in range(3)]
+    await cache.set(movies[0].id, movies[0])
+    await cache.set(movies[1].id, movies[1])
+
+    # Act
+    await cache.get(movies[0].id)
+    await cache.set(movies[2].id, movies[2])
+
+    # Assert
+    assert await cache.get(movies[0].id) == movies[0]
+    assert await cache.get(movies[1].id) is None
+    assert await cache.get(movies[2].id) == movies[2]
+
+
+async def test_in_memory_backend_expires_entries():
+    # Arrange
+    cache = EntityCache("movie", MovieOut, InMemoryCacheBackend(10), ttl=5)
+    movie = _movie()
+    with mock.patch("time.monotonic", return_value=100.0):
+        await cache.set(movie.id, movie)
+
+    # Act
+    with mock.patch("time.monotonic", return_value=104.0):
+        fresh = await cache.get(movie.id)
+    with mock.patch("time.monotonic", return_value=105.0):
+        expired = await cache.get(movie.id)
+
+    # Assert
+    assert fresh == movie
+    assert expired is None
+
+
+async def test_redis_backend_invalidates_and_clears():
+    # Arrange
+    redis = FakeRedis()
+    cache = EntityCache("movie", MovieOut, RedisCacheBackend(redis), ttl=60)
+    movies = [_movie() for _ in range(3)]
+    for movie in movies:
+        await cache.set(movie.id, movie)
+    redis.data["other"] = b"kept"
+
+    # Act
+    await cache.invalidate(movies[0].id)
+    after_invalidate = await cache.get(movies[0].id)
+    second = await cache.get(movies[1].id)
+    await cache.clear()
+
+    # Assert
+    assert after_invalidate is None
+    assert second == movies[1]
+    assert redis.data == {"other": b"kept"}
+
+
+async def test_entity_cache_get_many_and_set_many():
+    # Arrange
+    cache = EntityCache("movie", MovieOut, RedisCacheBackend(FakeRedis()), ttl=60)
+    movies = [_movie() for _ in range(3)]
+    await cache.set_many({movie.id: movie for movie in movies[:2]})
+
+    # Act
+    found = await cache.get_many([movie.id for movie in movies])
+
+    # Assert
+    assert found == {movie.id: movie for movie in movies[:2]}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_redis_backend_needs_redis_installed():
+    # Act / Assert
+    with mock.patch("importlib.util.find_spec", return_value=None):
+        with pytest.raises(ValidationError, match="redis extra"):
+            CacheSettings(backend="redis")
+        # not used, so not needed
+        CacheSettings(backend="redis", enabled=False)
+        CacheSettings(backend="memory")
@@ -5,3 +5,10 @@ def test_endpoint_meta(test_client: TestClient):
     response = test_client.get("/api/meta")
     assert 200 == response.status_code
     assert {"app_version": "0.1.1"} == response.json()
+
+
+def test_endpoint_meta_cache(test_client: TestClient):
+    response = test_client.get("/api/meta/cache")
+    assert 200 == response.status_code
+    assert {"movie", "user"} <= response.json().keys()
+    assert {"hits", "misses"} == response.json()["movie"].keys()
@@ -0,0 +1,65 @@
+import io
+import json
+import threading
+
+from app.logs import QueueLogSink
+
+
+class BlockingStream(io.StringIO):
+    """Holds the writer thread on its first write until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, s):
+        self.writing.set()
+        self.release.wait(timeout=5)
+        return super().write(s)
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_sink_renders_events_as_json_lines():
+    # Arrange
+    stream = io.StringIO()
+    sink = QueueLogSink(stream, max_size=10)
+
+    # Act
+    sink.put(20, {"event": "first", "n": 1})
+    sink.put(40, {"event": "second"})
+    sink.close()
+
+    # Assert
+    assert _lines(stream) == [{"event": "first", "n": 1}, {"event": "second"}]
+
+
+def test_sink_drops_info_before_warnings_under_pressure():
+    # Arrange
+    stream = BlockingStream()
+    sink = QueueLogSink(stream, max_size=10)
+    sink.put(20, {"event": "blocked"})
+    assert stream.writing.wait(timeout=5)
+
+    # Act
+    for n in range(12):
+        sink.put(20, {"event": "info", "n": n})
+    for n in range(3):
+        sink.put(30, {"event": "warning", "n": n})
+    stream.release.set()
+    sink.close()
+
+    # Assert
+    events = [(line["event"], line.get("n")) for line in _lines(stream)]
+    # past the high water mark (9 queued) only warnings get in, until it's full
+    assert events == [
+        ("blocked", None),
+        *[("info", n) for n in range(9)],
+        ("warning", 0),
+        ("log_lines_dropped", None),
+    ]
+    assert _lines(stream)[-1]["count"] == 5
+    assert sink.dropped == 5
@@ -0,0 +1,28 @@
+import os
+
+from app import metrics
+from app.metrics import Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    # Arrange
+    histogram = Histogram("test_seconds", "Test", ("route",), buckets=(0.1, 1.0))
+    try:
+        # Act
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, '/a"b')
+        lines = histogram.render()
+    finally:
+        metrics.REGISTRY.remove(histogram)
+
+    # Assert
+    labels = f'route="/a\\"b",pid="{os.getpid()}"'
+    assert lines == [
+        "# HELP test_seconds Test",
+        "# TYPE test_seconds histogram",
+        f'test_seconds_bucket{{{labels},le="0.1"}} 2',
+        f'test_seconds_bucket{{{labels},le="1.0"}} 3',
+        f'test_seconds_bucket{{{labels},le="+Inf"}} 4',
+        f"test_seconds_count{{{labels}}} 4",
+        f"test_seconds_sum{{{labels}}} 3.65",
+    ]
@@ -0,0 +1,75 @@
+import numpy as np
+
+from app.domain.services.recommendation_service import movie_neighbors
+from app.settings import RecommendationSettings
+
+MATRIX_ROW = np.dtype([("user", "i4"), ("movie", "i4"), ("rating", "f4")])
+
+
+def rating_matrix(ratings: list[tuple[int, int, float]]) -> np.ndarray:
+    return np.array(ratings, dtype=MATRIX_ROW)
+
+
+# movies 0 and 1 are liked and disliked by the same users, movie 2 the other way
+# round, movie 3 is never rated
+RATINGS = rating_matrix(
+    [
+        (0, 0, 9), (0, 1, 9), (0, 2, 2),
+        (1, 0, 8), (1, 1, 9), (1, 2, 3),
+        (2, 0, 2), (2, 1, 3), (2, 2, 9),
+    ]
+)  # fmt: skip
+
+
+def neighbors_of(blocks) -> dict[int, dict[int, float]]:
+    neighbors: dict[int, dict[int, float]] = {}
+    for movies, others, similarities in blocks:
+        for movie, other, similarity in zip(movies, others, similarities):
+            neighbors.setdefault(int(movie), {})[int(other)] = float(similarity)
+    return neighbors
+
+
+def test_movie_neighbors_keeps_positive_similarities():
+    # Arrange
+    config = RecommendationSettings(neighbors=2, similarity_shrinkage=0)
+
+    # Act
+    neighbors = neighbors_of(movie_neighbors(RATINGS, 4, config))
+
+    # Assert
+    assert neighbors.keys() == {0, 1}
+    assert neighbors[0].keys() == {1}
+    assert neighbors[1].keys() == {0}
+    assert 0.9 < neighbors[0][1] <= 1
+
+
+def test_movie_neighbors_of_unrated_movie_without_shrinkage():
+    # Arrange
+    config = RecommendationSettings(neighbors=1, similarity_shrinkage=0)
+
+    # Act
+    neighbors = neighbors_of(movie_neighbors(RATINGS, 4, config))
+
+    # Assert
+    assert neighbors.keys() == {0, 1}
+    assert neighbors[0].keys() == {1}
+    assert neighbors[1].keys() == {0}
+
+
+def test_movie_neighbors_is_the_same_block_by_block():
+    # Arrange
+    whole = RecommendationSettings(neighbors=2)
+    row_by_row = RecommendationSettings(neighbors=2, block_entries=1)
+
+    # Act
+    expected = neighbors_of(movie_neighbors(RATINGS, 4, whole))
+    blocks = list(movie_neighbors(RATINGS, 4, row_by_row))
+
+    # Assert
+    assert len(blocks) == 4
+    assert neighbors_of(blocks) == expected
+
+
+def test_movie_neighbors_of_no_ratings():
+    # Act / Assert
+    assert list(movie_neighbors(rating_matrix([]), 4, RecommendationSettings())) == []
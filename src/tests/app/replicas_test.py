@@ -0,0 +1,47 @@
+import mock
+
+from app.database.replicas import ReplicaSet
+from app.settings import ReplicaStrategy
+
+
+def replica(checkedout: int) -> tuple[mock.Mock, mock.Mock]:
+    engine = mock.Mock()
+    engine.pool.checkedout.return_value = checkedout
+    return engine, mock.Mock()
+
+
+def test_round_robin_takes_turns():
+    # Arrange
+    replicas = [replica(0), replica(5), replica(0)]
+    replica_set = ReplicaSet(replicas, ReplicaStrategy.ROUND_ROBIN)
+
+    # Act
+    picked = [replica_set.pick() for _ in range(4)]
+
+    # Assert
+    factories = [factory for _, factory in replicas]
+    assert picked == [*factories, factories[0]]
+
+
+def test_least_loaded_picks_fewest_checked_out():
+    # Arrange
+    replicas = [replica(3), replica(1), replica(2)]
+    replica_set = ReplicaSet(replicas, ReplicaStrategy.LEAST_LOADED)
+
+    # Act
+    picked = {replica_set.pick() for _ in range(3)}
+
+    # Assert
+    assert picked == {replicas[1][1]}
+
+
+def test_least_loaded_takes_turns_between_equals():
+    # Arrange
+    replicas = [replica(0), replica(0)]
+    replica_set = ReplicaSet(replicas, ReplicaStrategy.LEAST_LOADED)
+
+    # Act
+    picked = [replica_set.pick() for _ in range(2)]
+
+    # Assert
+    assert picked == [factory for _, factory in replicas]
@@ -0,0 +1,74 @@
+import uuid
+
+import mock
+from sqlalchemy.engine import make_url
+
+from app.database.slow_query_log import SlowQueryLog, normalize_sql, parameter_shape
+from app.schemas.meta import SlowQueryPlan
+from app.settings import SlowQuerySettings
+
+
+def test_normalize_sql_collapses_literals_and_repeated_rows():
+    # Arrange
+    statement = """
+        INSERT INTO rating_db (id, rating) VALUES ($1::UUID, $2::FLOAT),
+        ($3::UUID, $4::FLOAT), ($5::UUID, $6::FLOAT)
+        RETURNING rating_db.id, 'x''y', 10 AS ten
+    """
+
+    # Act / Assert
+    assert normalize_sql(statement) == (
+        "INSERT INTO rating_db (id, rating) VALUES ($1::UUID, $2::FLOAT), ... "
+        "RETURNING rating_db.id, ?, ? AS ten"
+    )
+    assert normalize_sql("SELECT a FROM t WHERE t.id IN ($1, $2, $3) LIMIT 5") == (
+        "SELECT a FROM t WHERE t.id IN ($1, ...) LIMIT ?"
+    )
+
+
+def test_parameter_shape_never_shows_values():
+    # Act / Assert
+    assert parameter_shape((uuid.uuid4(), "secret", [1, 2]), False) == (
+        "(UUID, str, list[2])"
+    )
+    assert parameter_shape({"email": "a@b.c"}, False) == "{email: str}"
+    assert parameter_shape([(1, 2.0), (3, 4.0)], True) == "2 x (int, float)"
+
+
+async def test_captures_connect_to_the_server_the_statement_ran_on():
+    # Arrange
+    urls = [
+        make_url("postgresql+asyncpg://app@primary/moviedb"),
+        make_url("postgresql+asyncpg://app@replica/moviedb"),
+    ]
+    engines = {}
+
+    def create_engine(url, **kwargs):
+        engines[url] = mock.AsyncMock()
+        engines[url].connect = mock.MagicMock(side_effect=OSError("unreachable"))
+        return engines[url]
+
+    slow_query_log = SlowQueryLog(SlowQuerySettings())
+    entry = SlowQueryPlan(
+        captured_at="2026-10-18T12:00:00Z",
+        duration_ms=1.0,
+        statement="SELECT ?",
+        parameters="()",
+        repository=None,
+        endpoint=None,
+        plan={},
+    )
+
+    # Act
+    with mock.patch(
+        "app.database.slow_query_log.create_async_engine", side_effect=create_engine
+    ):
+        for url in [*urls, urls[0]]:
+            await slow_query_log._capture(url, "SELECT 1", (), entry)
+    await slow_query_log.close()
+
+    # Assert
+    assert list(engines) == urls
+    assert [engine.connect.call_count for engine in engines.values()] == [2, 1]
+    for engine in engines.values():
+        engine.dispose.assert_awaited_once()
@@ -0,0 +1,266 @@
+"""
+Synthetic dataset of users, movies and ratings, streamed in with COPY
+
+Movie popularity and user activity follow Zipf's law, so a few movies collect
+most of the ratings and a few users write most of them. Rating values come from
+a per-movie quality, a per-user bias and noise. The same seed always produces
+the same rows, ids and timestamps included.
+
+    ENV_FILES=../.env.local python -m tests.benchmarks.dataset \\
+        --users 1000000 --movies 100000 --ratings 20000000 --seed 1 --truncate
+
+Writes to the DB of the settings, migrated to head. Tables that already hold
+rows are only overwritten with --truncate. The data derived from the ratings,
+the movie neighbors and the top movies ranking, is recomputed once loaded.
+"""
+
+import argparse
+import asyncio
+import datetime
+import hashlib
+import itertools
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from sqlalchemy import Table, text
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.database.models import (
+    RATING_HISTOGRAM_BUCKETS,
+    MovieDB,
+    MovieNeighborDB,
+    MovieRatingStatsDB,
+    RatingDB,
+    UserDB,
+)
+from app.domain.repositories.movie_leaderboard_repository import (
+    MovieLeaderboardRepository,
+)
+from app.domain.services.recommendation_service import build_movie_neighbors
+from app.settings import settings
+
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+# users and movies are created over the first year, ratings any time after
+SPAN = datetime.timedelta(days=365)
+PROGRESS_EVERY = 1_000_000
+
+
+@dataclass
+class Spec:
+    users: int
+    movies: int
+    ratings: int
+    seed: int
+    # Zipf exponents of movie popularity and user activity
+    movie_skew: float = 1.0
+    user_skew: float = 0.8
+
+
+def entity_id(seed: int, kind: str, n: int) -> uuid.UUID:
+    """Id of the n-th entity of a kind, without keeping every id around"""
+    digest = hashlib.blake2b(f"{seed}:{kind}:{n}".encode(), digest_size=16).digest()
+    return uuid.UUID(bytes=digest, version=4)
+
+
+def zipf_cum_weights(n: int, skew: float) -> list[float]:
+    """Cumulative weights of ranks 1..n, for random.choices"""
+    return list(itertools.accumulate(1 / rank**skew for rank in range(1, n + 1)))
+
+
+def created_at(rng: random.Random, not_before: datetime.datetime) -> datetime.datetime:
+    return not_before + (EPOCH + SPAN - not_before) * rng.random()
+
+
+def user_records(spec: Spec) -> Iterator[tuple[Any, ...]]:
+    rng = random.Random(f"{spec.seed}:users")
+    for n in range(spec.users):
+        at = created_at(rng, EPOCH)
+        yield entity_id(spec.seed, "user", n), f"user {n}", f"user{n}@example.com", at, at
+
+
+def movie_records(spec: Spec) -> Iterator[tuple[Any, ...]]:
+    rng = random.Random(f"{spec.seed}:movies")
+    for n in range(spec.movies):
+        at = created_at(rng, EPOCH)
+        description = f"description {n}" if rng.random() < 0.9 else None
+        yield entity_id(spec.seed, "movie", n), f"movie {n}", description, at, at
+
+
+def ratings_per_user(spec: Spec, rng: random.Random) -> list[int]:
+    """
+    Number of ratings of every user, Zipf distributed and summing up to
+    spec.ratings. Nobody rates more than half of the movies.
+    """
+    cap = max(spec.movies // 2, 1)
+    if spec.ratings > cap * spec.users:
+        raise ValueError(f"at most {cap * spec.users} ratings fit, add users or movies")
+
+    counts = [0] * spec.users
+    cum_weights = zipf_cum_weights(spec.users, spec.user_skew)
+    population = range(spec.users)
+    left = spec.ratings
+    while left:
+        batch = min(left, PROGRESS_EVERY)
+        for user in rng.choices(population, cum_weights=cum_weights, k=batch):
+            if counts[user] < cap:
+                counts[user] += 1
+                left -= 1
+    return counts
+
+
+def rating_records(spec: Spec) -> Iterator[tuple[Any, ...]]:
+    rng = random.Random(f"{spec.seed}:ratings")
+    counts = ratings_per_user(spec, rng)
+    cum_weights = zipf_cum_weights(spec.movies, spec.movie_skew)
+    population = range(spec.movies)
+    # regenerated rather than read back, the record generators share their seeds
+    user_created = [r[3] for r in user_records(spec)]
+    movie_created = [r[3] for r in movie_records(spec)]
+    quality = [min(max(rng.gauss(6.5, 1.5), 1), 10) for _ in population]
+
+    n = 0
+    for user, count in enumerate(counts):
+        user_id = entity_id(spec.seed, "user", user)
+        bias = rng.gauss(0, 1)
+        rated: set[int] = set()
+        while len(rated) < count:
+            for movie in rng.choices(population, cum_weights=cum_weights, k=count):
+                if movie in rated or len(rated) == count:
+                    continue
+                rated.add(movie)
+                rating = round(quality[movie] + bias + rng.gauss(0, 1.5))
+                at = created_at(rng, max(user_created[user], movie_created[movie]))
+                yield (
+                    entity_id(spec.seed, "rating", n),
+                    user_id,
+                    entity_id(spec.seed, "movie", movie),
+                    float(min(max(rating, 1), 10)),
+                    at,
+                    at,
+                )
+                n += 1
+
+
+def progress(records: Iterator[tuple[Any, ...]], name: str) -> Iterator[tuple[Any, ...]]:
+    started = time.perf_counter()
+    n = 0
+    for n, record in enumerate(records, start=1):
+        yield record
+        if n % PROGRESS_EVERY == 0:
+            rate = n / (time.perf_counter() - started)
+            print(f"{name}: {n} rows, {rate:.0f} rows/s", file=sys.stderr)
+    print(f"{name}: {n} rows done", file=sys.stderr)
+
+
+async def copy(
+    conn: AsyncConnection,
+    table: Table,
+    columns: list[str],
+    records: Iterator[tuple[Any, ...]],
+) -> None:
+    raw = await conn.get_raw_connection()
+    # asyncpg encodes and sends the records as they are produced
+    await raw.driver_connection.copy_records_to_table(  # type: ignore
+        table.name, columns=columns, records=progress(records, table.name)
+    )
+
+
+def _stats_backfill() -> str:
+    buckets = ", ".join(
+        f"count(*) FILTER (WHERE least(floor(rating), {RATING_HISTOGRAM_BUCKETS}) = {i})"
+        for i in range(1, RATING_HISTOGRAM_BUCKETS + 1)
+    )
+    return (
+        f"INSERT INTO {MovieRatingStatsDB.__tablename__} "
+        "(movie_id, shard, count, sum, histogram) "
+        f"SELECT movie_id, 0, count(*), sum(rating), ARRAY[{buckets}] "
+        f"FROM {RatingDB.__tablename__} GROUP BY movie_id"
+    )
+
+
+async def generate(spec: Spec, truncate: bool) -> None:
+    tables = [
+        t.__table__
+        for t in (MovieNeighborDB, MovieRatingStatsDB, RatingDB, MovieDB, UserDB)
+    ]
+    engine = create_async_engine(settings.DB_URL)
+    async with engine.begin() as conn:
+        if truncate:
+            names = ", ".join(t.name for t in tables)  # type: ignore
+            await conn.execute(text(f"TRUNCATE {names}"))
+        else:
+            for table in tables:
+                if (await conn.execute(table.select().limit(1))).first():  # type: ignore
+                    raise SystemExit(f"{table.name} is not empty, pass --truncate")
+
+        timestamps = ["created_at", "updated_at"]
+        await copy(
+            conn,
+            UserDB.__table__,  # type: ignore
+            ["id", "name", "email", *timestamps],
+            user_records(spec),
+        )
+        await copy(
+            conn,
+            MovieDB.__table__,  # type: ignore
+            ["id", "title", "description", *timestamps],
+            movie_records(spec),
+        )
+        # building the secondary indexes once is much cheaper than maintaining
+        # them row by row, the same goes for the planner statistics below
+        rating_indexes = list(RatingDB.__table__.indexes)  # type: ignore
+        for index in rating_indexes:
+            await conn.run_sync(index.drop)
+        await copy(
+            conn,
+            RatingDB.__table__,  # type: ignore
+            ["id", "user_id", "movie_id", "rating", *timestamps],
+            rating_records(spec),
+        )
+        for index in rating_indexes:
+            await conn.run_sync(index.create)
+        await conn.execute(text(_stats_backfill()))
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in tables:
+            await conn.execute(text(f"VACUUM ANALYZE {table.name}"))  # type: ignore
+
+    # nothing derived from the previous dataset is kept
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    async with SessionLocal() as session:
+        await build_movie_neighbors(session)
+    async with SessionLocal() as session:
+        await MovieLeaderboardRepository.refresh(session, max_age=0)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--movies", type=int, required=True)
+    parser.add_argument("--ratings", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--movie-skew", type=float, default=1.0)
+    parser.add_argument("--user-skew", type=float, default=0.8)
+    parser.add_argument(
+        "--truncate", action="store_true", help="empty the tables before loading"
+    )
+    args = parser.parse_args()
+    spec = Spec(
+        args.users,
+        args.movies,
+        args.ratings,
+        args.seed,
+        movie_skew=args.movie_skew,
+        user_skew=args.user_skew,
+    )
+    asyncio.run(generate(spec, args.truncate))
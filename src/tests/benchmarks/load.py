@@ -0,0 +1,390 @@
+"""
+Load benchmark of the v1 endpoints
+
+Seeds the test DB, then drives every scenario with a fixed number of concurrent
+clients and reports requests per second, latency percentiles and the DB statements per
+request (from the Server-Timing header, transaction control included). Requests go
+through httpx either straight into create_app() in this process, or to a running
+server with --base-url (which must be using the seeded DB). With --existing
+nothing is seeded, the run samples the data already there, e.g. a large dataset
+loaded by tests.benchmarks.dataset.
+
+    ENV_FILES=../.env.test python -m tests.benchmarks.load --output current.json
+    ENV_FILES=../.env.test python -m tests.benchmarks.load --baseline main.json
+
+With --baseline the run is compared scenario by scenario and exits non-zero when
+throughput dropped, or p95 latency grew, by more than --tolerance.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import platform
+import re
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Iterator
+
+import httpx
+from asgi_lifespan import LifespanManager
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.base_model import TopLevelModel
+from app.main import create_app
+from app.settings import settings
+
+# method, url and json body of one request
+Request = tuple[str, str, Any]
+
+
+@dataclass
+class Dataset:
+    users: int
+    movies: int
+    ratings_per_user: int
+
+
+@dataclass
+class Result:
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    # mean per request, None when the responses carry no Server-Timing
+    db_statements: float | None = None
+
+
+SERVER_TIMING_STATEMENTS = re.compile(r'db;[^,]*desc="(\d+) statements"')
+
+# users and movies numbered in id order
+NUMBERED = """
+    (SELECT id, row_number() OVER (ORDER BY id) AS n FROM user_db) AS u
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) AS n FROM movie_db) AS m
+"""
+
+
+def _stride(dataset: Dataset) -> int:
+    return max(dataset.movies // dataset.ratings_per_user, 2)
+
+
+def _seed_statements(dataset: Dataset) -> list[str]:
+    # every user rates the movies at a fixed stride from their own offset
+    stride = _stride(dataset)
+    return [
+        f"""
+        INSERT INTO user_db (id, name, email)
+        SELECT gen_random_uuid(), 'user ' || i, 'user' || i || '@bench.test'
+        FROM generate_series(1, {dataset.users}) AS i
+        """,
+        f"""
+        INSERT INTO movie_db (id, title, description)
+        SELECT gen_random_uuid(), 'movie ' || i, 'description ' || i
+        FROM generate_series(1, {dataset.movies}) AS i
+        """,
+        f"""
+        INSERT INTO rating_db (id, user_id, movie_id, rating)
+        SELECT gen_random_uuid(), u.id, m.id, 1 + (u.n + m.n) % 10
+        FROM {NUMBERED} ON m.n % {stride} = u.n % {stride}
+        """,
+        """
+        INSERT INTO movie_rating_stats (movie_id, shard, count, sum, histogram)
+        SELECT movie_id, 0, count(*), sum(rating), array_fill(0, ARRAY[10])
+        FROM rating_db GROUP BY movie_id
+        """,
+    ]
+
+
+async def seed(dataset: Dataset) -> dict[str, list[Any]]:
+    """
+    Recreate the tables of the test DB and fill them, returns the seeded ids
+    and the (user, movie) pairs without a rating
+    """
+    assert settings.db.name.startswith("test"), "not a test DB"
+
+    engine = create_async_engine(settings.DB_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(TopLevelModel.metadata.drop_all)
+        await conn.run_sync(TopLevelModel.metadata.create_all)
+        for statement in _seed_statements(dataset):
+            await conn.execute(text(statement))
+        user_ids = (await conn.execute(text("SELECT id FROM user_db"))).scalars().all()
+        movie_ids = (await conn.execute(text("SELECT id FROM movie_db"))).scalars().all()
+        # the movies one past each user's offset are never rated
+        stride = _stride(dataset)
+        unrated = (
+            await conn.execute(
+                text(
+                    f"SELECT u.id, m.id FROM {NUMBERED} "
+                    f"ON m.n % {stride} = (u.n + 1) % {stride} ORDER BY m.n, u.n"
+                )
+            )
+        ).all()
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in TopLevelModel.metadata.sorted_tables:
+            await conn.execute(text(f"VACUUM ANALYZE {table.name}"))
+    await engine.dispose()
+
+    return {
+        "user_ids": [str(id) for id in user_ids],
+        "movie_ids": [str(id) for id in movie_ids],
+        "unrated": [(str(user_id), str(movie_id)) for user_id, movie_id in unrated],
+    }
+
+
+async def sample(size: int) -> dict[str, list[Any]]:
+    """
+    Ids and unrated (user, movie) pairs picked from the data already in the DB,
+    e.g. loaded by tests.benchmarks.dataset
+    """
+    engine = create_async_engine(settings.DB_URL)
+    async with engine.connect() as conn:
+        user_ids = (
+            (
+                await conn.execute(
+                    text("SELECT id FROM user_db ORDER BY random() LIMIT :size"),
+                    {"size": size},
+                )
+            )
+            .scalars()
+            .all()
+        )
+        movie_ids = (
+            (
+                await conn.execute(
+                    text("SELECT id FROM movie_db ORDER BY random() LIMIT :size"),
+                    {"size": size},
+                )
+            )
+            .scalars()
+            .all()
+        )
+        pairs = list(zip(user_ids, movie_ids[1:] + movie_ids[:1]))
+        pairs += list(zip(user_ids, movie_ids[2:] + movie_ids[:2]))
+        rated = set(
+            (
+                await conn.execute(
+                    text(
+                        "SELECT user_id, movie_id FROM rating_db "
+                        "WHERE (user_id, movie_id) IN "
+                        "(SELECT * FROM unnest(CAST(:users AS uuid[]), CAST(:movies AS uuid[])))"
+                    ),
+                    {"users": [u for u, _ in pairs], "movies": [m for _, m in pairs]},
+                )
+            ).all()
+        )
+    await engine.dispose()
+
+    return {
+        "user_ids": [str(id) for id in user_ids],
+        "movie_ids": [str(id) for id in movie_ids],
+        "unrated": [(str(u), str(m)) for u, m in pairs if (u, m) not in rated],
+    }
+
+
+def scenarios(ids: dict[str, list[Any]]) -> dict[str, Callable[[], Iterator[Request]]]:
+    """Endless request generators, by scenario name"""
+
+    def post_ratings() -> Iterator[Request]:
+        # each pair is posted once, so every request creates a rating
+        for user_id, movie_id in ids["unrated"]:
+            body = {"user_id": user_id, "movie_id": movie_id, "rating": 7.0}
+            yield "POST", "/api/v1/ratings", body
+        raise RuntimeError("out of unrated pairs, seed more movies")
+
+    def get_movies() -> Iterator[Request]:
+        for offset in itertools.cycle(range(0, 1000, 20)):
+            yield "GET", f"/api/v1/movies?offset={offset}&include_total=estimate", None
+
+    def get_ratings() -> Iterator[Request]:
+        for movie_id in itertools.cycle(ids["movie_ids"]):
+            yield "GET", f"/api/v1/ratings/{movie_id}", None
+
+    def get_user_profile() -> Iterator[Request]:
+        for user_id in itertools.cycle(ids["user_ids"]):
+            yield "GET", f"/api/v1/user-profile/{user_id}", None
+
+    return {
+        "POST /v1/ratings": post_ratings,
+        "GET /v1/movies": get_movies,
+        "GET /v1/ratings/{movie_id}": get_ratings,
+        "GET /v1/user-profile/{user_id}": get_user_profile,
+    }
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return math.nan
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    requests: Iterator[Request],
+    total: int,
+    concurrency: int,
+) -> Result:
+    """
+    Send total requests from concurrency clients, each waiting for its response
+    before sending the next request
+    """
+    latencies: list[float] = []
+    statements: list[int] = []
+    errors = 0
+    # shared by the workers, so every request is sent exactly once
+    budget = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in budget:
+            method, url, body = next(requests)
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            timing = SERVER_TIMING_STATEMENTS.search(
+                response.headers.get("Server-Timing", "")
+            )
+            if timing:
+                statements.append(int(timing.group(1)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return Result(
+        requests=total,
+        errors=errors,
+        rps=round(total / elapsed, 1),
+        p50_ms=round(percentile(latencies, 50) * 1000, 2),
+        p95_ms=round(percentile(latencies, 95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 99) * 1000, 2),
+        db_statements=(
+            round(sum(statements) / len(statements), 2) if statements else None
+        ),
+    )
+
+
+@asynccontextmanager
+async def _client(
+    base_url: str | None, concurrency: int
+) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=concurrency)
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            yield client
+    else:
+        app = create_app()
+        async with LifespanManager(app) as manager:
+            transport = httpx.ASGITransport(app=manager.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", limits=limits
+            ) as client:
+                yield client
+
+
+def compare(
+    current: dict[str, Result], baseline: dict[str, Result], tolerance: float
+) -> list[str]:
+    """Regressions of current against baseline, one line each"""
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result.rps < before.rps * (1 - tolerance):
+            regressions.append(f"{name}: {before.rps} -> {result.rps} rps")
+        if result.p95_ms > before.p95_ms * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before.p95_ms} -> {result.p95_ms} ms")
+    return regressions
+
+
+def load_results(path: str) -> dict[str, Result]:
+    with open(path) as f:
+        return {name: Result(**r) for name, r in json.load(f)["scenarios"].items()}
+
+
+async def main(args: argparse.Namespace) -> int:
+    dataset = Dataset(args.users, args.movies, args.ratings_per_user)
+    ids = await (sample(args.users) if args.existing else seed(dataset))
+    generators = scenarios(ids)
+    selected = args.scenario or list(generators)
+
+    results: dict[str, Result] = {}
+    async with _client(args.base_url, args.concurrency) as client:
+        for name in selected:
+            requests = generators[name]()
+            # warm the pool, caches and statement cache before measuring
+            await run_scenario(client, requests, args.warmup, args.concurrency)
+            results[name] = await run_scenario(
+                client, requests, args.requests, args.concurrency
+            )
+
+    print(
+        f"{'scenario':<32} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        f" {'db stmts':>9} errors"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<32} {r.rps:>9} {r.p50_ms:>9} {r.p95_ms:>9} {r.p99_ms:>9}"
+            f" {r.db_statements!s:>9} {r.errors}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "target": args.base_url or "in-process",
+                        "concurrency": args.concurrency,
+                        "requests": args.requests,
+                        "dataset": None if args.existing else asdict(dataset),
+                        "python": platform.python_version(),
+                        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    },
+                    "scenarios": {name: asdict(r) for name, r in results.items()},
+                },
+                f,
+                indent=2,
+            )
+
+    failed = any(r.errors for r in results.values())
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="running server, default in-process")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="per scenario")
+    parser.add_argument("--warmup", type=int, default=200, help="per scenario")
+    parser.add_argument("--scenario", action="append", help="repeatable, default all")
+    parser.add_argument(
+        "--existing",
+        action="store_true",
+        help="use the data in the DB instead of seeding, --users ids are sampled",
+    )
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--movies", type=int, default=2000)
+    parser.add_argument("--ratings-per-user", type=int, default=20)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,109 @@
+"""
+Per row cost of serving a list page, ORM objects vs projected rows
+
+Seeds the test DB, then times the legacy path (ORM objects, to_dict, per item
+model_validate, response_model validation, jsonable_encoder, json.dumps) against
+the projected path used by the list endpoints (plain rows, one TypeAdapter call,
+pydantic-core to_json).
+
+    ENV_FILES=../.env.test python -m tests.benchmarks.serialization
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.schemas.endpoints as sc
+from app.api.responses import PydanticJSONResponse
+from app.database.base_model import TopLevelModel
+from app.database.models import MovieDB
+from app.domain.repositories.movie_repository import MovieRepository
+from app.settings import settings
+
+RESPONSE_FIELD = create_model_field(name="Response", type_=sc.MovieListOut)
+
+
+async def legacy_page(session: AsyncSession, rows: int) -> bytes:
+    result = await session.execute(
+        select(MovieDB).order_by(MovieDB.created_at, MovieDB.id).limit(rows)
+    )
+    items = [sc.MovieOut.model_validate(r.to_dict()) for r in result.scalars().all()]
+    content = await serialize_response(
+        field=RESPONSE_FIELD, response_content=sc.MovieListOut(items=items)
+    )
+    return JSONResponse(content).body
+
+
+async def projected_page(session: AsyncSession, rows: int) -> bytes:
+    result = await session.execute(
+        select(*MovieRepository._page_columns)
+        .order_by(MovieDB.created_at, MovieDB.id)
+        .limit(rows)
+    )
+    items = MovieRepository._list_adapter(sc.MovieOut).validate_python(
+        result.all(), from_attributes=True
+    )
+    return PydanticJSONResponse(sc.MovieListOut(items=items)).body
+
+
+async def measure(
+    session_factory: async_sessionmaker[AsyncSession],
+    page: Callable[[AsyncSession, int], Awaitable[bytes]],
+    rows: int,
+    iterations: int,
+) -> float:
+    """Microseconds per row, averaged over the iterations"""
+    async with session_factory() as session:
+        for _ in range(max(iterations // 10, 1)):
+            await page(session, rows)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await page(session, rows)
+            # the legacy path would otherwise be served from the identity map
+            session.expunge_all()
+        elapsed = time.perf_counter() - started
+    return elapsed / (iterations * rows) * 1_000_000
+
+
+async def main(rows: int, iterations: int) -> None:
+    assert settings.db.name.startswith("test"), "not a test DB"
+
+    engine = create_async_engine(settings.DB_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(TopLevelModel.metadata.drop_all)
+        await conn.run_sync(TopLevelModel.metadata.create_all)
+        await conn.execute(
+            text(
+                "INSERT INTO movie_db (id, title, description) "
+                "SELECT gen_random_uuid(), 'movie ' || i, 'description ' || i "
+                "FROM generate_series(1, :rows) AS i"
+            ),
+            {"rows": rows},
+        )
+
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    try:
+        legacy = await measure(session_factory, legacy_page, rows, iterations)
+        projected = await measure(session_factory, projected_page, rows, iterations)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(TopLevelModel.metadata.drop_all)
+        await engine.dispose()
+
+    print(f"legacy     {legacy:8.2f} us/row")
+    print(f"projected  {projected:8.2f} us/row  ({legacy / projected:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.iterations))
@@ -7,4 +7,6 @@ from app.main import create_app
 @pytest_asyncio.fixture(autouse=False)
 async def test_client():
     app = create_app()
-    return TestClient(app)
+    # entering the client runs the app lifespan, which owns the DB engine
+    with TestClient(app) as client:
+        yield client
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.database.base_model import TopLevelModel
+from app.domain.repositories.cache import get_entity_caches
 from app.settings import settings
 
 
@@ -27,6 +28,9 @@ async def db_engine() -> AsyncGenerator[AsyncEngine, None]:
     async with engine.begin() as conn:
         await conn.run_sync(TopLevelModel.metadata.drop_all)
     await engine.dispose()
+    # the tables are gone, so must be anything cached from them
+    for cache in get_entity_caches().values():
+        await cache.clear()
 
 
 @pytest_asyncio.fixture()
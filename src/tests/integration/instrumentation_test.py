@@ -0,0 +1,143 @@
+import re
+import time
+
+import mock
+from sqlalchemy import event
+from starlette import status
+
+from app.database.slow_query_log import slow_query_log
+from app.domain.repositories.movie_repository import MovieRepository
+from app.settings import SlowQuerySettings
+
+
+async def test_server_timing_reports_db_statements(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+
+    # Act
+    response = test_client.get(f"api/v1/movies/{movie.id}")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    timing = response.headers["Server-Timing"]
+    assert re.search(r'db;dur=[\d.]+;desc="1 statements"', timing)
+    assert re.search(r"db-slowest;dur=[\d.]+", timing)
+    assert re.search(r"total;dur=[\d.]+", timing)
+
+
+async def test_request_line_carries_db_stats(test_client, log):
+    # Act
+    test_client.get("api/v1/movies?include_total=exact")
+
+    # Assert
+    [line] = [e for e in log.events if e["event"] == "request_finished"]
+    assert line["status_code"] == status.HTTP_200_OK
+    assert line["path"] == "/api/v1/movies"
+    assert line["query_string"] == "include_total=exact"
+    assert line["db_statements"] == 1
+    assert line["db_duration_ms"] > 0
+    assert line["db_slowest_statement"].startswith("SELECT")
+
+
+async def test_write_request_counts_transaction_control(test_client, log):
+    # Act
+    response = test_client.post(
+        "api/v1/movies", json={"title": "test", "description": "test"}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_201_CREATED
+
+    [line] = [e for e in log.events if e["event"] == "request_finished"]
+    # BEGIN, INSERT and COMMIT
+    assert line["db_statements"] == 3
+
+
+async def test_read_request_never_commits(test_client):
+    # Arrange
+    transactions = []
+    for name in ("begin", "commit", "rollback"):
+        event.listen(
+            test_client.app.state.db_engine.sync_engine,
+            name,
+            lambda conn, *args, name=name: transactions.append(
+                (name, conn.get_execution_options().get("isolation_level"))
+            ),
+        )
+
+    # Act
+    response = test_client.get("api/v1/movies")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert transactions == [("begin", "AUTOCOMMIT"), ("rollback", "AUTOCOMMIT")]
+
+
+async def test_metrics_exposes_request_histograms(test_client):
+    # Arrange
+    test_client.get("api/v1/movies")
+
+    # Act
+    response = test_client.get("/metrics")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    body = response.text
+    assert "# TYPE http_request_db_statements histogram" in body
+    assert re.search(
+        r'http_request_db_statements_bucket\{method="GET",route="/api/v1/movies",'
+        r'pid="\d+",le="1.0"\} [1-9]',
+        body,
+    )
+    assert re.search(
+        r'http_request_duration_seconds_count\{method="GET",route="/api/v1/movies",'
+        r'status="200",pid="\d+"\} [1-9]',
+        body,
+    )
+
+
+async def test_slow_queries_are_logged_and_explained(test_client, log):
+    # Arrange
+    config = SlowQuerySettings(threshold_ms=0, explain_sample_rate=1)
+    slow_query_log.plans.clear()
+
+    # Act
+    with (
+        mock.patch.object(slow_query_log, "config", config),
+        mock.patch("app.api.endpoints.meta.settings.DEBUG", True),
+    ):
+        test_client.get("api/v1/movies")
+        # plans are captured in the background
+        for _ in range(50):
+            if slow_query_log.plans:
+                break
+            time.sleep(0.1)
+        response = test_client.get("api/meta/slow-queries")
+
+    # Assert
+    [line] = [e for e in log.events if e["event"] == "slow_query"]
+    assert line["statement"].startswith("SELECT movie_db.id, movie_db.title")
+    assert line["statement"].endswith("LIMIT $1::INTEGER OFFSET $2::INTEGER")
+    assert line["parameters"] == "(int, int)"
+    assert line["repository"] == "MovieRepositoryBase[MovieDB].find_page"
+    assert line["endpoint"] == "app.api.endpoints.v1.movie.get_movies"
+
+    assert response.status_code == status.HTTP_200_OK
+    [plan] = response.json()
+    assert plan["statement"] == line["statement"]
+    assert plan["endpoint"] == line["endpoint"]
+    assert "Actual Total Time" in plan["plan"]["Plan"]
+    assert "Shared Hit Blocks" in plan["plan"]["Plan"]
+
+
+def test_slow_queries_endpoint_is_debug_only(test_client):
+    # Act
+    response = test_client.get("api/meta/slow-queries")
+
+    # Assert
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,113 @@
+from starlette import status
+
+from app.domain.repositories.movie_leaderboard_repository import (
+    REFRESH_LOCK_KEY,
+    MovieLeaderboardRepository,
+)
+
+
+def seed(test_client) -> dict[str, str]:
+    movies = {
+        title: test_client.post(
+            "api/v1/movies", json={"title": title, "description": title}
+        ).json()["id"]
+        for title in ("one perfect", "many good", "many bad")
+    }
+    ratings = {
+        "one perfect": [10.0],
+        "many good": [9.0, 8.0, 9.0, 8.0],
+        "many bad": [2.0, 3.0, 2.0, 3.0],
+    }
+    for i in range(4):
+        user_id = test_client.post(
+            "api/v1/users", json={"name": f"user {i}", "email": f"user{i}@test.test"}
+        ).json()["id"]
+        for title, values in ratings.items():
+            if i < len(values):
+                response = test_client.post(
+                    "api/v1/ratings",
+                    json={
+                        "user_id": user_id,
+                        "movie_id": movies[title],
+                        "rating": values[i],
+                    },
+                )
+                assert response.status_code == status.HTTP_201_CREATED
+    return movies
+
+
+async def test_top_movies_before_refresh(test_client):
+    # Arrange
+    seed(test_client)
+
+    # Act
+    response = test_client.get("api/v1/movies/top")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"items": [], "refreshed_at": None}
+
+
+async def test_top_movies_ranked_by_bayesian_average(test_client, db_session):
+    # Arrange
+    movies = seed(test_client)
+    assert await MovieLeaderboardRepository.refresh(db_session, max_age=60)
+
+    # Act
+    response = test_client.get("api/v1/movies/top")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["refreshed_at"] is not None
+    # a single 10 is pulled far down towards the overall mean
+    assert [item["title"] for item in body["items"]] == [
+        "many good",
+        "one perfect",
+        "many bad",
+    ]
+    first = body["items"][0]
+    assert first["movie_id"] == movies["many good"]
+    assert first["rating_count"] == 4
+    assert first["mean"] == 8.5
+    assert 5.5 < first["score"] < 8.5
+
+
+async def test_top_movies_min_ratings_and_limit(test_client, db_session):
+    # Arrange
+    seed(test_client)
+    await MovieLeaderboardRepository.refresh(db_session, max_age=60)
+
+    # Act
+    response = test_client.get("api/v1/movies/top?min_ratings=2&limit=1")
+    none_response = test_client.get("api/v1/movies/top?min_ratings=5")
+
+    # Assert
+    assert [item["title"] for item in response.json()["items"]] == ["many good"]
+    # still tells how fresh the ranking is
+    assert none_response.json()["items"] == []
+    assert none_response.json()["refreshed_at"] is not None
+
+
+async def test_refresh_skipped_when_recent(test_client, db_session):
+    # Arrange
+    seed(test_client)
+    await MovieLeaderboardRepository.refresh(db_session, max_age=60)
+
+    # Act
+    refreshed = await MovieLeaderboardRepository.refresh(db_session, max_age=60)
+
+    # Assert
+    assert not refreshed
+
+
+async def test_refresh_skipped_while_another_refreshes(db_engine, db_session):
+    # Arrange
+    async with db_engine.connect() as other:
+        await other.exec_driver_sql(f"SELECT pg_advisory_xact_lock({REFRESH_LOCK_KEY})")
+
+        # Act
+        refreshed = await MovieLeaderboardRepository.refresh(db_session, max_age=0)
+
+    # Assert
+    assert not refreshed
@@ -0,0 +1,156 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from starlette import status
+
+from app.domain.repositories.movie_repository import MovieRepository
+from app.settings import settings
+
+MOVIES = {
+    "The Godfather": "The aging patriarch of a crime dynasty hands over to his son",
+    "The Godfather Part II": "The early life of the patriarch, and his son's rise",
+    "Goodfellas": "The story of a mob associate and his partners in crime",
+    "Toy Story": "A cowboy doll is threatened by a new spaceman toy",
+}
+
+
+@pytest_asyncio.fixture()
+async def pg_trgm(db_engine, monkeypatch) -> bool:
+    """Whether titles are searched by trigrams too, pg_trgm is a contrib module"""
+    async with db_engine.connect() as conn:
+        installed = await conn.scalar(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        )
+    if not installed:
+        monkeypatch.setattr(settings.search, "fuzzy_titles", False)
+    return installed is not None
+
+
+@pytest_asyncio.fixture()
+async def movies(db_session, pg_trgm) -> dict[str, str]:
+    return {
+        title: str(
+            (
+                await MovieRepository.create(
+                    db_session, commit=True, title=title, description=description
+                )
+            ).id
+        )
+        for title, description in MOVIES.items()
+    }
+
+
+async def test_search_movies_full_text(test_client, movies):
+    # Act
+    response = test_client.get("api/v1/movies/search", params={"q": "crime son"})
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    titles = [m["title"] for m in response.json()["items"]]
+    assert titles == ["The Godfather"]
+
+
+async def test_search_movies_ranks_title_over_description(test_client, movies):
+    # Act
+    response = test_client.get("api/v1/movies/search", params={"q": "story"})
+
+    # Assert
+    titles = [m["title"] for m in response.json()["items"]]
+    # the title of one, the description of the other
+    assert titles[:2] == ["Toy Story", "Goodfellas"]
+
+
+async def test_search_movies_web_search_syntax(test_client, movies):
+    # Act
+    response = test_client.get("api/v1/movies/search", params={"q": "patriarch -early"})
+
+    # Assert
+    assert [m["title"] for m in response.json()["items"]] == ["The Godfather"]
+
+
+async def test_search_movies_with_cursor(test_client, movies):
+    # Act
+    first_page = test_client.get(
+        "api/v1/movies/search", params={"q": "patriarch", "limit": 1}
+    ).json()
+    second_page = test_client.get(
+        "api/v1/movies/search",
+        params={"q": "patriarch", "limit": 1, "cursor": first_page["next_cursor"]},
+    ).json()
+
+    # Assert
+    assert first_page["next_cursor"] is not None
+    assert second_page["next_cursor"] is None
+    titles = {m["title"] for m in first_page["items"] + second_page["items"]}
+    assert titles == {"The Godfather", "The Godfather Part II"}
+
+
+async def test_search_movies_too_broad(test_client, movies, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(settings.search, "max_ranked", 1)
+
+    # Act
+    response = test_client.get("api/v1/movies/search", params={"q": "patriarch"})
+
+    # Assert
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["error"]["code"] == "SEARCH_TOO_BROAD"
+
+
+async def test_search_movies_ranks_every_match_up_to_max_ranked(
+    test_client, movies, monkeypatch
+):
+    # Arrange
+    monkeypatch.setattr(settings.search, "max_ranked", 2)
+
+    # Act
+    first = test_client.get(
+        "api/v1/movies/search", params={"q": "patriarch", "limit": 1}
+    ).json()
+    second = test_client.get(
+        "api/v1/movies/search",
+        params={"q": "patriarch", "limit": 1, "cursor": first["next_cursor"]},
+    ).json()
+
+    # Assert
+    assert sorted(item["title"] for item in first["items"] + second["items"]) == [
+        "The Godfather",
+        "The Godfather Part II",
+    ]
+    assert second["next_cursor"] is None
+
+
+async def test_search_movies_invalid_cursor(test_client, movies):
+    # Arrange
+    created_at_cursor = test_client.get("api/v1/movies", params={"limit": 1}).json()[
+        "next_cursor"
+    ]
+
+    # Act
+    response = test_client.get(
+        "api/v1/movies/search", params={"q": "crime", "cursor": created_at_cursor}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["error"]["code"] == "INVALID_CURSOR"
+
+
+async def test_search_movies_fuzzy_title(test_client, movies, pg_trgm):
+    if not pg_trgm:
+        pytest.skip("pg_trgm is not available")
+
+    # Act
+    response = test_client.get("api/v1/movies/search", params={"q": "godfater"})
+
+    # Assert
+    titles = [m["title"] for m in response.json()["items"]]
+    assert set(titles[:2]) == {"The Godfather", "The Godfather Part II"}
+
+
+async def test_search_movies_requires_query(test_client):
+    # Act
+    response = test_client.get("api/v1/movies/search")
+
+    # Assert
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
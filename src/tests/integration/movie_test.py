@@ -1,8 +1,20 @@
 import uuid
 
+import mock
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from starlette import status
 
+from app.domain.repositories.base_repository import TotalMode
+from app.domain.repositories.cache import wait_for_invalidations
+from app.domain.repositories.movie_rating_stats_repository import (
+    MovieRatingStatsRepository,
+    RatingStatsDelta,
+)
 from app.domain.repositories.movie_repository import MovieRepository
+from app.domain.repositories.user_repository import UserRepository
 
 
 async def test_create_movie(test_client, db_session):
@@ -84,3 +96,393 @@ async def test_get_movie_not_found(test_client, db_session):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
     assert response_data["detail"] == "Movie not found"
+
+
+async def test_get_movie_rating_stats(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    users = [
+        await UserRepository.create(
+            db_session, commit=True, name=f"Test_{i}", email=f"test_{i}@test.test"
+        )
+        for i in range(3)
+    ]
+    for user, rating in zip(users, [2.0, 2.5, 10.0]):
+        response = test_client.post(
+            "api/v1/ratings",
+            json={"movie_id": str(movie.id), "user_id": str(user.id), "rating": rating},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    # Act
+    response = test_client.get(f"api/v1/movies/{movie.id}/stats")
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response_data["movie_id"] == str(movie.id)
+    assert response_data["count"] == 3
+    assert response_data["sum"] == 14.5
+    assert response_data["mean"] == 14.5 / 3
+    assert response_data["histogram"] == [0, 2, 0, 0, 0, 0, 0, 0, 0, 1]
+
+
+async def test_get_movie_rating_stats_sums_shards(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    deltas = []
+    for rating in [1.0, 4.0]:
+        delta = RatingStatsDelta()
+        delta.add(rating)
+        deltas.append(delta)
+    with mock.patch("random.randrange", side_effect=[0, 1]):
+        for delta in deltas:
+            await MovieRatingStatsRepository.apply_deltas(db_session, {movie.id: delta})
+    await db_session.commit()
+
+    # Act
+    response = test_client.get(f"api/v1/movies/{movie.id}/stats")
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response_data["count"] == 2
+    assert response_data["mean"] == 2.5
+    assert response_data["histogram"] == [1, 0, 0, 1, 0, 0, 0, 0, 0, 0]
+
+
+async def test_get_movie_rating_stats_without_ratings(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+
+    # Act
+    response = test_client.get(f"api/v1/movies/{movie.id}/stats")
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response_data["count"] == 0
+    assert response_data["mean"] is None
+    assert response_data["histogram"] == [0] * 10
+
+
+async def test_get_movie_rating_stats_not_found(test_client, db_session):
+    # Act
+    response = test_client.get(f"api/v1/movies/{uuid.uuid4()}/stats")
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    assert response_data["detail"] == "Movie not found"
+
+
+async def test_get_movies_with_cursor(test_client, db_session):
+    # Arrange
+    movies = [
+        await MovieRepository.create(
+            db_session, commit=True, title=f"test_{i}", description="test"
+        )
+        for i in range(3)
+    ]
+
+    # Act
+    first_page = test_client.get("api/v1/movies", params={"limit": 2}).json()
+    second_page = test_client.get(
+        "api/v1/movies", params={"limit": 2, "cursor": first_page["next_cursor"]}
+    ).json()
+
+    # Assert
+    assert [m["id"] for m in first_page["items"]] == [str(m.id) for m in movies[:2]]
+    assert first_page["total"] == 3
+    assert first_page["next_cursor"] is not None
+
+    assert [m["id"] for m in second_page["items"]] == [str(movies[2].id)]
+    assert second_page["next_cursor"] is None
+
+
+async def test_get_movies_with_offset_returns_cursor(test_client, db_session):
+    # Arrange
+    movies = [
+        await MovieRepository.create(
+            db_session, commit=True, title=f"test_{i}", description="test"
+        )
+        for i in range(3)
+    ]
+
+    # Act
+    page = test_client.get("api/v1/movies", params={"limit": 1, "offset": 1}).json()
+    next_page = test_client.get(
+        "api/v1/movies", params={"limit": 1, "cursor": page["next_cursor"]}
+    ).json()
+
+    # Assert
+    assert [m["id"] for m in page["items"]] == [str(movies[1].id)]
+    assert [m["id"] for m in next_page["items"]] == [str(movies[2].id)]
+
+
+async def test_get_movies_invalid_cursor(test_client, db_session):
+    # Act
+    response = test_client.get("api/v1/movies", params={"cursor": "not-a-cursor"})
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    assert response_data["error"]["code"] == "INVALID_CURSOR"
+
+
+async def test_get_movies_total_in_one_statement(db_session, db_engine):
+    # Arrange
+    for i in range(3):
+        await MovieRepository.create(
+            db_session, commit=True, title=f"test_{i}", description="test"
+        )
+    statements = []
+    event.listen(
+        db_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    # Act
+    page = await MovieRepository.find_page(
+        db_session, limit=2, offset=1, total=TotalMode.EXACT
+    )
+
+    # Assert
+    assert page.total == 3
+    assert len(page.items) == 2
+    assert len(statements) == 1
+
+
+async def test_get_movies_without_total(test_client, db_session):
+    # Arrange
+    await MovieRepository.create(db_session, commit=True, title="test", description="")
+
+    # Act
+    response = test_client.get("api/v1/movies", params={"include_total": "false"})
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response_data["total"] is None
+    assert len(response_data["items"]) == 1
+
+
+async def test_get_movies_estimated_total(test_client, db_session):
+    # Arrange
+    for i in range(5):
+        await MovieRepository.create(
+            db_session, commit=True, title=f"test_{i}", description="test"
+        )
+    await db_session.execute(text("ANALYZE movie_db"))
+
+    # Act
+    response = test_client.get(
+        "api/v1/movies", params={"include_total": "estimate", "limit": 2}
+    )
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response_data["total"] == 5
+
+
+async def test_create_or_conflict_returns_none_on_conflict(db_session):
+    # Arrange
+    movie = await MovieRepository.create_or_conflict(
+        db_session, conflict_target=["title"], title="test", description="test"
+    )
+
+    # Act
+    duplicate = await MovieRepository.create_or_conflict(
+        db_session, conflict_target=["title"], title="test", description="other"
+    )
+    db_movies = await MovieRepository.find(db_session)
+
+    # Assert
+    assert movie is not None
+    assert duplicate is None
+
+    assert len(db_movies) == 1
+    assert db_movies[0].id == movie.id
+    assert db_movies[0].description == "test"
+
+
+async def test_get_movie_is_served_from_cache(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    statements = []
+    event.listen(
+        test_client.app.state.db_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    # Act
+    first = test_client.get(f"api/v1/movies/{movie.id}").json()
+    second = test_client.get(f"api/v1/movies/{movie.id}").json()
+
+    # Assert
+    assert (
+        first == second == {"id": str(movie.id), "title": "test", "description": "test"}
+    )
+    assert len(statements) == 1
+
+
+async def test_update_movie_invalidates_cache(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    assert (await MovieRepository.get_by_id(db_session, movie.id)).title == "test"
+
+    # Act
+    await MovieRepository.update(db_session, movie.id, commit=True, title="updated")
+    response = test_client.get(f"api/v1/movies/{movie.id}")
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response_data["title"] == "updated"
+
+
+async def test_update_movie_invalidates_cache_on_commit(db_engine, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    async with async_sessionmaker(bind=db_engine)() as other_session:
+        await MovieRepository.update(other_session, movie.id, title="updated")
+        # reads the row as last committed, and caches it
+        assert (await MovieRepository.get_by_id(db_session, movie.id)).title == "test"
+
+        # Act
+        await other_session.commit()
+        await wait_for_invalidations(other_session)
+
+    # Assert
+    assert (await MovieRepository.get_by_id(db_session, movie.id)).title == "updated"
+
+
+class MovieTitle(BaseModel):
+    id: uuid.UUID
+    title: str
+
+
+async def test_find_selects_only_schema_columns(db_session, db_engine):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    statements = []
+    event.listen(
+        db_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    # Act
+    movies = await MovieRepository.find(db_session, schema=MovieTitle)
+    one = await MovieRepository.find_one(
+        db_session, filters=[("title", "test")], schema=MovieTitle
+    )
+    by_id = await MovieRepository.get_by_id(db_session, movie.id, schema=MovieTitle)
+
+    # Assert
+    assert movies == [one] == [by_id] == [MovieTitle(id=movie.id, title="test")]
+    assert statements
+    assert not any("updated_at" in statement for statement in statements)
+    assert not any("description" in statement for statement in statements[:2])
+
+
+async def test_find_rejects_schema_not_backed_by_columns(db_session):
+    # Arrange
+    class MovieWithRating(MovieTitle):
+        rating: float
+
+    # Act / Assert
+    with pytest.raises(ValueError):
+        await MovieRepository.find(db_session, schema=MovieWithRating)
+
+
+async def test_batch_get_movies_preserves_order_and_reports_missing(
+    test_client, db_session
+):
+    # Arrange
+    movies = [
+        await MovieRepository.create(
+            db_session, commit=True, title=f"test_{i}", description="test"
+        )
+        for i in range(3)
+    ]
+    missing_id = str(uuid.uuid4())
+    ids = [str(movies[2].id), missing_id, str(movies[0].id)]
+
+    # Act
+    post_response = test_client.post("api/v1/movies:batchGet", json={"ids": ids})
+    get_response = test_client.get("api/v1/movies", params={"ids": ids})
+
+    # Assert
+    assert post_response.status_code == status.HTTP_200_OK
+    assert post_response.json() == get_response.json()
+
+    response_data = post_response.json()
+    assert [m["id"] for m in response_data["items"]] == [ids[0], ids[2]]
+    assert response_data["missing_ids"] == [missing_id]
+
+
+async def test_batch_get_movies_in_one_statement(test_client, db_session):
+    # Arrange
+    movies = [
+        await MovieRepository.create(
+            db_session, commit=True, title=f"test_{i}", description="test"
+        )
+        for i in range(3)
+    ]
+    # cached, not queried again
+    test_client.get(f"api/v1/movies/{movies[0].id}")
+    statements = []
+    event.listen(
+        test_client.app.state.db_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, *args: statements.append(parameters),
+    )
+
+    # Act
+    response = test_client.post(
+        "api/v1/movies:batchGet", json={"ids": [str(m.id) for m in movies]}
+    )
+
+    # Assert
+    assert len(response.json()["items"]) == 3
+    [parameters] = statements
+    assert sorted(parameters[0]) == sorted([movies[1].id, movies[2].id])
+
+
+async def test_batch_get_movies_limits_ids(test_client):
+    # Arrange
+    ids = [str(uuid.uuid4()) for _ in range(101)]
+
+    # Act
+    post_response = test_client.post("api/v1/movies:batchGet", json={"ids": ids})
+    get_response = test_client.get("api/v1/movies", params={"ids": ids})
+
+    # Assert
+    assert post_response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert get_response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
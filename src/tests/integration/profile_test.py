@@ -0,0 +1,102 @@
+import re
+import uuid
+
+from starlette import status
+
+
+def seed(test_client) -> tuple[list[str], list[str]]:
+    users = [
+        test_client.post(
+            "api/v1/users", json={"name": f"user {i}", "email": f"user{i}@test.test"}
+        ).json()["id"]
+        for i in range(2)
+    ]
+    movies = [
+        test_client.post("api/v1/movies", json={"title": f"movie {i}"}).json()["id"]
+        for i in range(2)
+    ]
+    for user_id, movie_id, rating in [
+        (users[0], movies[0], 8.0),
+        (users[0], movies[1], 4.0),
+        (users[1], movies[0], 6.0),
+    ]:
+        response = test_client.post(
+            "api/v1/ratings",
+            json={"user_id": user_id, "movie_id": movie_id, "rating": rating},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+    return users, movies
+
+
+async def test_get_user_profile(test_client):
+    # Arrange
+    users, movies = seed(test_client)
+
+    # Act
+    response = test_client.get(f"api/v1/user-profile/{users[0]}")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    response_data = response.json()
+    assert response_data["user"]["id"] == users[0]
+    assert response_data["rating_stats"] == {"count": 2, "mean": 6.0}
+    assert response_data["ratings"]["total"] == 2
+    first, second = response_data["ratings"]["items"]
+    assert first["movie_id"] == movies[0]
+    assert first["rating"] == 8.0
+    assert first["movie_title"] == "movie 0"
+    assert first["movie_rating_count"] == 2
+    assert first["movie_mean_rating"] == 7.0
+    assert second["movie_title"] == "movie 1"
+    assert second["movie_rating_count"] == 1
+
+
+async def test_get_user_profile_in_two_statements(test_client):
+    # Arrange
+    users, _ = seed(test_client)
+
+    # Act
+    response = test_client.get(f"api/v1/user-profile/{users[0]}", params={"limit": 1})
+
+    # Assert
+    assert response.json()["ratings"]["next_cursor"] is not None
+    assert re.search(
+        r'db;dur=[\d.]+;desc="2 statements"', response.headers["Server-Timing"]
+    )
+
+
+async def test_get_user_profile_without_ratings(test_client):
+    # Arrange
+    user_id = test_client.post(
+        "api/v1/users", json={"name": "new", "email": "new@test.test"}
+    ).json()["id"]
+
+    # Act
+    response = test_client.get(f"api/v1/user-profile/{user_id}")
+
+    # Assert
+    response_data = response.json()
+    assert response_data["rating_stats"] == {"count": 0, "mean": None}
+    assert response_data["ratings"] == {"items": [], "total": 0, "next_cursor": None}
+
+
+async def test_get_user_profile_not_found(test_client):
+    # Act
+    response = test_client.get(f"api/v1/user-profile/{uuid.uuid4()}")
+
+    # Assert
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_get_user_profile_invalid_cursor(test_client):
+    # Arrange
+    users, _ = seed(test_client)
+
+    # Act
+    response = test_client.get(
+        f"api/v1/user-profile/{users[0]}", params={"cursor": "not-a-cursor"}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,165 @@
+from typing import Any, Iterator
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.base_model import TopLevelModel
+from app.database.explain import parse_plan
+
+# Tables smaller than this may be scanned sequentially, the planner rightly
+# prefers that for a handful of pages
+SEQ_SCAN_ROW_THRESHOLD = 1000
+
+USERS = 2000
+MOVIES = 2000
+RATINGS_PER_USER = 20
+
+# Queries that have to read a whole table by design
+ALLOWED_SEQ_SCANS = {
+    # GET /v1/movies?include_total=exact counts every movie,
+    # clients that page through the catalog should use include_total=estimate
+    ("GET", "/api/v1/movies?include_total=exact", "movie_db"),
+}
+
+SEED = [
+    f"""
+    INSERT INTO user_db (id, name, email)
+    SELECT gen_random_uuid(), 'user ' || i, 'user' || i || '@test.test'
+    FROM generate_series(1, {USERS}) AS i
+    """,
+    f"""
+    INSERT INTO movie_db (id, title, description)
+    SELECT gen_random_uuid(), 'movie ' || i, 'description ' || i
+    FROM generate_series(1, {MOVIES}) AS i
+    """,
+    f"""
+    INSERT INTO rating_db (id, user_id, movie_id, rating)
+    SELECT gen_random_uuid(), u.id, m.id, 1 + (u.n + m.n) % 10
+    FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM user_db) AS u
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) AS n FROM movie_db) AS m
+    ON m.n % {USERS // RATINGS_PER_USER} = u.n % {USERS // RATINGS_PER_USER}
+    AND m.n % {RATINGS_PER_USER} = 0
+    """,
+    """
+    INSERT INTO movie_rating_stats (movie_id, shard, count, sum, histogram)
+    SELECT movie_id, 0, count(*), sum(rating), array_fill(0, ARRAY[10])
+    FROM rating_db GROUP BY movie_id
+    """,
+]
+
+
+@pytest.fixture
+async def seeded_ids(db_engine: AsyncEngine) -> dict[str, str]:
+    async with db_engine.begin() as conn:
+        for statement in SEED:
+            await conn.execute(text(statement))
+        row = (
+            await conn.execute(text("SELECT user_id, movie_id FROM rating_db LIMIT 1"))
+        ).one()
+        unrated_movie_id = (
+            await conn.execute(
+                text(
+                    "SELECT id FROM movie_db WHERE id NOT IN "
+                    "(SELECT movie_id FROM rating_db WHERE user_id = :user_id) LIMIT 1"
+                ),
+                {"user_id": row.user_id},
+            )
+        ).scalar_one()
+
+    async with db_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in TopLevelModel.metadata.sorted_tables:
+            await conn.execute(text(f"VACUUM ANALYZE {table.name}"))
+
+    return {
+        "user_id": str(row.user_id),
+        "movie_id": str(row.movie_id),
+        "unrated_movie_id": str(unrated_movie_id),
+    }
+
+
+def _requests(ids: dict[str, str]) -> list[tuple[str, str, Any]]:
+    movie_id, user_id = ids["movie_id"], ids["user_id"]
+    return [
+        ("GET", f"/api/v1/movies/{movie_id}", None),
+        ("GET", f"/api/v1/movies/{movie_id}/stats", None),
+        ("GET", "/api/v1/movies?include_total=exact", None),
+        ("GET", "/api/v1/movies?include_total=estimate&offset=20", None),
+        ("POST", "/api/v1/movies", {"title": "new movie"}),
+        ("POST", "/api/v1/movies:batchGet", {"ids": [movie_id, ids["unrated_movie_id"]]}),
+        ("GET", f"/api/v1/users/{user_id}", None),
+        ("GET", "/api/v1/users/search?q=User 12", None),
+        ("GET", f"/api/v1/users?ids={user_id}", None),
+        ("GET", "/api/v1/users/search?q=user12@", None),
+        ("POST", "/api/v1/users", {"name": "new", "email": "new@test.test"}),
+        ("GET", f"/api/v1/ratings/{movie_id}", None),
+        ("GET", f"/api/v1/ratings/{movie_id}?include_total=estimate&limit=1", None),
+        ("GET", f"/api/v1/user-profile/{user_id}", None),
+        ("GET", f"/api/v1/user-profile/{user_id}?limit=1", None),
+        (
+            "POST",
+            "/api/v1/ratings",
+            {"user_id": user_id, "movie_id": ids["unrated_movie_id"], "rating": 5.0},
+        ),
+        (
+            "POST",
+            "/api/v1/ratings:batch",
+            {
+                "items": [{"user_id": user_id, "movie_id": movie_id, "rating": 5.0}],
+                "on_conflict": "update",
+            },
+        ),
+    ]
+
+
+def _seq_scans(node: dict[str, Any]) -> Iterator[str]:
+    if node["Node Type"] == "Seq Scan":
+        yield node["Relation Name"]
+    for child in node.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+async def test_v1_endpoints_do_not_scan_large_tables(test_client, db_engine, seeded_ids):
+    # Arrange
+    table_rows = {}
+    async with db_engine.connect() as conn:
+        for table in TopLevelModel.metadata.sorted_tables:
+            table_rows[table.name] = (
+                await conn.execute(text(f"SELECT count(*) FROM {table.name}"))
+            ).scalar_one()
+
+    statements: list[tuple[str, Any]] = []
+    event.listen(
+        test_client.app.state.db_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, *args: statements.append(
+            (statement, parameters)
+        ),
+    )
+
+    # Act
+    violations = []
+    for method, url, body in _requests(seeded_ids):
+        statements.clear()
+        response = test_client.request(method, url, json=body)
+        assert response.status_code < 300, (method, url, response.text)
+
+        async with db_engine.connect() as conn:
+            for statement, parameters in statements:
+                # nothing to plan in EXPLAIN itself or savepoint handling
+                if statement.startswith(("EXPLAIN", "SAVEPOINT", "RELEASE SAVEPOINT")):
+                    continue
+                raw = await conn.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                plan = parse_plan(raw.scalar_one())["Plan"]
+                for table in _seq_scans(plan):
+                    if (
+                        table_rows.get(table, 0) > SEQ_SCAN_ROW_THRESHOLD
+                        and (method, url, table) not in ALLOWED_SEQ_SCANS
+                    ):
+                        violations.append((method, url, table, statement))
+
+    # Assert
+    assert not violations
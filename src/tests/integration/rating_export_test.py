@@ -0,0 +1,108 @@
+import csv
+import datetime
+import io
+import json
+
+from starlette import status
+
+from app.domain.repositories.movie_repository import MovieRepository
+from app.domain.repositories.rating_repository import RatingRepository
+from app.domain.repositories.user_repository import UserRepository
+from app.schemas.endpoints import RatingExportOut
+
+
+async def seed(db_session) -> tuple[list, list]:
+    users = [
+        await UserRepository.create(
+            db_session, commit=True, name=f"user {i}", email=f"user{i}@test.test"
+        )
+        for i in range(2)
+    ]
+    movies = [
+        await MovieRepository.create(
+            db_session, commit=True, title=f"movie {i}", description="test"
+        )
+        for i in range(3)
+    ]
+    ratings = [
+        await RatingRepository.create(
+            db_session,
+            commit=True,
+            user_id=user.id,
+            movie_id=movie.id,
+            rating=float(i + j + 1),
+        )
+        for i, user in enumerate(users)
+        for j, movie in enumerate(movies)
+    ]
+    return movies, ratings
+
+
+async def test_export_ratings_ndjson(test_client, db_session):
+    # Arrange
+    _, ratings = await seed(db_session)
+
+    # Act
+    response = test_client.get("api/v1/ratings/export")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["id"] for line in lines) == sorted(str(r.id) for r in ratings)
+    assert set(lines[0]) == {"id", "user_id", "movie_id", "rating", "created_at"}
+
+
+async def test_export_ratings_csv_filtered_by_movie(test_client, db_session):
+    # Arrange
+    movies, ratings = await seed(db_session)
+
+    # Act
+    response = test_client.get(
+        "api/v1/ratings/export", params={"format": "csv", "movie_id": str(movies[0].id)}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    expected = [r for r in ratings if r.movie_id == movies[0].id]
+    assert sorted(row["id"] for row in rows) == sorted(str(r.id) for r in expected)
+    assert {float(row["rating"]) for row in rows} == {r.rating for r in expected}
+
+
+async def test_export_ratings_by_time_range(test_client, db_session):
+    # Arrange
+    await seed(db_session)
+    future = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+
+    # Act
+    after = test_client.get(
+        "api/v1/ratings/export", params={"created_after": future.isoformat()}
+    )
+    before = test_client.get(
+        "api/v1/ratings/export", params={"created_before": future.isoformat()}
+    )
+
+    # Assert
+    assert after.text == ""
+    assert len(before.text.splitlines()) == 6
+
+
+async def test_stream_yields_batches(db_session):
+    # Arrange
+    _, ratings = await seed(db_session)
+
+    # Act
+    batches = [
+        batch
+        async for batch in RatingRepository.stream(
+            db_session, schema=RatingExportOut, batch_size=4
+        )
+    ]
+
+    # Assert
+    assert [len(batch) for batch in batches] == [4, 2]
+    assert {r.id for batch in batches for r in batch} == {r.id for r in ratings}
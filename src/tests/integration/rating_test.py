@@ -1,8 +1,16 @@
+import asyncio
+import uuid
+
+import mock
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from starlette import status
 
+from app.domain.repositories.base_repository import BULK_CREATE_ATTEMPTS
 from app.domain.repositories.movie_repository import MovieRepository
 from app.domain.repositories.rating_repository import RatingRepository
 from app.domain.repositories.user_repository import UserRepository
+from app.exceptions import ConcurrentUpdateError
 
 
 async def test_create_rating(test_client, db_session):
@@ -162,3 +170,217 @@ async def test_get_rating_not_found(test_client, db_session):
 
     assert response_data["total"] == 0
     assert len(response_data["items"]) == 0
+
+
+async def test_get_ratings_by_movie_id_with_cursor(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    ratings = []
+    for i in range(3):
+        user = await UserRepository.create(
+            db_session, commit=True, name=f"Test_{i}", email=f"test_{i}@test.test"
+        )
+        ratings.append(
+            await RatingRepository.create(
+                db_session, commit=True, movie_id=movie.id, user_id=user.id, rating=5.0
+            )
+        )
+
+    # Act
+    ids = []
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 1} | ({"cursor": cursor} if cursor else {})
+        response_data = test_client.get(
+            f"api/v1/ratings/{movie.id}", params=params
+        ).json()
+        ids += [r["id"] for r in response_data["items"]]
+        cursor = response_data["next_cursor"]
+
+    # Assert
+    assert ids == [str(r.id) for r in ratings]
+    assert cursor is None
+
+
+async def test_get_ratings_by_movie_id_estimated_total(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    for i in range(3):
+        user = await UserRepository.create(
+            db_session, commit=True, name=f"Test_{i}", email=f"test_{i}@test.test"
+        )
+        await RatingRepository.create(
+            db_session, commit=True, movie_id=movie.id, user_id=user.id, rating=5.0
+        )
+
+    # Act
+    response = test_client.get(
+        f"api/v1/ratings/{movie.id}", params={"include_total": "estimate", "limit": 1}
+    )
+    response_data = response.json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response_data["total"] >= 1
+    assert len(response_data["items"]) == 1
+
+
+async def test_create_ratings_batch(test_client, db_session):
+    # Arrange
+    movies = [
+        await MovieRepository.create(
+            db_session, commit=True, title=f"test_{i}", description="test"
+        )
+        for i in range(2)
+    ]
+    user = await UserRepository.create(
+        db_session, commit=True, name="Test", email="test@test.test"
+    )
+    existing = await RatingRepository.create(
+        db_session, commit=True, movie_id=movies[0].id, user_id=user.id, rating=2.0
+    )
+    items = [
+        {"movie_id": str(movies[0].id), "user_id": str(user.id), "rating": 3.0},
+        {"movie_id": str(movies[1].id), "user_id": str(user.id), "rating": 4.0},
+        {"movie_id": str(movies[1].id), "user_id": str(user.id), "rating": 5.0},
+        {"movie_id": str(uuid.uuid4()), "user_id": str(user.id), "rating": 5.0},
+        {"movie_id": str(movies[1].id), "user_id": str(uuid.uuid4()), "rating": 5.0},
+    ]
+
+    # Act
+    response = test_client.post("api/v1/ratings:batch", json={"items": items})
+    response_data = response.json()
+    db_ratings = await RatingRepository.find(db_session)
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert [item["status"] for item in response_data["items"]] == [
+        "exists",
+        "duplicate",
+        "created",
+        "movie_not_found",
+        "user_not_found",
+    ]
+    assert response_data["items"][2]["id"] is not None
+
+    assert len(db_ratings) == 2
+    assert {(str(r.movie_id), r.rating) for r in db_ratings} == {
+        (str(movies[0].id), existing.rating),
+        (str(movies[1].id), 5.0),
+    }
+
+
+async def test_create_ratings_batch_updates_existing(test_client, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    users = [
+        await UserRepository.create(
+            db_session, commit=True, name=f"Test_{i}", email=f"test_{i}@test.test"
+        )
+        for i in range(2)
+    ]
+    response = test_client.post(
+        "api/v1/ratings",
+        json={"movie_id": str(movie.id), "user_id": str(users[0].id), "rating": 2.0},
+    )
+    rating_id = response.json()["id"]
+    items = [
+        {"movie_id": str(movie.id), "user_id": str(user.id), "rating": 8.0}
+        for user in users
+    ]
+
+    # Act
+    response = test_client.post(
+        "api/v1/ratings:batch", json={"items": items, "on_conflict": "update"}
+    )
+    response_data = response.json()
+    stats = test_client.get(f"api/v1/movies/{movie.id}/stats").json()
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    assert [item["status"] for item in response_data["items"]] == ["updated", "created"]
+    assert response_data["items"][0]["id"] == rating_id
+
+    assert stats["count"] == 2
+    assert stats["sum"] == 16.0
+    assert stats["histogram"] == [0, 0, 0, 0, 0, 0, 0, 2, 0, 0]
+
+
+async def test_bulk_create_update_sees_concurrently_inserted_row(db_engine, db_session):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    user = await UserRepository.create(
+        db_session, commit=True, name="Test", email="test@test.test"
+    )
+    item = {"movie_id": movie.id, "user_id": user.id, "rating": 8.0}
+    async with async_sessionmaker(bind=db_engine)() as other_session:
+        # not committed yet, so the batch doesn't lock it and waits on it instead
+        await RatingRepository.create(
+            other_session, movie_id=movie.id, user_id=user.id, rating=3.0
+        )
+
+        # Act
+        task = asyncio.create_task(
+            RatingRepository.bulk_create(
+                db_session,
+                [item],
+                conflict_target=["user_id", "movie_id"],
+                update_fields=["rating"],
+                returning=["id", "rating"],
+            )
+        )
+        await asyncio.sleep(0.5)
+        await other_session.commit()
+        rows = await task
+
+    # Assert
+    assert len(rows) == 1
+    assert not rows[0].inserted
+    assert rows[0].rating == 8.0
+    assert rows[0].previous_rating == 3.0
+
+
+async def test_bulk_create_update_gives_up_after_attempts(db_session, monkeypatch):
+    # Arrange
+    movie = await MovieRepository.create(
+        db_session, commit=True, title="test", description="test"
+    )
+    user = await UserRepository.create(
+        db_session, commit=True, name="Test", email="test@test.test"
+    )
+    await RatingRepository.create(
+        db_session, commit=True, movie_id=movie.id, user_id=user.id, rating=3.0
+    )
+    # as if the rating was inserted concurrently before every upsert
+    lock_existing = mock.AsyncMock(return_value=set())
+    monkeypatch.setattr(RatingRepository, "_lock_existing", lock_existing)
+
+    # Act / Assert
+    with pytest.raises(ConcurrentUpdateError):
+        await RatingRepository.bulk_create(
+            db_session,
+            [{"movie_id": movie.id, "user_id": user.id, "rating": 8.0}],
+            conflict_target=["user_id", "movie_id"],
+            update_fields=["rating"],
+            returning=["id", "rating"],
+        )
+    assert lock_existing.await_count == BULK_CREATE_ATTEMPTS
+
+
+async def test_create_ratings_batch_rejects_empty_batch(test_client, db_session):
+    # Act
+    response = test_client.post("api/v1/ratings:batch", json={"items": []})
+
+    # Assert
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
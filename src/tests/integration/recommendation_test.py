@@ -0,0 +1,96 @@
+import uuid
+
+from starlette import status
+
+from app.domain.repositories.movie_neighbor_repository import MovieNeighborRepository
+from app.domain.repositories.movie_repository import MovieRepository
+from app.domain.repositories.rating_repository import RatingRepository
+from app.domain.repositories.user_repository import UserRepository
+from app.domain.services.recommendation_service import build_movie_neighbors
+
+
+async def seed(db_session) -> tuple[dict, dict]:
+    movies = {
+        title: await MovieRepository.create(
+            db_session, commit=True, title=title, description=title
+        )
+        for title in ("a", "b", "c")
+    }
+    # "a" and "b" appeal to the same users, "c" to the others
+    ratings = {
+        "fan": {"a": 9.0, "b": 9.0, "c": 2.0},
+        "other fan": {"a": 8.0, "b": 9.0, "c": 3.0},
+        "critic": {"a": 2.0, "b": 3.0, "c": 9.0},
+        "target": {"a": 9.0, "c": 3.0},
+    }
+    users = {}
+    for name, rated in ratings.items():
+        user = await UserRepository.create(
+            db_session, commit=True, name=name, email=f"{name.replace(' ', '')}@test.test"
+        )
+        users[name] = user
+        for title, rating in rated.items():
+            await RatingRepository.create(
+                db_session,
+                commit=True,
+                user_id=user.id,
+                movie_id=movies[title].id,
+                rating=rating,
+            )
+    return users, movies
+
+
+async def test_build_movie_neighbors(db_session):
+    # Arrange
+    _, movies = await seed(db_session)
+
+    # Act
+    written = await build_movie_neighbors(db_session)
+    neighbors = await MovieNeighborRepository.find(db_session)
+
+    # Assert
+    assert written == len(neighbors)
+    pairs = {(n.movie_id, n.neighbor_id) for n in neighbors}
+    assert pairs == {
+        (movies["a"].id, movies["b"].id),
+        (movies["b"].id, movies["a"].id),
+    }
+
+
+async def test_get_recommendations(test_client, db_session):
+    # Arrange
+    users, movies = await seed(db_session)
+    await build_movie_neighbors(db_session)
+
+    # Act
+    response = test_client.get(f"api/v1/users/{users['target'].id}/recommendations")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+    [item] = response.json()["items"]
+    assert item["movie_id"] == str(movies["b"].id)
+    assert item["title"] == "b"
+    # the target's rating of "a", shrunk by the single neighbor's similarity
+    assert 0 < item["score"] < 9
+
+
+async def test_get_recommendations_excludes_rated_movies(test_client, db_session):
+    # Arrange
+    users, _ = await seed(db_session)
+    await build_movie_neighbors(db_session)
+
+    # Act
+    response = test_client.get(f"api/v1/users/{users['fan'].id}/recommendations?k=5")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["items"] == []
+
+
+async def test_get_recommendations_of_unknown_user(test_client):
+    # Act
+    response = test_client.get(f"api/v1/users/{uuid.uuid4()}/recommendations")
+
+    # Assert
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,107 @@
+import uuid
+
+import mock
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from starlette import status
+
+from app.dependencies import PRIMARY_UNTIL_COOKIE
+from app.domain.repositories.cache import get_entity_caches
+from app.main import create_app
+from app.settings import settings
+
+
+@pytest_asyncio.fixture
+async def replica_client():
+    # the test DB stands in for its own replica, through an engine of its own
+    with mock.patch.object(settings.db, "replica_hosts", ["localhost"]):
+        with TestClient(create_app()) as client:
+            yield client
+
+
+def record_statements(engine) -> list[str]:
+    statements: list[str] = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+async def test_reads_go_to_replica(replica_client):
+    # Arrange
+    [replica] = replica_client.app.state.db_replicas.engines
+    on_primary = record_statements(replica_client.app.state.db_engine)
+    on_replica = record_statements(replica)
+
+    # Act
+    response = replica_client.get("api/v1/movies")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert PRIMARY_UNTIL_COOKIE not in response.cookies
+
+    assert on_primary == []
+    assert on_replica
+
+
+async def test_reads_after_write_go_to_primary(replica_client):
+    # Arrange
+    [replica] = replica_client.app.state.db_replicas.engines
+    created = replica_client.post(
+        "api/v1/movies", json={"title": "test", "description": "test"}
+    )
+    on_primary = record_statements(replica_client.app.state.db_engine)
+    on_replica = record_statements(replica)
+
+    # Act
+    response = replica_client.get("api/v1/movies")
+
+    # Assert
+    assert created.status_code == status.HTTP_201_CREATED
+    assert PRIMARY_UNTIL_COOKIE in created.cookies
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [m["id"] for m in response.json()["items"]] == [created.json()["id"]]
+    assert on_primary
+    assert on_replica == []
+
+
+async def test_reads_go_back_to_replica_after_window(replica_client):
+    # Arrange
+    [replica] = replica_client.app.state.db_replicas.engines
+    with mock.patch.object(settings.db, "read_your_writes_window", 0.0):
+        replica_client.post(
+            "api/v1/movies", json={"title": "test", "description": "test"}
+        )
+    on_replica = record_statements(replica)
+
+    # Act
+    response = replica_client.get("api/v1/movies")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert on_replica
+
+
+async def test_reads_from_replica_are_not_cached(replica_client):
+    # Arrange
+    with mock.patch.object(settings.db, "read_your_writes_window", 0.0):
+        created = replica_client.post(
+            "api/v1/movies", json={"title": "test", "description": "test"}
+        ).json()
+    [replica] = replica_client.app.state.db_replicas.engines
+    on_replica = record_statements(replica)
+
+    # Act
+    first = replica_client.get(f"api/v1/movies/{created['id']}")
+    second = replica_client.get(f"api/v1/movies/{created['id']}")
+    batch = replica_client.get("api/v1/movies", params={"ids": created["id"]})
+
+    # Assert
+    assert first.json() == second.json() == created
+    assert [m["id"] for m in batch.json()["items"]] == [created["id"]]
+    assert len(on_replica) == 3
+    assert await get_entity_caches()["movie"].get(uuid.UUID(created["id"])) is None
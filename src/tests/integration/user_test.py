@@ -80,3 +80,83 @@ async def test_get_user_not_found(test_client, db_session):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
     assert response_data["detail"] == "User not found"
+
+
+async def test_search_users_by_name_or_email_prefix(test_client, db_session):
+    # Arrange
+    users = {
+        name: await UserRepository.create(db_session, commit=True, name=name, email=email)
+        for name, email in [
+            ("Ann Lee", "ann@test.test"),
+            ("Annabel Stone", "bel@test.test"),
+            ("Bob", "anna.b@test.test"),
+            ("Zoe", "zoe@test.test"),
+        ]
+    }
+
+    # Act
+    response = test_client.get("api/v1/users/search", params={"q": "ANN"})
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    ids = [u["id"] for u in response.json()["items"]]
+    assert ids == [str(users[name].id) for name in ("Ann Lee", "Annabel Stone", "Bob")]
+
+
+async def test_search_users_with_cursor(test_client, db_session):
+    # Arrange
+    for i in range(3):
+        await UserRepository.create(
+            db_session, commit=True, name=f"user {i}", email=f"user{i}@test.test"
+        )
+
+    # Act
+    first_page = test_client.get(
+        "api/v1/users/search", params={"q": "user", "limit": 2}
+    ).json()
+    second_page = test_client.get(
+        "api/v1/users/search",
+        params={"q": "user", "limit": 2, "cursor": first_page["next_cursor"]},
+    ).json()
+
+    # Assert
+    assert [u["name"] for u in first_page["items"]] == ["user 0", "user 1"]
+    assert [u["name"] for u in second_page["items"]] == ["user 2"]
+    assert second_page["next_cursor"] is None
+
+
+async def test_search_users_prefix_is_not_a_pattern(test_client, db_session):
+    # Arrange
+    await UserRepository.create(
+        db_session, commit=True, name="Ann", email="ann@test.test"
+    )
+
+    # Act
+    response = test_client.get("api/v1/users/search", params={"q": "_nn"})
+
+    # Assert
+    assert response.json()["items"] == []
+
+
+async def test_batch_get_users(test_client, db_session):
+    # Arrange
+    users = [
+        await UserRepository.create(
+            db_session, commit=True, name=f"user {i}", email=f"user{i}@test.test"
+        )
+        for i in range(2)
+    ]
+    missing_id = str(uuid.uuid4())
+    ids = [str(users[1].id), str(users[0].id), missing_id, str(users[1].id)]
+
+    # Act
+    post_response = test_client.post("api/v1/users:batchGet", json={"ids": ids})
+    get_response = test_client.get("api/v1/users", params={"ids": ids})
+
+    # Assert
+    assert post_response.status_code == status.HTTP_200_OK
+    assert post_response.json() == get_response.json()
+
+    response_data = post_response.json()
+    assert [u["name"] for u in response_data["items"]] == ["user 1", "user 0"]
+    assert response_data["missing_ids"] == [missing_id]